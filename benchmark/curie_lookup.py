@@ -0,0 +1,113 @@
+"""
+Compares looking up CURIEs for IRIs through rdflib's NamespaceManager.compute_qname, and IRIs for CURIEs through an
+aiocache memory cache, as Prez used to, with Prez's CurieIndex. Run from the repository root:
+python -m benchmark.curie_lookup
+"""
+
+import asyncio
+import timeit
+
+from aiocache import SimpleMemoryCache
+from aiocache.serializers import PickleSerializer
+from rdflib import Graph, URIRef
+
+from prez.cache import prefix_graph
+from prez.services.curie_functions import CurieIndex
+
+NAMESPACES = 2_000
+IRIS_PER_NAMESPACE = 50
+REPEATS = 5
+
+
+def compute_qname_lookup(graph: Graph, uri: URIRef) -> str:
+    prefix, _, name = graph.compute_qname(uri, generate=False)
+    return f"{prefix}:{name}"
+
+
+def main():
+    namespaces = [
+        f"https://benchmark.example.com/dataset{i}/" for i in range(NAMESPACES)
+    ]
+    for i, namespace in enumerate(namespaces):
+        prefix_graph.bind(f"bm{i}", namespace)
+    iris = [
+        URIRef(f"{namespace}item{j}")
+        for j in range(IRIS_PER_NAMESPACE)
+        for namespace in namespaces
+    ]
+    print(f"{len(iris):,} IRIs in {NAMESPACES:,} namespaces")
+
+    def rdflib_cold():
+        # a fresh namespace manager, so its memo of computed qnames is empty
+        graph = Graph(bind_namespaces="none")
+        for prefix, namespace in prefix_graph.namespaces():
+            graph.bind(prefix, namespace)
+        for iri in iris:
+            compute_qname_lookup(graph, iri)
+
+    def index_cold():
+        index = CurieIndex()
+        for iri in iris:
+            index.curie_for_uri(str(iri))
+
+    warm_graph = Graph(bind_namespaces="none")
+    for prefix, namespace in prefix_graph.namespaces():
+        warm_graph.bind(prefix, namespace)
+    warm_index = CurieIndex()
+    for iri in iris:
+        compute_qname_lookup(warm_graph, iri)
+        warm_index.curie_for_uri(str(iri))
+
+    def rdflib_warm():
+        for iri in iris:
+            compute_qname_lookup(warm_graph, iri)
+
+    def index_warm():
+        for iri in iris:
+            warm_index.curie_for_uri(str(iri))
+
+    curies = [warm_index.curie_for_uri(str(iri)) for iri in iris]
+    curie_cache = SimpleMemoryCache(serializer=PickleSerializer())
+    loop = asyncio.new_event_loop()
+
+    async def fill_cache():
+        for curie, iri in zip(curies, iris):
+            await curie_cache.set(curie, iri)
+
+    async def read_cache():
+        for curie in curies:
+            await curie_cache.get(curie)
+
+    loop.run_until_complete(fill_cache())
+    for curie in curies:
+        warm_index.uri_for_curie(curie)
+
+    def aiocache_warm():
+        loop.run_until_complete(read_cache())
+
+    def index_reverse_warm():
+        for curie in curies:
+            warm_index.uri_for_curie(curie)
+
+    for name, old_name, old_run, index_run in (
+        ("IRI to CURIE, first lookup", "compute_qname", rdflib_cold, index_cold),
+        ("IRI to CURIE, repeated lookup", "compute_qname", rdflib_warm, index_warm),
+        (
+            "CURIE to IRI, repeated lookup",
+            "aiocache",
+            aiocache_warm,
+            index_reverse_warm,
+        ),
+    ):
+        old_time = min(timeit.repeat(old_run, number=1, repeat=REPEATS))
+        index_time = min(timeit.repeat(index_run, number=1, repeat=REPEATS))
+        print(
+            f"{name}: {old_name} {old_time * 1e6 / len(iris):.2f}us, "
+            f"CurieIndex {index_time * 1e6 / len(iris):.2f}us, "
+            f"{old_time / index_time:.1f}x"
+        )
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
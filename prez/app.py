@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from functools import partial
@@ -7,6 +8,7 @@ from typing import Any, Dict, Optional, Union
 
 import httpx
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.openapi.utils import get_openapi
 from rdflib import Graph
 from starlette.applications import Starlette
@@ -18,6 +20,7 @@ from prez.config import Settings, settings
 from prez.dependencies import (
     get_annotations_store,
     get_async_http_client,
+    get_oxrdflib_pyoxi_store,
     get_oxrdflib_store,
     get_pyoxi_store,
     get_queryable_props,
@@ -35,8 +38,13 @@ from prez.exceptions.model_exceptions import (
     URINotFoundException,
     MissingFilterQueryError,
 )
-from prez.middleware import create_validate_header_middleware
+from prez.middleware import (
+    create_readiness_middleware,
+    create_validate_header_middleware,
+)
 from prez.repositories import OxrdflibRepo, PyoxigraphRepo, RemoteSparqlRepo
+from prez.repositories.pyoxigraph import shutdown_stream_executor
+from prez.repositories.remote_sparql import shutdown_parse_executor
 from prez.routers.base_router import router as base_prez_router
 from prez.routers.custom_endpoints import create_dynamic_router
 from prez.routers.identifier import router as identifier_router
@@ -55,6 +63,9 @@ from prez.services.app_service import (
     retrieve_remote_template_queries,
     retrieve_jena_fts_shapes,
 )
+from prez.services.annotation_filter import annotation_filter
+from prez.services.annotations import preload_annotations
+from prez.services.curie_functions import curie_index
 from prez.services.exception_catchers import (
     catch_400,
     catch_404,
@@ -69,6 +80,13 @@ from prez.services.exception_catchers import (
     catch_missing_filter_query_param,
 )
 from prez.services.generate_profiles import create_profiles_graph
+from prez.services.startup import StartupStep, run_startup_steps
+from prez.services.startup_snapshot import (
+    load_snapshot,
+    save_snapshot,
+    snapshot_path,
+    startup_fingerprint,
+)
 from prez.services.prez_logging import setup_logger
 
 
@@ -108,7 +126,42 @@ async def lifespan(app: FastAPI):
     setup_logger(app.state.settings)
     log = logging.getLogger("prez")
     log.info("Starting up")
+    app.state.ready = False
+
+    if app.state.settings.serve_before_ready:
+        # serve /health (as not ready) while waiting for the triplestore and building the caches
+        startup = asyncio.create_task(start_up(app))
+        startup.add_done_callback(partial(_startup_done, app, log))
+    else:
+        await start_up(app)
+
+    yield
+
+    # Shutdown
+    log.info("Shutting down...")
+    if app.state.settings.serve_before_ready and not startup.done():
+        startup.cancel()
+        await asyncio.gather(startup, return_exceptions=True)
 
+    # close all SPARQL async clients
+    if app.state.settings.sparql_repo_type == "remote" and hasattr(
+        app.state, "http_async_client"
+    ):
+        if hasattr(app.state, "repo"):
+            await app.state.repo.replica_pool.stop_health_checks()
+        await app.state.http_async_client.aclose()
+        shutdown_parse_executor()
+    shutdown_stream_executor()
+
+
+def _startup_done(app: FastAPI, log: logging.Logger, startup: asyncio.Task):
+    if not startup.cancelled() and startup.exception() is not None:
+        app.state.startup_failed = True
+        log.error("Startup failed", exc_info=startup.exception())
+
+
+async def start_up(app: FastAPI):
+    """Connects to the data repository and builds Prez's caches and routes, then marks the app as ready."""
     mounted_apps = []
     # Find mounted sub-apps
     for r in app.router.routes:
@@ -127,35 +180,36 @@ async def lifespan(app: FastAPI):
             mounted_app.state.pyoxi_store = pyoxi_store
         app.state.repo = repo = PyoxigraphRepo(pyoxi_store)
         await load_local_data_to_oxigraph(pyoxi_store)
-    elif app.state.settings.sparql_repo_type == "pyoxigraph_persistent":
-        app.state.pyoxi_store = pyoxi_store = get_pyoxi_store()
+    elif app.state.settings.sparql_repo_type in (
+        "pyoxigraph_persistent",
+        "pyoxigraph_shared",
+    ):
+        # the shared store may have to wait for, or do, the build of the store on disk
+        app.state.pyoxi_store = pyoxi_store = await run_in_threadpool(get_pyoxi_store)
         for mounted_app in mounted_apps:
             mounted_app.state.pyoxi_store = pyoxi_store
         app.state.repo = repo = PyoxigraphRepo(pyoxi_store)
     elif app.state.settings.sparql_repo_type == "oxrdflib":
         app.state.oxrdflib_store = oxrdflib_store = get_oxrdflib_store()
+        app.state.oxrdflib_pyoxi_store = oxrdflib_pyoxi_store = (
+            get_oxrdflib_pyoxi_store()
+        )
         for mounted_app in mounted_apps:
             mounted_app.state.oxrdflib_store = oxrdflib_store
-        app.state.repo = repo = OxrdflibRepo(oxrdflib_store)
+            mounted_app.state.oxrdflib_pyoxi_store = oxrdflib_pyoxi_store
+        app.state.repo = repo = OxrdflibRepo(oxrdflib_store, oxrdflib_pyoxi_store)
     elif app.state.settings.sparql_repo_type == "remote":
         app.state.http_async_client = c = await get_async_http_client()
         for mounted_app in mounted_apps:
             mounted_app.state.http_async_client = c
         app.state.repo = repo = RemoteSparqlRepo(c)
-        await healthcheck_sparql_endpoints()
+        await healthcheck_sparql_endpoints(c)
+        repo.replica_pool.start_health_checks(c)
     else:
         raise ValueError(
-            "SPARQL_REPO_TYPE must be one of 'pyoxigraph_memory', 'pyoxigraph_persistent', 'oxrdflib' or 'remote'"
+            "SPARQL_REPO_TYPE must be one of 'pyoxigraph_memory', 'pyoxigraph_persistent', 'pyoxigraph_shared', 'oxrdflib' or 'remote'"
         )
 
-    await prefix_initialisation(repo)
-    await retrieve_remote_template_queries(repo)
-    await retrieve_jena_fts_shapes(repo)
-    await create_profiles_graph(repo)
-    await create_endpoints_graph(app.state)
-    await count_objects(repo)
-    await populate_api_info()
-
     app.state.queryable_props = get_queryable_props()
     app.state.pyoxi_system_store = system_store = get_system_store()
     app.state.annotations_store = anno_store = get_annotations_store()
@@ -165,22 +219,89 @@ async def lifespan(app: FastAPI):
         mounted_app.state.pyoxi_system_store = system_store
         mounted_app.state.annotations_store = anno_store
 
-    await retrieve_remote_queryable_definitions(app.state, system_store)
-    await retrieve_local_queryable_definitions(app.state, system_store)
-    await load_system_data_to_oxigraph(system_store)
-    await load_annotations_data_to_oxigraph(anno_store)
+    snapshot = snapshot_path()
+    fingerprint = await startup_fingerprint(repo) if snapshot else None
+    restored = fingerprint is not None and await run_in_threadpool(
+        load_snapshot, snapshot, fingerprint
+    )
+    # the system store is restored from the snapshot; otherwise the steps which read it wait for it to be loaded
+    system_data = () if restored else ("system_data",)
+    # the annotations are loaded from reference data files, which is quick, and are not in the snapshot
+    annotations_steps = [
+        StartupStep(
+            "annotations", partial(load_annotations_data_to_oxigraph, anno_store)
+        )
+    ]
+    if app.state.settings.preload_annotations:
+        annotations_steps.append(
+            StartupStep(
+                "preload_annotations",
+                partial(
+                    preload_annotations, repo, anno_store, PyoxigraphRepo(system_store)
+                ),
+                after=("annotations",) + system_data,
+            )
+        )
+    if app.state.settings.annotation_filter_enabled:
+        annotations_steps.append(
+            StartupStep(
+                "annotation_filter",
+                partial(annotation_filter.build, repo, anno_store, system_store),
+                after=tuple(step.name for step in annotations_steps) + system_data,
+            )
+        )
+    if restored:
+        await run_startup_steps(annotations_steps)
+    else:
+        # Steps run concurrently unless one needs another's results. The system store is loaded from the profiles,
+        # endpoints and system graphs, so it waits for every step that adds to them.
+        await run_startup_steps(
+            [
+                StartupStep("prefixes", partial(prefix_initialisation, repo)),
+                StartupStep(
+                    "template_queries", partial(retrieve_remote_template_queries, repo)
+                ),
+                StartupStep("jena_fts_shapes", partial(retrieve_jena_fts_shapes, repo)),
+                StartupStep("profiles", partial(create_profiles_graph, repo)),
+                StartupStep("endpoints", partial(create_endpoints_graph, app.state)),
+                StartupStep("counts", partial(count_objects, repo)),
+                StartupStep("api_info", populate_api_info),
+                StartupStep(
+                    "remote_queryables",
+                    partial(
+                        retrieve_remote_queryable_definitions, app.state, system_store
+                    ),
+                ),
+                StartupStep(
+                    "local_queryables",
+                    partial(
+                        retrieve_local_queryable_definitions, app.state, system_store
+                    ),
+                ),
+                StartupStep(
+                    "system_data",
+                    partial(load_system_data_to_oxigraph, system_store),
+                    after=(
+                        "template_queries",
+                        "jena_fts_shapes",
+                        "profiles",
+                        "endpoints",
+                        "api_info",
+                        "remote_queryables",
+                        "local_queryables",
+                    ),
+                ),
+            ]
+            + annotations_steps
+        )
+        if fingerprint is not None:
+            await run_in_threadpool(save_snapshot, snapshot, fingerprint)
+    # prefixes may have been bound directly in the prefix graph, or rebound, while the startup steps ran
+    curie_index.reset()
 
     # dynamic routes are either: custom routes if enabled, else default prez "data" routes are added dynamically
     app.include_router(create_dynamic_router())
-
-    yield
-
-    # Shutdown
-    log.info("Shutting down...")
-
-    # close all SPARQL async clients
-    if app.state.settings.sparql_repo_type == "remote":
-        await app.state.http_async_client.aclose()
+    app.state.ready = True
 
 
 def assemble_app(
@@ -268,6 +389,8 @@ def assemble_app(
         settings.required_header
     )
     app.middleware("http")(validate_header_middleware)
+    if _settings.serve_before_ready:
+        app.middleware("http")(create_readiness_middleware(_settings.root_path))
 
     return app
 
@@ -1,7 +1,10 @@
-from aiocache import caches
+from oxrdflib import OxigraphStore
 from pyoxigraph.pyoxigraph import Store
 from rdflib import ConjunctiveGraph, Graph
 
+from prez.config import settings
+from prez.services.memory_cache import LRUMemoryCache
+
 profiles_graph_cache = Graph()
 profiles_graph_cache.bind("prez", "https://prez.dev/")
 
@@ -26,23 +29,24 @@ system_store = Store()
 
 annotations_store = Store()
 
+# terms whose annotations in the data repository have been copied into the annotations store
+preloaded_annotation_terms: set[str] = set()
+
 queryable_props = {}
 
-oxrdflib_store = Graph(store="Oxigraph")
-
-caches.set_config(
-    {
-        "default": {
-            "cache": "aiocache.SimpleMemoryCache",
-            "serializer": {"class": "aiocache.serializers.PickleSerializer"},
-        },
-        "curies": {
-            "cache": "aiocache.SimpleMemoryCache",
-            "serializer": {"class": "aiocache.serializers.PickleSerializer"},
-        },
-        "classes": {
-            "cache": "aiocache.SimpleMemoryCache",
-            "serializer": {"class": "aiocache.serializers.PickleSerializer"},
-        },
-    }
+# the pyoxigraph Store holding oxrdflib_store's data, which OxrdflibRepo queries directly
+oxrdflib_pyoxi_store = Store()
+
+oxrdflib_store = Graph(store=OxigraphStore(store=oxrdflib_pyoxi_store))
+
+# annotations (labels, descriptions etc.) of terms, keyed by term
+annotations_cache = LRUMemoryCache(
+    max_entries=settings.annotations_cache_max_entries,
+    max_bytes=settings.annotations_cache_max_bytes,
+)
+
+# classes of focus nodes, keyed by focus node
+classes_cache = LRUMemoryCache(
+    max_entries=settings.classes_cache_max_entries,
+    max_bytes=settings.classes_cache_max_bytes,
 )
@@ -20,6 +20,8 @@ class SparqlRepoType(str, Enum):
     pyoxigraph_persistent: str = "pyoxigraph_persistent"
     #: Pyoxigraph store in memory with optional loading of RDF from Turtle files
     pyoxigraph_memory: str = "pyoxigraph_memory"
+    #: Pyoxigraph store built on disk from Turtle files once, and opened read-only by every worker process
+    pyoxigraph_shared: str = "pyoxigraph_shared"
     #: oxrdflib store in memory with optional loading of RDF from Turtle files
     oxrdflib: str = "oxrdflib"
 
@@ -27,6 +29,19 @@ class SparqlRepoType(str, Enum):
 class Settings(BaseSettings):
     """
     sparql_endpoint: Read-only SPARQL endpoint for Prez
+    sparql_read_endpoints: Identical read replicas to spread queries across, instead of sending them all to sparql_endpoint. Each query goes to the healthy replica with the fewest requests in flight.
+    sparql_hedge_requests: Send a duplicate of a remote query that has not been answered within the hedge delay, and use whichever response arrives first.
+    sparql_hedge_percentile: The percentile of recent query latencies used as the hedge delay.
+    sparql_hedge_max_ratio: The maximum fraction of queries sent to the remote endpoints which may be hedges.
+    sparql_max_connections: The maximum number of concurrent connections to the remote SPARQL endpoints.
+    sparql_max_keepalive_connections: The maximum number of idle connections kept open for reuse.
+    sparql_keepalive_expiry: Seconds an idle connection is kept open for.
+    sparql_http2: Use HTTP/2 for remote SPARQL endpoints that support it, so concurrent queries share connections. Requires the 'h2' package.
+    sparql_health_check_interval: Seconds between health checks of the SPARQL read replicas, which only run when there is more than one; 0 disables them. Failing replicas stop receiving queries until a health check succeeds.
+    sparql_startup_timeout: Seconds to wait at startup for the SPARQL endpoint to respond before failing; 0 waits indefinitely.
+    sparql_startup_backoff_max: The longest wait, in seconds, between attempts to reach the SPARQL endpoint at startup.
+    serve_before_ready: Start serving requests before startup has finished. /health responds 503 until Prez is ready, and other requests are refused with a 503.
+    startup_snapshot_dir: A directory to save a snapshot of the caches Prez builds at startup in, so the next start with unchanged data and settings restores them instead of rebuilding them.
     sparql_username: A username for the Prez SPARQL endpoint, if required by the RDF DB
     sparql_password:  A password for the Prez SPARQL endpoint, if required by the RDF DB
     protocol: The protocol used to deliver Prez. Usually 'http', could be 'https'.
@@ -34,6 +49,31 @@ class Settings(BaseSettings):
     port: The port Prez is made accessible on. Default is 8000, could be 80 or anything else that your system has permission to use
     system_uri: Documentation property. An IRI for the Prez system as a whole. This value appears in the landing page RDF delivered by Prez ('/')
     listing_count_limit: The maximum number of items to count for a listing endpoint. Counts greater than this limit will be returned as ">N" where N is the limit.
+    sparql_parse_inline_threshold: Remote SPARQL results smaller than this many bytes are parsed directly on the event loop; larger ones are parsed in a dedicated thread pool.
+    sparql_parse_workers: The number of threads in the pool used to parse remote SPARQL results.
+    sparql_coalesce_queries: Identical queries sent concurrently through the same repository share one backend call.
+    sparql_result_cache_enabled: Cache raw responses from a remote SPARQL endpoint, keyed by query and mediatype.
+    sparql_result_cache_max_bytes: The maximum total size of the cached responses; least recently used responses are evicted first.
+    sparql_result_cache_ttl: Seconds a cached response is used for.
+    sparql_data_version_query: A SELECT or ASK query whose result changes whenever the data changes; the result cache is cleared when it does.
+    sparql_data_version_check_interval: The minimum number of seconds between runs of the data version query.
+    sparql_batch_construct_queries: Merge the CONSTRUCT queries sent together for one request into a single query, so a remote SPARQL endpoint answers them in one round trip.
+    sparql_stream_results: Request N-Triples from a remote SPARQL endpoint and parse CONSTRUCT/DESCRIBE results as they arrive, rather than after the whole response has been read.
+    pyoxigraph_shared_store_dir: The directory the pyoxigraph_shared repository type builds its on-disk store in.
+    pyoxigraph_load_workers: The number of processes parsing local data files in parallel; defaults to the number of CPUs.
+    pyoxigraph_stream_workers: The number of /sparql responses from a local pyoxigraph store streamed at once.
+    annotations_cache_max_entries: The maximum number of terms whose annotations are cached.
+    annotations_cache_max_bytes: The maximum estimated size of the annotations cache; least recently used terms are evicted first.
+    classes_cache_max_entries: The maximum number of focus nodes whose classes are cached.
+    classes_cache_max_bytes: The maximum estimated size of the classes cache; least recently used focus nodes are evicted first.
+    preload_annotations: At startup, copy the annotations of every predicate and class used in the data into the annotations store and cache them, so they are never looked up in the data repository.
+    lookup_chunk_size: The maximum number of terms in each annotation or class lookup query; 0 puts them all in one query.
+    lookup_concurrency: The maximum number of chunks of one annotation or class lookup queried at once.
+    annotation_filter_enabled: Skip annotation lookups for terms that Bloom filters over the annotated subjects show have no annotations.
+    annotation_filter_data_repo: Also build a Bloom filter over the subjects with annotations in the data repository.
+    annotation_filter_false_positive_rate: The rate at which the annotation filters let through terms that have no annotations.
+    annotation_languages: Return only the annotations in the language that best matches the request's Accept-Language header, falling back to the default language, for each annotation predicate.
+    curie_cache_size: The number of IRI to CURIE, and CURIE to IRI, lookups remembered.
     log_level:
     log_output:
     prez_title:
@@ -42,6 +82,19 @@ class Settings(BaseSettings):
     """
 
     sparql_endpoint: Optional[str] = None
+    sparql_read_endpoints: List[str] = []
+    sparql_health_check_interval: float = 10
+    sparql_startup_timeout: float = 0
+    sparql_startup_backoff_max: float = 30
+    serve_before_ready: bool = False
+    startup_snapshot_dir: Optional[str] = None
+    sparql_hedge_requests: bool = False
+    sparql_hedge_percentile: float = 95
+    sparql_hedge_max_ratio: float = 0.05
+    sparql_max_connections: int = 100
+    sparql_max_keepalive_connections: int = 20
+    sparql_keepalive_expiry: float = 5.0
+    sparql_http2: bool = False
     sparql_username: Optional[str] = None
     sparql_password: Optional[str] = None
     protocol: str = "http"
@@ -77,7 +130,20 @@ class Settings(BaseSettings):
     sparql_repo_type: SparqlRepoType = SparqlRepoType.remote
     sparql_timeout: int = 60
     sparql_timeout_param_name: Optional[str] = "timeout"
+    sparql_stream_results: bool = False
+    sparql_batch_construct_queries: bool = False
+    sparql_coalesce_queries: bool = True
+    sparql_result_cache_enabled: bool = False
+    sparql_result_cache_max_bytes: int = 256 * 1024 * 1024
+    sparql_result_cache_ttl: int = 300
+    sparql_data_version_query: Optional[str] = None
+    sparql_data_version_check_interval: int = 30
+    sparql_parse_inline_threshold: int = 65_536
+    sparql_parse_workers: int = 4
     pyoxigraph_data_dir: str = "pyoxigraph_data_dir"
+    pyoxigraph_shared_store_dir: str = "pyoxigraph_shared_store"
+    pyoxigraph_load_workers: Optional[int] = None
+    pyoxigraph_stream_workers: int = 4
     log_level: str = "INFO"
     log_output: str = "stdout"
     prez_title: Optional[str] = "Prez"
@@ -88,6 +154,18 @@ class Settings(BaseSettings):
     prez_version: Optional[str] = None
     prez_contact: Optional[Dict[str, Union[str, Any]]] = None
     disable_prefix_generation: bool = False
+    curie_cache_size: int = 100000
+    lookup_chunk_size: int = 1000
+    preload_annotations: bool = False
+    lookup_concurrency: int = 4
+    annotation_filter_enabled: bool = False
+    annotation_filter_data_repo: bool = False
+    annotation_filter_false_positive_rate: float = 0.01
+    annotation_languages: bool = False
+    annotations_cache_max_entries: int = 500000
+    annotations_cache_max_bytes: int = 512 * 1024 * 1024
+    classes_cache_max_entries: int = 500000
+    classes_cache_max_bytes: int = 128 * 1024 * 1024
     default_language: str = "en"
     endpoint_structure: Optional[Tuple[str, ...]] = ("catalogs", "collections", "items")
     system_endpoints: Optional[List[URIRef]] = [
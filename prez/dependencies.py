@@ -1,9 +1,11 @@
 import json
 import logging
+import os
 from pathlib import Path
 
 import httpx
 from fastapi import Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from pyoxigraph import Store, RdfFormat, DefaultGraph as OxiDefaultGraph
 from rdflib import DCTERMS, RDF, SKOS, Literal, URIRef, Graph
 from sparql_grammar_pydantic import IRI, Var
@@ -11,6 +13,7 @@ from sparql_grammar_pydantic import IRI, Var
 from prez.cache import (
     annotations_store,
     endpoints_graph_cache,
+    oxrdflib_pyoxi_store,
     oxrdflib_store,
     prez_system_graph,
     profiles_graph_cache,
@@ -38,6 +41,13 @@ from prez.reference_data.prez_ns import ALTREXT, EP, OGCE, OGCFEAT, ONT
 from prez.repositories import OxrdflibRepo, PyoxigraphRepo, RemoteSparqlRepo, Repo
 from prez.services.classes import get_classes_single
 from prez.services.connegp_service import NegotiatedPMTs
+from prez.services.local_data import (
+    data_fingerprint,
+    load_local_data,
+    local_data_dir,
+    local_data_files,
+    open_shared_store,
+)
 from prez.services.curie_functions import get_uri_for_curie_id
 from prez.services.query_generation.concept_hierarchy import ConceptHierarchyQuery
 from prez.services.query_generation.cql import CQLParser
@@ -49,14 +59,28 @@ logger = logging.getLogger(__name__)
 
 
 async def get_async_http_client():
-    return httpx.AsyncClient(
+    client_kwargs = dict(
         auth=(
             (settings.sparql_username, settings.sparql_password)
             if settings.sparql_username
             else None
         ),
         timeout=settings.sparql_timeout,
+        limits=httpx.Limits(
+            max_connections=settings.sparql_max_connections,
+            max_keepalive_connections=settings.sparql_max_keepalive_connections,
+            keepalive_expiry=settings.sparql_keepalive_expiry,
+        ),
     )
+    if settings.sparql_http2:
+        try:
+            return httpx.AsyncClient(http2=True, **client_kwargs)
+        except ImportError:
+            logger.warning(
+                "SPARQL_HTTP2 is set but the 'h2' package is not installed (pip install httpx[http2]), "
+                "falling back to HTTP/1.1"
+            )
+    return httpx.AsyncClient(**client_kwargs)
 
 
 def get_pyoxi_memory_store():
@@ -77,9 +101,31 @@ def get_pyoxi_persistent_store():
     return persistent_store
 
 
+shared_store: Store | None = None
+
+
+def get_pyoxi_shared_store():
+    """
+    A read-only pyoxigraph store holding the local data, built on disk by the first worker process to start and
+    opened by every other worker, so the data is loaded once and shared between workers. The store is rebuilt when
+    the local data files change.
+    """
+    global shared_store
+    if shared_store is None:
+        data_dir = local_data_dir()
+        shared_store = open_shared_store(
+            Path(settings.pyoxigraph_shared_store_dir),
+            _load_local_data,
+            data_fingerprint(data_dir, local_data_files(data_dir)),
+        )
+    return shared_store
+
+
 def get_pyoxi_store():
     if settings.sparql_repo_type == "pyoxigraph_persistent":
         return get_pyoxi_persistent_store()
+    if settings.sparql_repo_type == "pyoxigraph_shared":
+        return get_pyoxi_shared_store()
     return get_pyoxi_memory_store()
 
 
@@ -95,6 +141,10 @@ def get_oxrdflib_store():
     return oxrdflib_store
 
 
+def get_oxrdflib_pyoxi_store():
+    return oxrdflib_pyoxi_store
+
+
 def get_queryable_props():
     return queryable_props
 
@@ -114,10 +164,11 @@ async def get_data_repo(
     if (
         settings.sparql_repo_type == "pyoxigraph_memory"
         or settings.sparql_repo_type == "pyoxigraph_persistent"
+        or settings.sparql_repo_type == "pyoxigraph_shared"
     ):
         return PyoxigraphRepo(pyoxi_data_store)
     elif settings.sparql_repo_type == "oxrdflib":
-        return OxrdflibRepo(oxrdflib_store)
+        return OxrdflibRepo(oxrdflib_store, oxrdflib_pyoxi_store)
     elif settings.sparql_repo_type == "remote":
         try:
             http_async_client = request.app.state.http_async_client
@@ -148,14 +199,17 @@ async def load_local_data_to_oxigraph(store: Store):
     """
     Loads all the data from the local data directory into the local SPARQL endpoint
     """
-    default = OxiDefaultGraph()
-    for file in (Path(__file__).parent.parent / settings.pyoxigraph_data_dir).glob(
-        "**/*.ttl"
-    ):
-        try:
-            store.bulk_load(None, RdfFormat.TURTLE, path=str(file), to_graph=default)
-        except Exception as e:
-            raise SyntaxError(f"Error parsing file {file}: {e}")
+    await run_in_threadpool(_load_local_data, store)
+
+
+def _load_local_data(store: Store):
+    data_dir = local_data_dir()
+    load_local_data(
+        store,
+        data_dir,
+        local_data_files(data_dir),
+        settings.pyoxigraph_load_workers or os.cpu_count() or 1,
+    )
 
 
 async def load_system_data_to_oxigraph(store: Store):
@@ -1,6 +1,9 @@
 from fastapi import Request
 from fastapi.responses import JSONResponse
 
+# Seconds clients are asked to wait before retrying a request made while Prez is starting up
+READY_RETRY_AFTER = 5
+
 
 def create_validate_header_middleware(required_header: dict[str, str] | None):
     async def validate_header(request: Request, call_next):
@@ -21,3 +24,26 @@ def create_validate_header_middleware(required_header: dict[str, str] | None):
         return await call_next(request)
 
     return validate_header
+
+
+def create_readiness_middleware(root_path: str = ""):
+    """
+    Answers every request other than /health with a 503 until startup has finished, for when Prez serves requests
+    while it is still starting up (SERVE_BEFORE_READY).
+    """
+    health_paths = {"/health", f"{root_path.rstrip('/')}/health"}
+
+    async def check_ready(request: Request, call_next):
+        if not request.app.state.ready and request.url.path not in health_paths:
+            return JSONResponse(
+                status_code=503,
+                headers={"Retry-After": str(READY_RETRY_AFTER)},
+                content={
+                    "error": "Service Unavailable",
+                    "message": "Prez is starting up",
+                    "code": "NOT_READY",
+                },
+            )
+        return await call_next(request)
+
+    return check_ready
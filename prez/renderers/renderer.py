@@ -47,8 +47,8 @@ from prez.models.query_params import ListingQueryParams
 from prez.reference_data.prez_ns import OGCFEAT, ONT, PREZ
 from prez.repositories import Repo
 from prez.services.annotations import (
-    get_annotation_properties,
-    get_annotation_properties_for_oxigraph,
+    get_two_level_annotation_properties,
+    get_two_level_annotation_properties_for_oxigraph,
 )
 from prez.services.connegp_service import (
     OXIGRAPH_SERIALIZER_TYPES_MAP,
@@ -72,6 +72,7 @@ async def return_from_graph(
     system_repo: Repo,
     query_params: Optional[ListingQueryParams] = None,
     url: str = None,
+    languages: Optional[tuple[str, ...]] = None,
 ):
     profile_headers["Content-Disposition"] = "inline"
     return_geojson = str(mediatype) == "application/geo+json"
@@ -115,11 +116,13 @@ async def return_from_graph(
             if is_oxigraph:
                 store: OxiStore = graph
                 annotations_store: OxiStore = await return_annotated_rdf_for_oxigraph(
-                    store, repo, system_repo
+                    store, repo, system_repo, languages
                 )
                 store.bulk_extend(annotations_store)
             else:
-                annotations_graph = await return_annotated_rdf(graph, repo, system_repo)
+                annotations_graph = await return_annotated_rdf(
+                    graph, repo, system_repo, languages
+                )
                 graph.__iadd__(annotations_graph)
         else:
             kind = "machine"
@@ -196,7 +199,7 @@ async def return_from_graph(
             if is_oxigraph:
                 store: OxiStore = graph
                 annotations_store: OxiStore = await return_annotated_rdf_for_oxigraph(
-                    store, repo, system_repo
+                    store, repo, system_repo, languages
                 )
                 store.bulk_extend(annotations_store)
                 oxigraph_prefixes = {
@@ -221,7 +224,9 @@ async def return_from_graph(
                     raise
                 content.seek(0)  # Reset the stream position to the beginning
             else:
-                annotations_graph = await return_annotated_rdf(graph, repo, system_repo)
+                annotations_graph = await return_annotated_rdf(
+                    graph, repo, system_repo, languages
+                )
                 graph.__iadd__(annotations_graph)
                 graph.namespace_manager = prefix_graph.namespace_manager
                 content = io.BytesIO(
@@ -284,12 +289,12 @@ async def return_annotated_rdf(
     graph: Graph,
     repo: Repo,
     system_repo: Repo,
+    languages: Optional[tuple[str, ...]] = None,
 ) -> Graph:
     t_start = time.time()
-    annotations_graph = await get_annotation_properties(graph, repo, system_repo)
-    # get annotations for annotations - no need to do this recursively
-    annotations_graph += await get_annotation_properties(
-        annotations_graph, repo, system_repo
+    # annotations, and annotations for annotations - no need to do this recursively
+    annotations_graph = await get_two_level_annotation_properties(
+        graph, repo, system_repo, languages
     )
     log.debug(f"Time to get annotations: {time.time() - t_start}")
     # return graph.__iadd__(annotations_graph)
@@ -300,16 +305,13 @@ async def return_annotated_rdf_for_oxigraph(
     store: OxiStore,
     repo: Repo,
     system_repo: Repo,
+    languages: Optional[tuple[str, ...]] = None,
 ) -> OxiStore:
     t_start = time.time()
-    annotations_store = await get_annotation_properties_for_oxigraph(
-        store, repo, system_repo
-    )
-    # get annotations for annotations - no need to do this recursively
-    annotations_store_2 = await get_annotation_properties_for_oxigraph(
-        annotations_store, repo, system_repo
+    # annotations, and annotations for annotations - no need to do this recursively
+    annotations_store = await get_two_level_annotation_properties_for_oxigraph(
+        store, repo, system_repo, languages
     )
-    annotations_store.bulk_extend(annotations_store_2)
     log.debug(f"Time to get annotations: {time.time() - t_start}")
     return annotations_store
 
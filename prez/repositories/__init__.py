@@ -1,6 +1,6 @@
-from .base import Repo
+from .base import Columns, Repo
 from .oxrdflib import OxrdflibRepo
 from .pyoxigraph import PyoxigraphRepo
 from .remote_sparql import RemoteSparqlRepo
 
-__all__ = ["Repo", "OxrdflibRepo", "PyoxigraphRepo", "RemoteSparqlRepo"]
+__all__ = ["Columns", "Repo", "OxrdflibRepo", "PyoxigraphRepo", "RemoteSparqlRepo"]
@@ -1,18 +1,91 @@
 import asyncio
+import copy
+import itertools
 import logging
 from abc import ABC, abstractmethod
-from typing import List, Tuple, Any
-from pyoxigraph import Store
+from typing import Any, Awaitable, Callable, Iterator, List, Tuple, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+from pyoxigraph import QuerySolutions, Store
 from rdflib import Graph, Namespace, URIRef
 
 from prez.cache import prefix_graph
+from prez.config import settings
 
 PREZ = Namespace("https://prez.dev/")
 
 log = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+class _Flight:
+    """A backend call shared by every caller that asked for the same query while it was in flight."""
+
+    __slots__ = ("task", "callers")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.callers = 1
+
+
+class Columns:
+    """
+    The results of a SELECT query as one tuple per solution, holding the values (IRIs, literal lexical forms and blank
+    node labels) of its variables in order, with None for unbound variables. Unlike the SPARQL JSON bindings of
+    tabular_query_to_table, no dicts are built per solution, which matters for queries returning many rows.
+    """
+
+    __slots__ = ("variables", "rows")
+
+    def __init__(self, variables: tuple[str, ...], rows: list[tuple[str | None, ...]]):
+        self.variables = variables
+        self.rows = rows
+
+    @classmethod
+    def from_bindings(
+        cls, bindings: list[dict[str, Any]], variables: list[str] | None = None
+    ) -> "Columns":
+        if variables is None:
+            # without the query's head, the variables are those bound in any solution, in order of appearance
+            variables = list(dict.fromkeys(v for binding in bindings for v in binding))
+        return cls(
+            tuple(variables),
+            [
+                tuple(binding[v]["value"] if v in binding else None for v in variables)
+                for binding in bindings
+            ],
+        )
+
+    @classmethod
+    def from_solutions(cls, solutions: QuerySolutions) -> "Columns":
+        """Builds Columns from pyoxigraph query solutions, whether from a query or parsed SPARQL results."""
+        return cls(
+            tuple(v.value for v in solutions.variables),
+            [
+                tuple(None if term is None else term.value for term in solution)
+                for solution in solutions
+            ],
+        )
+
+    def index(self, variable: str) -> int:
+        return self.variables.index(variable)
+
+    def column(self, variable: str) -> list[str | None]:
+        i = self.index(variable)
+        return [row[i] for row in self.rows]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[tuple[str | None, ...]]:
+        return iter(self.rows)
+
 
 class Repo(ABC):
+    def __init__(self):
+        self._in_flight: dict[tuple[str, str], _Flight] = {}
+
     @abstractmethod
     async def rdf_query_to_rdflib_graph(
         self, query: str, into_graph: Graph | None = None
@@ -31,49 +104,166 @@ class Repo(ABC):
     ) -> Tuple[URIRef | None, list[dict[str, Any]]]:
         pass
 
+    async def tabular_query_to_columns(self, query: str) -> Columns:
+        """
+        Runs a SELECT query and returns its results as Columns. Repos override this to build the rows directly from
+        their results; by default they are converted from the bindings of tabular_query_to_table.
+        """
+        _, bindings = await self.tabular_query_to_table(query)
+        return Columns.from_bindings(bindings)
+
+    async def query_columns(self, query: str) -> Columns:
+        """Runs a SELECT query as tabular_query_to_columns does, sharing an identical in-flight query if enabled."""
+        if settings.sparql_coalesce_queries:
+            # Columns are only read, so a shared result needs no copy
+            columns, _ = await self._coalesce(
+                "columns", query, self.tabular_query_to_columns
+            )
+            return columns
+        return await self.tabular_query_to_columns(query)
+
     async def send_queries(
         self,
         rdf_queries: List[str],
         tabular_queries: List[Tuple[URIRef | None, str]] = [],
         return_oxigraph_store: bool = False,
     ) -> Tuple[Graph | Store, List]:
-        # Common logic to send both query types in parallel
-        if return_oxigraph_store:
-            s = Store()
-            graph_queries = [
-                self.rdf_query_to_oxigraph_store(query, into_store=s)
-                for query in rdf_queries
-                if query
-            ]
-            retstore = s
-        else:
-            g = Graph(namespace_manager=prefix_graph.namespace_manager)
-            graph_queries = [
-                self.rdf_query_to_rdflib_graph(query, into_graph=g)
-                for query in rdf_queries
-                if query
-            ]
-            retstore = g
-
+        if settings.sparql_coalesce_queries:
+            return await self._send_coalesced_queries(
+                rdf_queries, tabular_queries, return_oxigraph_store
+            )
+        # Common logic to send both query types in parallel. Each query returns its own result, and the results are
+        # merged once all have arrived, so concurrent queries never contend for a shared target.
+        fetch_rdf = (
+            self.rdf_query_to_oxigraph_store
+            if return_oxigraph_store
+            else self.rdf_query_to_rdflib_graph
+        )
+        rdf_queries = [query for query in rdf_queries if query]
         results = await asyncio.gather(
-            *graph_queries,
+            *[fetch_rdf(query) for query in rdf_queries],
             *[
                 self.tabular_query_to_table(query, context)
                 for context, query in tabular_queries
                 if query
             ],
         )
+        rdf_results = [(result, False) for result in results[: len(rdf_queries)]]
+        tabular_results = list(results[len(rdf_queries) :])
+        return await _merge(rdf_results, return_oxigraph_store), tabular_results
 
-        tabular_results = []
-        for result in results:
-            if isinstance(result, (Graph, Store)):
-                pass
-            else:
-                tabular_results.append(result)
-        return retstore, tabular_results
+    async def _send_coalesced_queries(
+        self,
+        rdf_queries: List[str],
+        tabular_queries: List[Tuple[URIRef | None, str]],
+        return_oxigraph_store: bool,
+    ) -> Tuple[Graph | Store, List]:
+        """
+        Sends the queries as send_queries does, but each query shares a single backend call with any identical query
+        already in flight on this repo. Every query gets its own result, which is then merged into the returned store.
+        """
+        if return_oxigraph_store:
+            kind = "oxigraph"
+            fetch_rdf = self.rdf_query_to_oxigraph_store
+        else:
+            kind = "rdflib"
+            fetch_rdf = self.rdf_query_to_rdflib_graph
+        rdf_queries = [query for query in rdf_queries if query]
+        tabular_queries = [
+            (context, query) for context, query in tabular_queries if query
+        ]
+
+        results = await asyncio.gather(
+            *[self._coalesce(kind, query, fetch_rdf) for query in rdf_queries],
+            *[
+                self._coalesce("tabular", query, self.tabular_query_to_table)
+                for _, query in tabular_queries
+            ],
+        )
+        rdf_results = results[: len(rdf_queries)]
+        tabular_results = [
+            (context, copy.deepcopy(rows) if shared else rows)
+            for (context, _), ((_, rows), shared) in zip(
+                tabular_queries, results[len(rdf_queries) :]
+            )
+        ]
+        return await _merge(rdf_results, return_oxigraph_store), tabular_results
+
+    async def _coalesce(
+        self, kind: str, query: str, fetch: Callable[[str], Awaitable[T]]
+    ) -> tuple[T, bool]:
+        """
+        Awaits the result of a query, joining an identical in-flight call of the same result kind if there is one.
+        Returns the result and whether it was shared with other callers, in which case it must not be modified.
+        """
+        key = (kind, _normalise_query(query))
+        flight = self._in_flight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fetch(query)))
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda _: self._land(key, flight))
+        else:
+            flight.callers += 1
+        # shield the shared call so that one cancelled caller does not cancel it for the others
+        result = await asyncio.shield(flight.task)
+        return result, flight.callers > 1
+
+    def _land(self, key: tuple[str, str], flight: _Flight):
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+        if not flight.task.cancelled():
+            # mark any exception as retrieved, the callers (if still waiting) will receive it
+            flight.task.exception()
 
     @abstractmethod
     def sparql(
         self, query: str, raw_headers: list[tuple[bytes, bytes]], method: str = "GET"
     ):
         pass
+
+
+def _normalise_query(query: str) -> str:
+    """Removes indentation and blank lines, which differ between otherwise identical generated queries."""
+    return "\n".join(line.strip() for line in query.splitlines() if line.strip())
+
+
+async def _merge(
+    results: list[tuple[Graph | Store, bool]], return_oxigraph_store: bool
+) -> Graph | Store:
+    """
+    Merges per query results into one Graph or Store. Merging is linear in the size of the results, so it runs in a
+    worker thread, unless there is a single unshared result which is returned as it is.
+    """
+    merge = _merge_stores if return_oxigraph_store else _merge_graphs
+    if len(results) <= 1 and not any(shared for _, shared in results):
+        return merge(results)
+    return await run_in_threadpool(merge, results)
+
+
+def _merge_stores(results: list[tuple[Store, bool]]) -> Store:
+    """
+    Merges per query results into one Store, reusing an unshared result rather than copying it.
+    The other results are added in a single bulk_extend.
+    """
+    base = next((store for store, shared in results if not shared), None)
+    merged = base if base is not None else Store()
+    merged.bulk_extend(
+        itertools.chain.from_iterable(
+            store for store, _ in results if store is not base
+        )
+    )
+    return merged
+
+
+def _merge_graphs(results: list[tuple[Graph, bool]]) -> Graph:
+    """Merges per query results into one Graph, reusing an unshared result rather than copying it."""
+    base = next((graph for graph, shared in results if not shared), None)
+    if base is None:
+        merged = Graph(namespace_manager=prefix_graph.namespace_manager)
+    else:
+        merged = base
+        merged.namespace_manager = prefix_graph.namespace_manager
+    for graph, _ in results:
+        if graph is not base:
+            merged += graph
+    return merged
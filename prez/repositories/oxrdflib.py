@@ -1,145 +1,52 @@
 import logging
-from typing import Any
 
-from fastapi.concurrency import run_in_threadpool
-from threading import Lock
-from pyoxigraph import Store, DefaultGraph, Quad
-from oxrdflib._converter import to_ox
-from rdflib import BNode, Graph, Literal, Namespace, URIRef
+from pyoxigraph import (
+    BlankNode,
+    DefaultGraph,
+    NamedNode,
+    QueryBoolean,
+    QuerySolutions,
+    QueryTriples,
+    Store,
+)
+from rdflib import Graph, Namespace, URIRef
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
 
-from prez.repositories.base import Repo
+from prez.repositories.pyoxigraph import PyoxigraphRepo
 
 PREZ = Namespace("https://prez.dev/")
 
 log = logging.getLogger(__name__)
 
 
-class OxrdflibRepo(Repo):
-    def __init__(self, oxrdflib_graph: Graph):
-        self.oxrdflib_graph = oxrdflib_graph
-        self.into_store_write_locks = {}
-
-    def _sync_rdf_query_to_rdflib_graph(
-        self, query: str, into_graph: Graph | None = None
-    ) -> Graph:
-        # TODO, replace this rdflib sparql query with the
-        # equivalent pyoxigraph query + results handling
-        results = self.oxrdflib_graph.query(query)
-        if into_graph is None:
-            return results.graph
-        if results.graph is None:
-            return into_graph
-        graph_lock = self.into_store_write_locks.get(id(into_graph), None)
-        if graph_lock is not None:
-            graph_lock.acquire()
-        try:
-            into_graph += results.graph
-        finally:
-            if graph_lock is not None:
-                graph_lock.release()
-        return into_graph
-
-    def _sync_rdf_query_to_oxigraph_store(
-        self, query: str, into_store: Store | None = None
-    ) -> Store:
-        # TODO, replace this rdflib sparql query with the
-        # equivalent pyoxigraph query + results handling
-        results = self.oxrdflib_graph.query(query)
-        if into_store is None:
-            store = Store()
-            store_lock = None
-        else:
-            store = into_store
-            store_lock = self.into_store_write_locks.get(id(into_store), None)
-        if results.graph is None:
-            return store
-        if store_lock is not None:
-            store_lock.acquire()
-        try:
-            default = DefaultGraph()
-            store.bulk_extend(
-                Quad(to_ox(t.subject), to_ox(t.predicate), to_ox(t.object), default)
-                for t in results.graph.triples((None, None, None))
-            )
-        finally:
-            if store_lock is not None:
-                store_lock.release()
-        return store
-
-    def _sync_tabular_query_to_table(
-        self, query: str, context: URIRef | None = None
-    ) -> tuple[URIRef | None, list[dict[str, Any]]]:
-        results = self.oxrdflib_graph.query(query)
-        reformatted_results = []
-        for result in results:
-            reformatted_result = {}
-            for var in results.vars:
-                binding = result[var]
-                if binding:
-                    str_type = self._str_type_for_rdflib_type(binding)
-                    reformatted_result[str(var)] = {"type": str_type, "value": binding}
-            reformatted_results.append(reformatted_result)
-        return context, reformatted_results
+class OxrdflibRepo(PyoxigraphRepo):
+    """
+    A repo over an rdflib Graph backed by oxrdflib's Oxigraph store, and the pyoxigraph Store that store was created
+    over. Queries are evaluated directly on the pyoxigraph Store, so their results go straight into the target Store
+    or Graph without first being converted into an rdflib result graph.
+    """
 
-    async def rdf_query_to_rdflib_graph(
-        self, query: str, into_graph: Graph | None = None
-    ) -> Graph:
-        if into_graph is not None:
-            graph_lock = self.into_store_write_locks.get(id(into_graph), None)
-            do_delete_lock = graph_lock is None
-            if graph_lock is None:
-                graph_lock = Lock()
-                self.into_store_write_locks[id(into_graph)] = graph_lock
-        else:
-            graph_lock = None
-            do_delete_lock = False
-        try:
-            return await run_in_threadpool(
-                self._sync_rdf_query_to_rdflib_graph, query, into_graph
-            )
-        finally:
-            if graph_lock is not None and do_delete_lock:
-                # The Lock might still be acquired by a different thread, but doesn't matter,
-                # we can still delete the lock reference from the dict.
-                if (
-                    id(into_graph) in self.into_store_write_locks
-                    and graph_lock is self.into_store_write_locks[id(into_graph)]
-                ):
-                    del self.into_store_write_locks[id(into_graph)]
-
-    async def rdf_query_to_oxigraph_store(
-        self, query: str, into_store: Store | None = None
-    ) -> Store:
-        if into_store is not None:
-            store_lock = self.into_store_write_locks.get(id(into_store), None)
-            do_delete_lock = store_lock is None
-            if store_lock is None:
-                store_lock = Lock()
-                self.into_store_write_locks[id(into_store)] = store_lock
-        else:
-            store_lock = None
-            do_delete_lock = False
-        try:
-            return await run_in_threadpool(
-                self._sync_rdf_query_to_oxigraph_store, query, into_store
-            )
-        finally:
-            if store_lock is not None and do_delete_lock:
-                # The Lock might still be acquired by a different thread, but doesn't matter,
-                # we can still delete the lock reference from the dict.
-                if (
-                    id(into_store) in self.into_store_write_locks
-                    and store_lock is self.into_store_write_locks[id(into_store)]
-                ):
-                    del self.into_store_write_locks[id(into_store)]
+    def __init__(self, oxrdflib_graph: Graph, pyoxi_store: Store):
+        super().__init__(pyoxi_store)
+        self.oxrdflib_graph = oxrdflib_graph
 
-    async def tabular_query_to_table(
-        self, query: str, context: URIRef | None = None
-    ) -> tuple[URIRef | None, list[dict[str, Any]]]:
-        return await run_in_threadpool(
-            self._sync_tabular_query_to_table, query, context
+    def _query(self, query: str) -> QuerySolutions | QueryTriples | QueryBoolean:
+        # the same dataset and prefixes rdflib's Graph.query would give the query through oxrdflib: the graph's own
+        # named graph as the default graph, and the prefixes bound in the graph
+        return self.pyoxi_store.query(
+            query,
+            default_graph=_graph_name(self.oxrdflib_graph.identifier),
+            prefixes={
+                prefix: str(namespace)
+                for prefix, namespace in self.oxrdflib_graph.namespaces()
+            },
         )
 
-    def _str_type_for_rdflib_type(self, instance):
-        map = {URIRef: "uri", BNode: "bnode", Literal: "literal"}
-        return map[type(instance)]
+
+def _graph_name(identifier) -> NamedNode | BlankNode | DefaultGraph:
+    """The pyoxigraph graph name oxrdflib stores a graph's triples in."""
+    if identifier == DATASET_DEFAULT_GRAPH_ID:
+        return DefaultGraph()
+    if isinstance(identifier, URIRef):
+        return NamedNode(identifier)
+    return BlankNode(identifier)
@@ -1,10 +1,14 @@
+import asyncio
+import concurrent.futures
 import logging
-from threading import Lock
-from typing import Any
+import weakref
+from typing import Any, AsyncIterator
 
+import httpx
 import pyoxigraph
 from fastapi.concurrency import run_in_threadpool
 from pyoxigraph import (
+    QueryResultsFormat,
     RdfFormat,
     Store,
     QueryTriples,
@@ -14,18 +18,50 @@ from pyoxigraph import (
 )
 from rdflib import Graph, Namespace, URIRef
 
+from prez.config import settings
 from prez.exceptions.model_exceptions import InvalidSPARQLQueryException
-from prez.repositories.base import Repo
+from prez.repositories.base import Columns, Repo
 
 PREZ = Namespace("https://prez.dev/")
 
 log = logging.getLogger(__name__)
 
+# Serialised chunks buffered between a /sparql query's serialising thread and its response. pyoxigraph writes 8 KiB at
+# a time, so this bounds the memory a streamed result uses.
+STREAM_BUFFER_CHUNKS = 16
+
+_stream_executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+
+def get_stream_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """
+    Returns the thread pool /sparql results are serialised on. A streamed result holds its thread until the client has
+    read it all, so slow clients wait on this pool, bounded by PYOXIGRAPH_STREAM_WORKERS, rather than taking over the
+    default threadpool that FastAPI uses for everything else.
+    """
+    global _stream_executor
+    if _stream_executor is None:
+        _stream_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=settings.pyoxigraph_stream_workers,
+            thread_name_prefix="prez-sparql-stream",
+        )
+    return _stream_executor
+
+
+def shutdown_stream_executor():
+    global _stream_executor
+    if _stream_executor is not None:
+        _stream_executor.shutdown(wait=False, cancel_futures=True)
+        _stream_executor = None
+
 
 class PyoxigraphRepo(Repo):
     def __init__(self, pyoxi_store: Store):
+        super().__init__()
         self.pyoxi_store = pyoxi_store
-        self.into_store_write_locks = {}
+
+    def _query(self, query: str) -> QuerySolutions | QueryTriples | QueryBoolean:
+        return self.pyoxi_store.query(query)
 
     @staticmethod
     def _handle_query_solution_results(results: QuerySolutions) -> dict[str, Any]:
@@ -70,125 +106,45 @@ class PyoxigraphRepo(Repo):
             return into_
         return into_.parse(data=ntriples_bytes, format="ntriples")
 
-    def _sync_rdf_query_to_rdflib_graph(
-        self, query: str, into_graph: Graph | None
-    ) -> Graph:
-        results = self.pyoxi_store.query(query)
-        if into_graph is not None:
-            g = into_graph
-            graph_lock = self.into_store_write_locks.get(id(into_graph), None)
-            if graph_lock is not None:
-                graph_lock.acquire()
-        else:
-            g = Graph()
-            g.bind("prez", URIRef("https://prez.dev/"))
-            graph_lock = None
-        try:
-            result_graph = self._handle_query_triples_results(results, into_=g)
-        finally:
-            if graph_lock is not None:
-                graph_lock.release()
-        return result_graph
+    def _sync_rdf_query_to_rdflib_graph(self, query: str) -> Graph:
+        results = self._query(query)
+        g = Graph()
+        g.bind("prez", URIRef("https://prez.dev/"))
+        return self._handle_query_triples_results(results, into_=g)
 
-    def _sync_rdf_query_to_oxigraph_store(
-        self, query: str, into_store: Store | None
-    ) -> Store:
-        results = self.pyoxi_store.query(query)
-        if into_store is not None:
-            s = into_store
-            store_lock = self.into_store_write_locks.get(id(into_store), None)
-            if store_lock is not None:
-                store_lock.acquire()
-        else:
-            s = Store()
-            store_lock = None
-        try:
-            result_store = self._handle_query_triples_results(results, into_=s)
-        finally:
-            if store_lock is not None:
-                store_lock.release()
-        return result_store
+    def _sync_rdf_query_to_oxigraph_store(self, query: str) -> Store:
+        results = self._query(query)
+        return self._handle_query_triples_results(results, into_=Store())
 
     def _sync_tabular_query_to_table(
         self, query: str, context: URIRef | None = None
     ) -> tuple[URIRef | None, list[dict]]:
-        results = self.pyoxi_store.query(query)
+        results = self._query(query)
         results_dict = self._handle_query_solution_results(results)
         # only return the bindings from the results.
         return context, results_dict["results"]["bindings"]
 
-    def _sparql(self, query: str) -> dict | Graph | bool:
-        """Submit a sparql query to the pyoxigraph store and return the formatted results."""
-        try:
-            results = self.pyoxi_store.query(query)
-        except SyntaxError as e:
-            raise InvalidSPARQLQueryException(e.msg)
-        if isinstance(results, QuerySolutions):  # a SELECT query result
-            results_dict = self._handle_query_solution_results(results)
-            return results_dict
-        elif isinstance(results, QueryTriples):  # a CONSTRUCT query result
-            # TODO: should this be selectable between rdflib.Graph and pyoxigraph.Store?
-            to_graph = Graph()
-            to_graph.bind("prez", URIRef("https://prez.dev/"))
-            result_graph = self._handle_query_triples_results(results, to_graph)
-            return result_graph
-        elif isinstance(results, QueryBoolean):
-            results_dict = {"head": {}, "boolean": bool(results)}
-            return results_dict
-        else:
-            raise TypeError(f"Unexpected result class {type(results)}")
+    def _sync_tabular_query_to_columns(self, query: str) -> Columns:
+        return Columns.from_solutions(self._query(query))
 
     async def rdf_query_to_rdflib_graph(
         self, query: str, into_graph: Graph | None = None
     ) -> Graph:
-        if into_graph is not None:
-            graph_lock = self.into_store_write_locks.get(id(into_graph), None)
-            do_delete_lock = graph_lock is None
-            if graph_lock is None:
-                graph_lock = Lock()
-                self.into_store_write_locks[id(into_graph)] = graph_lock
-        else:
-            graph_lock = None
-            do_delete_lock = False
-        try:
-            return await run_in_threadpool(
-                self._sync_rdf_query_to_rdflib_graph, query, into_graph
-            )
-        finally:
-            if graph_lock is not None and do_delete_lock:
-                # The Lock might still be acquired by a different thread, but doesn't matter,
-                # we can still delete the lock reference from the dict.
-                if (
-                    id(into_graph) in self.into_store_write_locks
-                    and graph_lock is self.into_store_write_locks[id(into_graph)]
-                ):
-                    del self.into_store_write_locks[id(into_graph)]
+        # each query is staged into its own graph on its thread, so concurrent queries never write to the same graph
+        # while they run; merging into the target, which is linear in the size of the result, runs on a thread too
+        staged = await run_in_threadpool(self._sync_rdf_query_to_rdflib_graph, query)
+        if into_graph is None:
+            return staged
+        return await run_in_threadpool(into_graph.__iadd__, staged)
 
     async def rdf_query_to_oxigraph_store(
         self, query: str, into_store: Store | None = None
     ) -> Store:
-        if into_store is not None:
-            store_lock = self.into_store_write_locks.get(id(into_store), None)
-            do_delete_lock = store_lock is None
-            if store_lock is None:
-                store_lock = Lock()
-                self.into_store_write_locks[id(into_store)] = store_lock
-        else:
-            store_lock = None
-            do_delete_lock = False
-        try:
-            return await run_in_threadpool(
-                self._sync_rdf_query_to_oxigraph_store, query, into_store
-            )
-        finally:
-            if store_lock is not None and do_delete_lock:
-                # The Lock might still be acquired by a different thread, but doesn't matter,
-                # we can still delete the lock reference from the dict.
-                if (
-                    id(into_store) in self.into_store_write_locks
-                    and store_lock is self.into_store_write_locks[id(into_store)]
-                ):
-                    del self.into_store_write_locks[id(into_store)]
+        staged = await run_in_threadpool(self._sync_rdf_query_to_oxigraph_store, query)
+        if into_store is None:
+            return staged
+        await run_in_threadpool(into_store.bulk_extend, staged)
+        return into_store
 
     async def tabular_query_to_table(
         self, query: str, context: URIRef | None = None
@@ -197,10 +153,173 @@ class PyoxigraphRepo(Repo):
             self._sync_tabular_query_to_table, query, context
         )
 
+    async def tabular_query_to_columns(self, query: str) -> Columns:
+        return await run_in_threadpool(self._sync_tabular_query_to_columns, query)
+
     async def sparql(
         self, query: str, raw_headers: list[tuple[bytes, bytes]], method: str = ""
-    ) -> list | Graph | bool:
-        return self._sparql(query)
+    ) -> httpx.Response:
+        """
+        Runs a query and returns a response streaming its results, in the first format in the request's Accept header
+        that suits the query type: SPARQL results JSON, XML, CSV or TSV for SELECT and ASK queries, any RDF format
+        pyoxigraph serialises for CONSTRUCT and DESCRIBE queries. Results are serialised on a worker thread as the
+        response is read, so they are never held in memory all at once.
+        """
+        accept = next(
+            (v.decode("latin-1") for k, v in raw_headers if k.lower() == b"accept"),
+            "",
+        )
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_BUFFER_CHUNKS)
+        writer = _QueueWriter(queue, loop)
+        started = loop.create_future()
+
+        def produce():
+            # pyoxigraph query results cannot be passed between threads, so the query runs on the serialising thread
+            try:
+                results = self._query(query)
+                result_format, media_type = _negotiate_result_format(results, accept)
+            except Exception as e:
+                loop.call_soon_threadsafe(_settle, started, None, e)
+                return
+            loop.call_soon_threadsafe(_settle, started, media_type, None)
+            try:
+                results.serialize(writer, result_format)
+                writer.put(None)
+            except _StreamCancelled:
+                pass
+            except Exception as e:
+                try:
+                    writer.put(e)
+                except _StreamCancelled:
+                    pass
+
+        loop.run_in_executor(get_stream_executor(), produce)
+        try:
+            media_type = await started
+        except SyntaxError as e:
+            raise InvalidSPARQLQueryException(e.msg)
+        except asyncio.CancelledError:
+            writer.cancel()
+            raise
+        response = httpx.Response(
+            200,
+            headers={"content-type": media_type},
+            stream=_QueueStream(queue, writer),
+        )
+        # a response discarded without being read never runs its stream's cleanup
+        weakref.finalize(response, writer.cancel)
+        return response
+
+
+def _settle(future: asyncio.Future, result: Any, error: Exception | None):
+    if future.done():
+        # the request was cancelled while the query ran
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class _StreamCancelled(Exception):
+    pass
+
+
+class _QueueWriter:
+    """
+    A file-like object pyoxigraph serialises into from a worker thread. Each chunk is handed to the event loop through
+    a bounded queue, so serialisation waits whenever the client is slower than the serialiser.
+    """
+
+    def __init__(self, queue: asyncio.Queue, loop: asyncio.AbstractEventLoop):
+        self._queue = queue
+        self._loop = loop
+        self.cancelled = False
+
+    def write(self, chunk: bytes) -> int:
+        self.put(bytes(chunk))
+        return len(chunk)
+
+    def flush(self):
+        pass
+
+    def put(self, item: bytes | Exception | None):
+        if self.cancelled:
+            raise _StreamCancelled()
+        try:
+            put = asyncio.run_coroutine_threadsafe(self._queue.put(item), self._loop)
+        except RuntimeError:
+            # the event loop has been closed
+            raise _StreamCancelled()
+        while True:
+            try:
+                return put.result(timeout=1)
+            except concurrent.futures.TimeoutError:
+                # the reader may have gone without draining the queue, or the event loop may have stopped
+                if self.cancelled or self._loop.is_closed():
+                    put.cancel()
+                    raise _StreamCancelled()
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class _QueueStream(httpx.AsyncByteStream):
+    """The body of a streamed /sparql response, read from the queue a _QueueWriter fills."""
+
+    def __init__(self, queue: asyncio.Queue, writer: _QueueWriter):
+        self._queue = queue
+        self._writer = writer
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            while (item := await self._queue.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            await self.aclose()
+
+    async def aclose(self):
+        # stop the serialiser if the response is abandoned, and unblock it if it is waiting on a full queue
+        self._writer.cancel()
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+
+def _negotiate_result_format(
+    results: QuerySolutions | QueryTriples | QueryBoolean, accept: str
+) -> tuple[QueryResultsFormat | RdfFormat, str]:
+    if isinstance(results, QueryTriples):
+        from_media_type, default = RdfFormat.from_media_type, RdfFormat.TURTLE
+    else:
+        from_media_type, default = (
+            QueryResultsFormat.from_media_type,
+            QueryResultsFormat.JSON,
+        )
+    for media_type in _accepted_media_types(accept):
+        result_format = from_media_type(media_type)
+        if result_format is not None:
+            return result_format, result_format.media_type
+    return default, default.media_type
+
+
+def _accepted_media_types(accept: str) -> list[str]:
+    """Returns the media types in an Accept header, most preferred first."""
+    weighted = []
+    for item in accept.split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if media_type and q > 0:
+            weighted.append((q, media_type))
+    return [media_type for _, media_type in sorted(weighted, key=lambda w: -w[0])]
 
 
 def _pyoxi_result_type(term) -> str:
@@ -0,0 +1,185 @@
+import re
+from typing import Iterator
+
+# A deliberately small SPARQL tokenizer: it only needs to tell apart IRIs, literals and comments (whose contents must
+# be left alone) from variables, blank node labels and the brackets that delimit the template and WHERE clause.
+_TOKEN = re.compile(
+    r"""
+    (?P<ws>\s+)
+    |(?P<comment>\#[^\n]*)
+    |(?P<iri><[^<>"{}|^`\\\s]*>)
+    |(?P<string>'''(?:[^\\]|\\.)*?'''|\"\"\"(?:[^\\]|\\.)*?\"\"\"|'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*")
+    |(?P<var>[?$]\w+)
+    |(?P<bnode>_:\w(?:[\w.\-]*[\w\-])?)
+    |(?P<punct>[{}\[\]().,;])
+    |(?P<other>[^\s{}\[\]().,;<"'\#?$]+|.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+class _Token:
+    __slots__ = ("kind", "text")
+
+    def __init__(self, kind: str, text: str):
+        self.kind = kind
+        self.text = text
+
+
+class _ConstructQuery:
+    """The parts of a CONSTRUCT query needed to merge it with others."""
+
+    def __init__(
+        self, prefixes: dict[str, str], template: list[_Token], where: list[_Token]
+    ):
+        self.prefixes = prefixes
+        self.template = template
+        self.where = where
+
+
+def batch_construct_queries(queries: list[str]) -> list[str]:
+    """
+    Merges the CONSTRUCT queries in a list into a single query, so they are answered in one round trip.
+
+    Each query's WHERE clause becomes one branch of a UNION, with its variables and blank node labels renamed to be
+    unique to that branch, and the templates are concatenated. A solution from one branch leaves the variables of the
+    other templates unbound, so it only instantiates its own query's template, and the merged result is the union of
+    the individual results.
+
+    Only queries of the form ``[PREFIX ...] CONSTRUCT { template } WHERE { ... }`` are merged, without dataset clauses
+    or solution modifiers, and only when every template triple contains a variable: a triple without one would be
+    produced by the solutions of every branch rather than only its own. Other queries are returned unchanged.
+    """
+    parsed = []
+    unbatched = []
+    prefixes: dict[str, str] = {}
+    for query in queries:
+        construct = _parse_construct(query)
+        if construct is None or any(
+            prefixes.get(label, iri) != iri for label, iri in construct.prefixes.items()
+        ):
+            unbatched.append(query)
+            continue
+        prefixes.update(construct.prefixes)
+        parsed.append(construct)
+    if len(parsed) < 2:
+        return queries
+    return [_merge(parsed, prefixes)] + unbatched
+
+
+def _tokenize(query: str) -> list[_Token]:
+    return [_Token(match.lastgroup, match.group()) for match in _TOKEN.finditer(query)]
+
+
+def _significant(tokens: list[_Token]) -> Iterator[tuple[int, _Token]]:
+    for i, token in enumerate(tokens):
+        if token.kind not in ("ws", "comment"):
+            yield i, token
+
+
+def _parse_construct(query: str) -> _ConstructQuery | None:
+    tokens = _tokenize(query)
+    significant = list(_significant(tokens))
+    prefixes = {}
+    pos = 0
+    while pos < len(significant) and significant[pos][1].text.upper() == "PREFIX":
+        if pos + 2 >= len(significant) or significant[pos + 2][1].kind != "iri":
+            return None
+        prefixes[significant[pos + 1][1].text] = significant[pos + 2][1].text
+        pos += 3
+    if pos >= len(significant) or significant[pos][1].text.upper() != "CONSTRUCT":
+        return None
+    template_range = _braced(significant, pos + 1)
+    if template_range is None:
+        return None
+    pos = template_range[1] + 1
+    if pos < len(significant) and significant[pos][1].text.upper() == "WHERE":
+        pos += 1
+    where_range = _braced(significant, pos)
+    # nothing (FROM, ORDER BY, LIMIT, VALUES etc.) may follow the WHERE clause
+    if where_range is None or where_range[1] != len(significant) - 1:
+        return None
+    template = tokens[
+        significant[template_range[0]][0] + 1 : significant[template_range[1]][0]
+    ]
+    if not _template_is_mergeable(template):
+        return None
+    where = tokens[significant[where_range[0]][0] + 1 : significant[where_range[1]][0]]
+    return _ConstructQuery(prefixes, template, where)
+
+
+def _braced(
+    significant: list[tuple[int, _Token]], start: int
+) -> tuple[int, int] | None:
+    """Returns the positions of the brace opening at start and its matching closing brace."""
+    if start >= len(significant) or significant[start][1].text != "{":
+        return None
+    depth = 0
+    for pos in range(start, len(significant)):
+        text = significant[pos][1].text
+        if text == "{":
+            depth += 1
+        elif text == "}":
+            depth -= 1
+            if depth == 0:
+                return start, pos
+    return None
+
+
+def _template_is_mergeable(template: list[_Token]) -> bool:
+    """Checks every triple of a CONSTRUCT template contains a variable."""
+    terms = [t for _, t in _significant(template)]
+    if not terms:
+        return False
+    # blank node property lists and collections produce triples with no variable
+    for i, token in enumerate(terms):
+        if token.text == "(" or (
+            token.text == "[" and (i + 1 == len(terms) or terms[i + 1].text != "]")
+        ):
+            return False
+    blocks: list[list[_Token]] = [[]]
+    for token in terms:
+        if token.text == ".":
+            blocks.append([])
+        else:
+            blocks[-1].append(token)
+    for block in blocks:
+        if not block:
+            continue
+        # every triple in a block shares its subject
+        if block[0].kind == "var":
+            continue
+        block_terms = [t for t in block if t.text != "]"]
+        if len(block_terms) != 3 or not any(t.kind == "var" for t in block_terms):
+            return False
+    return True
+
+
+def _renamed(tokens: list[_Token], suffix: str) -> str:
+    """Renders tokens with their variables and blank node labels suffixed, and comments removed."""
+    return "".join(
+        (
+            token.text + suffix
+            if token.kind in ("var", "bnode")
+            else "" if token.kind == "comment" else token.text
+        )
+        for token in tokens
+    )
+
+
+def _merge(queries: list[_ConstructQuery], prefixes: dict[str, str]) -> str:
+    prologue = "".join(f"PREFIX {label} {iri}\n" for label, iri in prefixes.items())
+    templates = []
+    branches = []
+    for i, query in enumerate(queries):
+        suffix = f"__b{i}"
+        templates.append(_renamed(query.template, suffix).strip().rstrip("."))
+        branches.append("{\n" + _renamed(query.where, suffix) + "\n}")
+    return (
+        prologue
+        + "CONSTRUCT {\n"
+        + " .\n".join(templates)
+        + "\n}\nWHERE {\n"
+        + "\nUNION\n".join(branches)
+        + "\n}"
+    )
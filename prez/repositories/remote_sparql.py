@@ -1,49 +1,207 @@
+import asyncio
 import logging
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+    TypeVar,
+)
 from urllib.parse import quote_plus
 
 import httpx
-from pyoxigraph import RdfFormat, Store
-from rdflib import Graph, Namespace, URIRef
+from pyoxigraph import (
+    BlankNode,
+    DefaultGraph,
+    Quad,
+    QueryResultsFormat,
+    RdfFormat,
+    Store,
+    parse,
+    parse_query_results,
+)
+from rdflib import BNode, Graph, Namespace, URIRef
 
 from prez.config import settings
-from prez.repositories.base import Repo
+from prez.repositories.base import Columns, Repo
+from prez.repositories.query_batching import batch_construct_queries
+from prez.repositories.replica_pool import Replica, ReplicaPool
+from prez.repositories.result_cache import sparql_result_cache
 from prez.services.connegp_service import OXIGRAPH_SERIALIZER_TYPES_MAP
 
 PREZ = Namespace("https://prez.dev/")
 
 log = logging.getLogger(__name__)
 
+# Line based format requested when streaming RDF results, so that every complete line
+# received can be parsed on its own.
+STREAMING_RDF_MEDIATYPE = "application/n-triples"
+
+T = TypeVar("T")
+
+_parse_executor: ThreadPoolExecutor | None = None
+
+
+def get_parse_executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool used to parse remote SPARQL results.
+    The pool is bounded by SPARQL_PARSE_WORKERS so large responses cannot take over the default threadpool that
+    FastAPI uses for everything else.
+    """
+    global _parse_executor
+    if _parse_executor is None:
+        _parse_executor = ThreadPoolExecutor(
+            max_workers=settings.sparql_parse_workers,
+            thread_name_prefix="prez-sparql-parse",
+        )
+    return _parse_executor
+
+
+def shutdown_parse_executor():
+    global _parse_executor
+    if _parse_executor is not None:
+        _parse_executor.shutdown(wait=False, cancel_futures=True)
+        _parse_executor = None
+
+
+async def _run_parser(size: int, parser: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Runs a parsing function inline for payloads smaller than SPARQL_PARSE_INLINE_THRESHOLD bytes, otherwise in the
+    parse executor so the event loop keeps serving other requests while it runs.
+    """
+    if size < settings.sparql_parse_inline_threshold:
+        return parser(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_parse_executor(), partial(parser, *args, **kwargs)
+    )
+
+
+def _parse_into_graph(graph: Graph, data: bytes, format: str, **kwargs) -> Graph:
+    return graph.parse(data=data, format=format, **kwargs)
+
+
+def _parse_json_columns(data: bytes) -> Columns:
+    # pyoxigraph decodes each solution straight into terms, without building a dict per binding
+    return Columns.from_solutions(parse_query_results(data, QueryResultsFormat.JSON))
+
+
+class _BufferedStream(httpx.AsyncByteStream):
+    """The chunks already read from a streamed response, followed by the rest of it."""
+
+    def __init__(
+        self, chunks: list[bytes], rest: AsyncIterator[bytes], response: httpx.Response
+    ):
+        self._chunks = chunks
+        self._rest = rest
+        self._response = response
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        chunks, self._chunks = self._chunks, []
+        for chunk in chunks:
+            yield chunk
+        async for chunk in self._rest:
+            yield chunk
+
+    async def aclose(self):
+        await self._response.aclose()
+
 
 class RemoteSparqlRepo(Repo):
-    def __init__(self, async_client: httpx.AsyncClient):
+    def __init__(
+        self,
+        async_client: httpx.AsyncClient,
+        replica_pool: ReplicaPool | None = None,
+    ):
+        super().__init__()
         self.async_client = async_client
-        if not settings.sparql_endpoint:
-            raise ValueError(
-                "When using a remote SPARQL endpoint, "
-                "the SPARQL_ENDPOINT setting must be set using either "
-                "the environment variable or the config file."
-            )
+        if replica_pool is None:
+            if not (settings.sparql_endpoint or settings.sparql_read_endpoints):
+                raise ValueError(
+                    "When using a remote SPARQL endpoint, "
+                    "the SPARQL_ENDPOINT or SPARQL_READ_ENDPOINTS setting must be set using either "
+                    "the environment variable or the config file."
+                )
+            replica_pool = ReplicaPool.from_settings()
+        self.replica_pool = replica_pool
+
+    async def send_queries(
+        self,
+        rdf_queries: List[str],
+        tabular_queries: List[Tuple[URIRef | None, str]] = [],
+        return_oxigraph_store: bool = False,
+    ) -> Tuple[Graph | Store, List]:
+        if settings.sparql_batch_construct_queries:
+            # the results of all rdf queries are merged into one graph, so one merged query gives the same result
+            rdf_queries = batch_construct_queries([q for q in rdf_queries if q])
+        return await super().send_queries(
+            rdf_queries, tabular_queries, return_oxigraph_store
+        )
 
     async def _send_query(self, query: str, mediatype="text/turtle") -> httpx.Response:
-        """Sends a SPARQL query asynchronously.
+        """Sends a SPARQL query asynchronously, answering it from the result cache when enabled.
         Args: query: str: A SPARQL query to be sent asynchronously.
         Returns: httpx.Response: A httpx.Response object
         """
-        data = {"query": query}
-        if settings.sparql_timeout_param_name:
-            data[settings.sparql_timeout_param_name] = str(settings.sparql_timeout)
+        if not settings.sparql_result_cache_enabled:
+            return await self._send_backend_query(query, mediatype)
+        if settings.sparql_data_version_query:
+            await sparql_result_cache.check_data_version(self.probe_data_version)
+        cached = sparql_result_cache.get(query, mediatype)
+        if cached is not None:
+            return cached
+        response = await self._send_backend_query(query, mediatype)
+        content_length = response.headers.get("content-length")
+        if content_length is not None and not sparql_result_cache.fits(
+            int(content_length)
+        ):
+            # too large to cache, leave the response to be streamed
+            return response
+        # the size is usually unknown, so read at most as much as the cache holds before deciding
+        content_type = response.headers.get("content-type")
+        headers = {"content-type": content_type} if content_type else {}
+        chunks = []
+        size = 0
+        rest = response.aiter_bytes()
+        async for chunk in rest:
+            chunks.append(chunk)
+            size += len(chunk)
+            if not sparql_result_cache.fits(size):
+                # too large to cache, stream what has been read followed by the rest of the response
+                return httpx.Response(
+                    response.status_code,
+                    headers=headers,
+                    stream=_BufferedStream(chunks, rest, response),
+                    request=response.request,
+                )
+        content = b"".join(chunks)
+        sparql_result_cache.put(query, mediatype, content, content_type)
+        return httpx.Response(
+            response.status_code,
+            headers=headers,
+            content=content,
+            request=response.request,
+        )
 
-        query_rq = self.async_client.build_request(
-            "POST",
-            url=settings.sparql_endpoint,
-            headers={"Accept": mediatype},
-            data=data,
+    async def probe_data_version(self) -> Any:
+        """Sends the data version query, bypassing the result cache, and returns its results."""
+        response = await self._send_backend_query(
+            settings.sparql_data_version_query, "application/sparql-results+json"
         )
+        await response.aread()
+        results = response.json()
+        return results.get("results", results.get("boolean"))
+
+    async def _send_backend_query(self, query: str, mediatype: str) -> httpx.Response:
         try:
-            response = await self.async_client.send(query_rq, stream=True)
-            response.raise_for_status()
-            return response
+            if settings.sparql_hedge_requests:
+                return await self._send_hedged_query(query, mediatype)
+            return await self._send_to_replica(query, mediatype)
         except httpx.TimeoutException as e:
             timeout_msg = (
                 f"SPARQL query timed out after {settings.sparql_timeout} seconds"
@@ -57,6 +215,72 @@ class RemoteSparqlRepo(Repo):
             await e.response.aread()
             raise
 
+    async def _send_to_replica(
+        self,
+        query: str,
+        mediatype: str,
+        replica: Replica | None = None,
+        hedge: bool = False,
+    ) -> httpx.Response:
+        data = {"query": query}
+        if settings.sparql_timeout_param_name:
+            data[settings.sparql_timeout_param_name] = str(settings.sparql_timeout)
+
+        async with self.replica_pool.acquire(replica, hedge) as replica:
+            query_rq = self.async_client.build_request(
+                "POST",
+                url=replica.url,
+                headers={"Accept": mediatype},
+                data=data,
+                extensions={"trace": replica.trace_pool_wait()},
+            )
+            response = await self.async_client.send(query_rq, stream=True)
+            response.raise_for_status()
+            return response
+
+    async def _send_hedged_query(self, query: str, mediatype: str) -> httpx.Response:
+        """
+        Sends a query and, if it has not been answered within the hedge delay, sends a duplicate to another replica
+        (or over another connection to the same one). The first successful response is returned and the other request
+        is cancelled.
+        """
+        primary_replica = self.replica_pool.select()
+        primary = asyncio.ensure_future(
+            self._send_to_replica(query, mediatype, primary_replica)
+        )
+        tasks = [primary]
+        winner = None
+        try:
+            delay = self.replica_pool.hedge_delay()
+            if delay is not None:
+                await asyncio.wait(tasks, timeout=delay)
+            if primary.done() or delay is None or not self.replica_pool.take_hedge():
+                winner = primary
+                return await primary
+            hedge_replica = self.replica_pool.select(exclude=(primary_replica,))
+            tasks.append(
+                asyncio.ensure_future(
+                    self._send_to_replica(query, mediatype, hedge_replica, hedge=True)
+                )
+            )
+            pending = set(tasks)
+            while pending and winner is None:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                winner = next((t for t in done if t.exception() is None), None)
+        finally:
+            # cancel whichever request lost, also when the caller itself is cancelled
+            for task in tasks:
+                if task is not winner:
+                    _discard(task)
+        if winner is None:
+            # neither request succeeded, report the primary's error
+            return primary.result()
+        if winner is not primary:
+            self.replica_pool.hedge_wins += 1
+        return winner.result()
+
     async def rdf_query_to_rdflib_graph(
         self, query: str, into_graph: Graph | None = None
     ) -> Graph:
@@ -65,17 +289,32 @@ class RemoteSparqlRepo(Repo):
         Args: query: str: A SPARQL query to be sent asynchronously.
         Returns: rdflib.Graph: An RDFLib Graph object
         """
-        response: httpx.Response = await self._send_query(query)
-        response_format = response.headers.get("content-type", "application/n-triples")
-        response_format = response_format.split(";")[
-            0
-        ]  # handle cases like 'application/n-triples;charset=UTF-8' from GraphDB
+        response: httpx.Response = await self._send_rdf_query(query)
+        response_format = _response_format(response)
         if into_graph is not None:
             g = into_graph
         else:
             g = Graph()
+        # Large payloads are parsed straight into the target graph in the parse executor, so the event loop does
+        # neither the parsing nor a merge. Each query of send_queries gets a graph of its own, so nothing else writes to
+        # the graph meanwhile; callers passing into_graph must not write to it while the query runs either.
+        if _is_streamable(response_format):
+            bnode_context: dict[str, BNode] = {}
+            async for lines in _aiter_complete_lines(response):
+                await _run_parser(
+                    len(lines),
+                    _parse_into_graph,
+                    g,
+                    lines,
+                    "nt",
+                    bnode_context=bnode_context,
+                )
+            return g
         content_bytes = await response.aread()
-        return g.parse(data=content_bytes, format=response_format)
+        await _run_parser(
+            len(content_bytes), _parse_into_graph, g, content_bytes, response_format
+        )
+        return g
 
     async def rdf_query_to_oxigraph_store(
         self, query: str, into_store: Store | None = None
@@ -85,22 +324,37 @@ class RemoteSparqlRepo(Repo):
         Args: query: str: A SPARQL query to be sent asynchronously.
         Returns: pyoxigraph.Store: An pyoxigraph Store object
         """
-        response: httpx.Response = await self._send_query(query)
-        response_format = response.headers.get("content-type", "application/n-triples")
-        response_format = response_format.split(";")[
-            0
-        ]  # handle cases like 'application/n-triples;charset=UTF-8' from GraphDB
+        response: httpx.Response = await self._send_rdf_query(query)
+        response_format = _response_format(response)
         if into_store is not None:
             s = into_store
         else:
             s = Store()
+        if _is_streamable(response_format):
+            bnodes: dict[str, BlankNode] = {}
+            async for lines in _aiter_complete_lines(response):
+                # the Store is thread safe, so it can be written to directly from the parse executor
+                await _run_parser(
+                    len(lines),
+                    s.bulk_extend,
+                    _relabel_blank_nodes(parse(lines, RdfFormat.N_TRIPLES), bnodes),
+                )
+            return s
         content_bytes = await response.aread()
         oxigraph_format = OXIGRAPH_SERIALIZER_TYPES_MAP.get(
             response_format, RdfFormat.N_TRIPLES
         )
-        s.bulk_load(content_bytes, oxigraph_format)
+        await _run_parser(
+            len(content_bytes), s.bulk_load, content_bytes, oxigraph_format
+        )
         return s
 
+    async def _send_rdf_query(self, query: str) -> httpx.Response:
+        """Sends a CONSTRUCT/DESCRIBE query, asking for a line based format when streaming is enabled."""
+        if settings.sparql_stream_results:
+            return await self._send_query(query, STREAMING_RDF_MEDIATYPE)
+        return await self._send_query(query)
+
     async def tabular_query_to_table(
         self, query: str, context: URIRef | None = None
     ) -> tuple[URIRef | None, list[dict[str, Any]]]:
@@ -113,6 +367,16 @@ class RemoteSparqlRepo(Repo):
         await response.aread()
         return context, response.json()["results"]["bindings"]
 
+    async def tabular_query_to_columns(self, query: str) -> Columns:
+        """
+        Sends a SELECT query asynchronously and parses the response into Columns. SPARQL results JSON is requested
+        rather than CSV, which cannot tell an empty literal from an unbound variable, or a blank node from a literal,
+        and is decoded by pyoxigraph's results parser rather than into a dict per binding.
+        """
+        response = await self._send_query(query, "application/sparql-results+json")
+        content = await response.aread()
+        return await _run_parser(len(content), _parse_json_columns, content)
+
     async def sparql(
         self, query: str, raw_headers: list[tuple[bytes, bytes]], method: str = "GET"
     ):
@@ -124,16 +388,19 @@ class RemoteSparqlRepo(Repo):
             if k.lower() != b"host"
         }
 
+        replica = self.replica_pool.select()
+        endpoint = replica.url
+        extensions = {"trace": replica.trace_pool_wait()}
         if method == "GET":
             query_escaped = quote_plus(query)
-            url = f"{settings.sparql_endpoint}?query={query_escaped}"
+            url = f"{endpoint}?query={query_escaped}"
             if settings.sparql_timeout_param_name:
                 url += (
                     f"&{settings.sparql_timeout_param_name}={settings.sparql_timeout}"
                 )
-            request = httpx.Request(method, url, headers=headers)
+            request = httpx.Request(method, url, headers=headers, extensions=extensions)
         else:
-            url = settings.sparql_endpoint
+            url = endpoint
             # Prepare form data
             form_data = f"query={quote_plus(query)}"
             if settings.sparql_timeout_param_name:
@@ -146,7 +413,11 @@ class RemoteSparqlRepo(Repo):
             headers["content-length"] = str(len(form_data))
 
             request = httpx.Request(
-                method, url, headers=headers, content=form_data.encode("utf-8")
+                method,
+                url,
+                headers=headers,
+                content=form_data.encode("utf-8"),
+                extensions=extensions,
             )
 
         # Add the correct 'host' header
@@ -165,3 +436,72 @@ class RemoteSparqlRepo(Repo):
             ) from e
 
         return response
+
+
+def _discard(task: asyncio.Future):
+    """Cancels a request that lost a hedge, or closes its response if it completed as well."""
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled() and task.exception() is None:
+        # closing only returns the connection to the pool; nothing needs to wait for it
+        asyncio.ensure_future(task.result().aclose())
+
+
+def _response_format(response: httpx.Response) -> str:
+    response_format = response.headers.get("content-type", "application/n-triples")
+    # handle cases like 'application/n-triples;charset=UTF-8' from GraphDB
+    return response_format.split(";")[0].strip()
+
+
+def _is_streamable(response_format: str) -> bool:
+    """Only N-Triples can be parsed line by line; other formats carry state (prefixes etc.) across lines."""
+    return settings.sparql_stream_results and (
+        OXIGRAPH_SERIALIZER_TYPES_MAP.get(response_format) == RdfFormat.N_TRIPLES
+    )
+
+
+async def _aiter_complete_lines(response: httpx.Response) -> AsyncIterator[bytes]:
+    """
+    Yields the response body in chunks which always end on a line boundary. The chunks of an unfinished line are
+    only joined once its end arrives, so a long line costs time linear in its length.
+    """
+    pending: list[bytes] = []
+    try:
+        async for chunk in response.aiter_bytes():
+            cut = chunk.rfind(b"\n") + 1
+            if not cut:
+                pending.append(chunk)
+                continue
+            pending.append(chunk[:cut])
+            yield b"".join(pending)
+            pending = [chunk[cut:]]
+        rest = b"".join(pending)
+        if rest.strip():
+            yield rest
+    finally:
+        await response.aclose()
+
+
+def _relabel_blank_nodes(
+    quads: Iterable[Quad], bnodes: dict[str, BlankNode]
+) -> Iterator[Quad]:
+    """
+    Maps the blank node labels of one response to fresh blank nodes.
+    The mapping is shared by all chunks of a response, so a blank node referenced in several chunks stays one node,
+    while blank nodes from other responses loaded into the same store cannot clash with it.
+    """
+
+    def fresh(node):
+        if not isinstance(node, BlankNode):
+            return node
+        mapped = bnodes.get(node.value)
+        if mapped is None:
+            mapped = bnodes[node.value] = BlankNode()
+        return mapped
+
+    default = DefaultGraph()
+    for quad in quads:
+        if isinstance(quad.subject, BlankNode) or isinstance(quad.object, BlankNode):
+            yield Quad(fresh(quad.subject), quad.predicate, fresh(quad.object), default)
+        else:
+            yield quad
@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+import httpx
+
+from prez.config import settings
+
+log = logging.getLogger(__name__)
+
+# Weight of the most recent request in a replica's moving average latency
+LATENCY_SMOOTHING = 0.2
+# Number of recent request latencies, across all replicas, that the hedge delay is computed from
+LATENCY_WINDOW = 1000
+# Requests are not hedged until this many latencies have been recorded
+HEDGE_MIN_SAMPLES = 20
+# The most hedges that can be sent back to back, however long the pool has gone without hedging
+HEDGE_BURST = 10
+
+
+class Replica:
+    """A SPARQL endpoint serving the same data as the other replicas in a pool, with its request statistics."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.healthy = True
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.latency_avg: float | None = None
+        self.latency_last: float | None = None
+        self.pool_waits = 0
+        self.pool_wait_total = 0.0
+        self.pool_wait_max = 0.0
+
+    def record_latency(self, seconds: float):
+        self.requests += 1
+        self.latency_last = seconds
+        if self.latency_avg is None:
+            self.latency_avg = seconds
+        else:
+            self.latency_avg += LATENCY_SMOOTHING * (seconds - self.latency_avg)
+
+    def trace_pool_wait(self) -> Callable[[str, dict], Awaitable[None]]:
+        """
+        Returns an httpcore trace callback recording how long a request waited for a connection from the HTTP client's
+        pool. No trace events are emitted while a request waits, so the wait ends with the first event: either opening a
+        new connection or sending the request over an existing one.
+        """
+        start = time.perf_counter()
+        waited = False
+
+        async def trace(event_name: str, info: dict):
+            nonlocal waited
+            if not waited:
+                waited = True
+                self.record_pool_wait(time.perf_counter() - start)
+
+        return trace
+
+    def record_pool_wait(self, seconds: float):
+        self.pool_waits += 1
+        self.pool_wait_total += seconds
+        self.pool_wait_max = max(self.pool_wait_max, seconds)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_avg_ms": _ms(self.latency_avg),
+            "latency_last_ms": _ms(self.latency_last),
+            "pool_wait_avg_ms": _ms(
+                self.pool_wait_total / self.pool_waits if self.pool_waits else None
+            ),
+            "pool_wait_max_ms": _ms(self.pool_wait_max),
+        }
+
+
+class ReplicaPool:
+    """
+    Routes queries across identical read replicas, sending each to the healthy replica with the fewest requests in
+    flight. Replicas are ejected when a request to them fails at the network level or a periodic health check fails, and are
+    re-admitted once a health check succeeds again.
+
+    A request is counted as in flight until its response headers are received, which is when the replica has finished
+    evaluating the query.
+    """
+
+    def __init__(self, urls: list[str]):
+        if not urls:
+            raise ValueError("A replica pool needs at least one SPARQL endpoint.")
+        self.replicas = [Replica(url) for url in urls]
+        self._health_check_task: asyncio.Task | None = None
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._hedge_delay: float | None = None
+        self._latency_count = 0
+        self._hedge_delay_count = 0
+        self._hedge_tokens = 0.0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @classmethod
+    def from_settings(cls) -> "ReplicaPool":
+        if settings.sparql_read_endpoints:
+            return cls(list(settings.sparql_read_endpoints))
+        return cls([settings.sparql_endpoint])
+
+    def select(self, exclude: tuple[Replica, ...] = ()) -> Replica:
+        """
+        Returns the replica with the fewest requests in flight, preferring the lower average latency on a tie.
+        Unhealthy replicas are only used when no healthy replica is available.
+        """
+        candidates = [r for r in self.replicas if r not in exclude] or self.replicas
+        healthy = [r for r in candidates if r.healthy] or candidates
+        return min(
+            healthy,
+            key=lambda r: (
+                r.in_flight,
+                r.latency_avg if r.latency_avg is not None else 0.0,
+            ),
+        )
+
+    @asynccontextmanager
+    async def acquire(
+        self, replica: Replica | None = None, hedge: bool = False
+    ) -> AsyncIterator[Replica]:
+        """
+        Selects a replica, unless one is given, and tracks the request sent to it within the context. Only requests
+        which are not themselves hedges add to the hedge budget.
+        """
+        if replica is None:
+            replica = self.select()
+        replica.in_flight += 1
+        if not hedge:
+            self._hedge_tokens = min(
+                self._hedge_tokens + settings.sparql_hedge_max_ratio, HEDGE_BURST
+            )
+        start = time.perf_counter()
+        try:
+            yield replica
+        except (httpx.NetworkError, httpx.ConnectTimeout) as e:
+            # the replica could not be reached; a slow query timing out says nothing about the replica's health
+            replica.errors += 1
+            self._eject(replica, e)
+            raise
+        except httpx.HTTPError:
+            replica.errors += 1
+            raise
+        else:
+            latency = time.perf_counter() - start
+            replica.record_latency(latency)
+            self._latencies.append(latency)
+            self._latency_count += 1
+        finally:
+            replica.in_flight -= 1
+
+    def hedge_delay(self) -> float | None:
+        """
+        Returns how long to wait for a response before hedging a request: the SPARQL_HEDGE_PERCENTILE of recent
+        latencies. Returns None while too few latencies have been recorded to estimate it.
+        """
+        if len(self._latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        # the estimate barely moves between requests, so the window is only re-sorted every HEDGE_MIN_SAMPLES latencies
+        if (
+            self._hedge_delay is None
+            or self._latency_count - self._hedge_delay_count >= HEDGE_MIN_SAMPLES
+        ):
+            ordered = sorted(self._latencies)
+            rank = round(settings.sparql_hedge_percentile / 100 * (len(ordered) - 1))
+            self._hedge_delay = ordered[min(max(rank, 0), len(ordered) - 1)]
+            self._hedge_delay_count = self._latency_count
+        return self._hedge_delay
+
+    def take_hedge(self) -> bool:
+        """
+        Returns whether a hedge may be sent, and if so counts it against the hedge budget. Every request other than a
+        hedge adds SPARQL_HEDGE_MAX_RATIO to the budget, so hedges cannot exceed that fraction of queries over time.
+        """
+        if self._hedge_tokens < 1:
+            return False
+        self._hedge_tokens -= 1
+        self.hedges += 1
+        return True
+
+    def hedge_stats(self) -> dict[str, Any]:
+        return {
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_delay_ms": _ms(self._hedge_delay),
+        }
+
+    async def check_health(self, async_client: httpx.AsyncClient):
+        await asyncio.gather(
+            *[self._check_replica(async_client, r) for r in self.replicas]
+        )
+
+    async def _check_replica(self, async_client: httpx.AsyncClient, replica: Replica):
+        try:
+            response = await async_client.get(
+                replica.url,
+                params={"query": "ASK {}"},
+                timeout=settings.sparql_health_check_interval,
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            self._eject(replica, e)
+        else:
+            if not replica.healthy:
+                log.info(f"SPARQL replica {replica.url} is healthy again")
+            replica.healthy = True
+
+    def start_health_checks(self, async_client: httpx.AsyncClient):
+        # with a single endpoint there is no other replica to route around it, so its health is not polled
+        if (
+            self._health_check_task is None
+            and settings.sparql_health_check_interval
+            and len(self.replicas) > 1
+        ):
+            self._health_check_task = asyncio.create_task(
+                self._run_health_checks(async_client)
+            )
+
+    async def stop_health_checks(self):
+        if self._health_check_task is not None:
+            self._health_check_task.cancel()
+            try:
+                await self._health_check_task
+            except asyncio.CancelledError:
+                pass
+            self._health_check_task = None
+
+    async def _run_health_checks(self, async_client: httpx.AsyncClient):
+        while True:
+            await asyncio.sleep(settings.sparql_health_check_interval)
+            await self.check_health(async_client)
+
+    def stats(self) -> list[dict[str, Any]]:
+        return [r.stats() for r in self.replicas]
+
+    @staticmethod
+    def _eject(replica: Replica, error: Exception):
+        if replica.healthy:
+            log.warning(f"SPARQL replica {replica.url} ejected from pool: {error!r}")
+        replica.healthy = False
+
+
+def _ms(seconds: float | None) -> float | None:
+    return round(seconds * 1000, 1) if seconds is not None else None
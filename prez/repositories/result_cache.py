@@ -0,0 +1,129 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+from prez.config import settings
+
+log = logging.getLogger(__name__)
+
+
+class _CachedResult:
+    __slots__ = ("content", "content_type", "expires")
+
+    def __init__(self, content: bytes, content_type: str | None, expires: float):
+        self.content = content
+        self.content_type = content_type
+        self.expires = expires
+
+    def to_response(self) -> httpx.Response:
+        headers = {"content-type": self.content_type} if self.content_type else {}
+        return httpx.Response(200, headers=headers, content=self.content)
+
+
+class SparqlResultCache:
+    """
+    An LRU cache of raw SPARQL response bodies, keyed by query text and requested mediatype.
+    The cache is bounded by the total size of the cached bodies, and entries expire after a TTL. When a data version
+    query is configured, the cache is cleared whenever the result of that query changes.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[str, str], _CachedResult] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.data_version: Any = None
+        self._data_version_checked = float("-inf")
+        self._probing = False
+
+    def get(self, query: str, mediatype: str) -> httpx.Response | None:
+        key = (query, mediatype)
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires < time.monotonic():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.to_response()
+
+    def put(self, query: str, mediatype: str, content: bytes, content_type: str | None):
+        if len(content) > self.max_bytes:
+            return
+        key = (query, mediatype)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _CachedResult(
+            content, content_type, time.monotonic() + self.ttl
+        )
+        self._size += len(content)
+        while self._size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def fits(self, content_length: int) -> bool:
+        return content_length <= self.max_bytes
+
+    def clear(self) -> int:
+        """Removes all entries, returning the number removed."""
+        n_entries = len(self._entries)
+        self._entries.clear()
+        self._size = 0
+        return n_entries
+
+    async def check_data_version(self, probe: Callable[[], Awaitable[Any]]):
+        """
+        Runs the data version probe at most once per SPARQL_DATA_VERSION_CHECK_INTERVAL seconds, clearing the cache
+        when its result differs from the previous one. Callers arriving while a probe is running do not wait for it.
+        """
+        if self._probing or (
+            time.monotonic() - self._data_version_checked
+            < settings.sparql_data_version_check_interval
+        ):
+            return
+        self._probing = True
+        try:
+            version = await probe()
+        except (httpx.HTTPError, ValueError, KeyError, AttributeError) as e:
+            # the probe answering badly must not fail the request it was run for
+            log.warning(f"Data version query failed, cached SPARQL results kept: {e}")
+            return
+        finally:
+            self._probing = False
+            self._data_version_checked = time.monotonic()
+        if version != self.data_version:
+            if self.data_version is not None:
+                n_entries = self.clear()
+                log.info(
+                    f"Data version changed, {n_entries} SPARQL results removed from cache"
+                )
+            self.data_version = version
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key: tuple[str, str]):
+        entry = self._entries.pop(key)
+        self._size -= len(entry.content)
+
+
+sparql_result_cache = SparqlResultCache(
+    max_bytes=settings.sparql_result_cache_max_bytes,
+    ttl=settings.sparql_result_cache_ttl,
+)
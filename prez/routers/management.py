@@ -1,18 +1,26 @@
 import io
 import json
 import logging
-import pickle
 from typing import Optional
 
-from aiocache import caches
 from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from pydantic import ValidationError
 from rdflib import VANN, BNode, Graph, Literal, URIRef
 from rdflib.collection import Collection
 from starlette.requests import Request
-from starlette.responses import PlainTextResponse, Response, StreamingResponse
-
-from prez.cache import endpoints_graph_cache, prefix_graph
+from starlette.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
+
+from prez.cache import (
+    annotations_cache,
+    classes_cache,
+    endpoints_graph_cache,
+    prefix_graph,
+)
 from prez.config import settings
 from prez.dependencies import get_system_repo
 from prez.enums import JSONMediaType, NonAnnotatedRDFMediaType
@@ -20,8 +28,13 @@ from prez.models.endpoint_config import RootModel, configure_endpoings_example
 from prez.reference_data.prez_ns import PREZ
 from prez.renderers.renderer import return_from_graph, return_rdf
 from prez.repositories import Repo
+from prez.repositories.result_cache import sparql_result_cache
 from prez.services.connegp_service import RDF_MEDIATYPES, NegotiatedPMTs
+from prez.services.annotation_filter import annotation_filter
+from prez.services.chunked_lookups import lookup_timings
+from prez.services.curie_functions import curie_index
 from prez.services.generate_endpoint_rdf import create_endpoint_rdf
+from prez.services.startup_snapshot import remove_snapshot, snapshot_path
 
 router = APIRouter(tags=["Management"])
 config_router = APIRouter(tags=["Configuration"])
@@ -63,6 +76,7 @@ async def index(request: Request, system_repo: Repo = Depends(get_system_repo)):
         selected_class=pmts.selected["class"],
         repo=system_repo,
         system_repo=system_repo,
+        languages=pmts.annotation_languages(),
     )
 
 
@@ -70,9 +84,8 @@ async def index(request: Request, system_repo: Repo = Depends(get_system_repo)):
 async def purge_tbox_cache():
     """Purges the tbox cache, then re-adds annotations from common ontologies Prez has a copy of
     (reference_data/annotations)."""
-    cache = caches.get("default")
-    cache_size = len(cache._cache)
-    result = await cache.clear()
+    cache_size = len(annotations_cache)
+    result = await annotations_cache.clear()
     if result and cache_size > 0:
         return PlainTextResponse(f"{cache_size} terms removed from tbox cache.")
     elif result and cache_size == 0:
@@ -81,18 +94,80 @@ async def purge_tbox_cache():
         raise Exception("Internal Error: Tbox cache not purged.")
 
 
+@router.get("/purge-sparql-cache", summary="Reset SPARQL Result Cache")
+async def purge_sparql_cache():
+    """Removes all cached SPARQL responses, so subsequent queries are sent to the SPARQL endpoint."""
+    n_entries = sparql_result_cache.clear()
+    if n_entries > 0:
+        return PlainTextResponse(f"{n_entries} results removed from SPARQL cache.")
+    return PlainTextResponse("SPARQL cache already empty.")
+
+
+@router.get("/purge-startup-snapshot", summary="Rebuild Startup Snapshot")
+async def purge_startup_snapshot():
+    """
+    Removes the startup snapshot, so the next start rebuilds Prez's caches from the data repository and reference
+    data, and writes a new snapshot.
+    """
+    path = snapshot_path()
+    if path is None:
+        return PlainTextResponse("Startup snapshots are not enabled.")
+    if remove_snapshot(path):
+        return PlainTextResponse(
+            "Startup snapshot removed, caches will be rebuilt on the next start."
+        )
+    return PlainTextResponse("No startup snapshot to remove.")
+
+
+@router.get("/sparql-backend-stats", summary="Show SPARQL Backend Statistics")
+async def sparql_backend_stats(request: Request):
+    """
+    Returns the health, load and latency of each remote SPARQL replica, request hedging counts, and the SPARQL result
+    cache statistics.
+    """
+    replica_pool = getattr(
+        getattr(request.app.state, "repo", None), "replica_pool", None
+    )
+    return {
+        "replicas": replica_pool.stats() if replica_pool is not None else [],
+        "hedging": replica_pool.hedge_stats() if replica_pool is not None else {},
+        "result_cache": sparql_result_cache.stats(),
+    }
+
+
+@router.get("/cache-stats", summary="Show In-Memory Cache Statistics")
+async def cache_stats():
+    """
+    Returns the size, hit, miss and eviction counts of the annotations, classes and CURIE caches, and the timings of
+    the chunked queries for terms missing from the annotations and classes caches, and how many annotation lookups the
+    annotation filter has skipped.
+    """
+    curies = curie_index.curie_for_uri.cache_info()
+    uris = curie_index.uri_for_curie.cache_info()
+    return {
+        "annotations": annotations_cache.stats(),
+        "classes": classes_cache.stats(),
+        "curies": {
+            "entries": curies.currsize + uris.currsize,
+            "max_entries": curies.maxsize + uris.maxsize,
+            "hits": curies.hits + uris.hits,
+            "misses": curies.misses + uris.misses,
+        },
+        "lookups": lookup_timings.stats(),
+        "annotation_filter": annotation_filter.stats(),
+    }
+
+
 @router.get("/tbox-cache", summary="Show the Tbox Cache")
 async def return_tbox_cache(request: Request):
     """gets the mediatype from the request and returns the tbox cache in this mediatype"""
     mediatype = request.headers.get("Accept").split(",")[0]
     if not mediatype or mediatype not in RDF_MEDIATYPES:
         mediatype = "text/turtle"
-    cache = caches.get("default")
     cache_g = Graph()
-    cache_dict = cache._cache
-    for subject, pred_obj_bytes in cache_dict.items():
-        # use pickle to deserialize the pred_obj_bytes
-        pred_obj = pickle.loads(pred_obj_bytes)
+    for key, pred_obj in annotations_cache.items():
+        # annotations pruned to a set of languages are keyed by the term and the languages
+        subject = key[0] if isinstance(key, tuple) else key
         for pred, obj in pred_obj:
             if (
                 pred_obj
@@ -103,8 +178,14 @@ async def return_tbox_cache(request: Request):
 
 
 @router.get("/health")
-async def health_check():
-    return {"status": "ok"}
+async def health_check(request: Request):
+    """Returns 200 once Prez has started up, and 503 while it is starting up or if startup failed."""
+    if getattr(request.app.state, "ready", True):
+        return {"status": "ok"}
+    status = (
+        "failed" if getattr(request.app.state, "startup_failed", False) else "starting"
+    )
+    return JSONResponse(status_code=503, content={"status": status})
 
 
 async def return_annotation_predicates():
@@ -3,7 +3,7 @@ from typing import Annotated
 
 import httpx
 from fastapi import APIRouter, Depends, Form
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import Response
 from rdflib import Graph, Namespace
 from starlette.background import BackgroundTask
 from starlette.datastructures import Headers
@@ -71,7 +71,9 @@ async def sparql_endpoint_handler(
         await response.aread()
         g = Graph()
         g.parse(data=response.text, format=non_anot_mediatype)
-        annotations_graph = await return_annotated_rdf(g, repo, system_repo)
+        annotations_graph = await return_annotated_rdf(
+            g, repo, system_repo, pmts.annotation_languages()
+        )
         g.__iadd__(annotations_graph)
         content = io.BytesIO(g.serialize(format=non_anot_mediatype, encoding="utf-8"))
         return StreamingResponse(
@@ -82,12 +84,6 @@ async def sparql_endpoint_handler(
     query_result: httpx.Response = await repo.sparql(
         query, request.headers.raw, method=method
     )
-    if isinstance(query_result, dict):
-        return JSONResponse(content=query_result)
-    elif isinstance(query_result, Graph):
-        return Response(
-            content=query_result.serialize(format="text/turtle"), status_code=200
-        )
 
     dispositions = query_result.headers.get_list("Content-Disposition")
     for disposition in dispositions:
@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from typing import Any, Iterable
+
+from pyoxigraph import NamedNode, Store
+
+from prez.config import settings
+from prez.repositories import RemoteSparqlRepo, Repo
+from prez.services.query_generation.annotations import AnnotationsConstructQuery
+
+log = logging.getLogger(__name__)
+
+# The number of annotated subjects fetched per query when building the data repository's filter
+DATA_PAGE_SIZE = 50000
+
+
+class BloomFilter:
+    """
+    A set of strings which can answer "definitely not in the set" exactly, and "possibly in the set" with a false
+    positive rate chosen when it is created, in about 10 bits per string for a 1% rate.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(
+            8, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str) -> Iterable[int]:
+        # double hashing: the positions are h1, h1 + h2, h1 + 2 * h2 ...
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+    def false_positive_rate(self) -> float:
+        """The false positive rate expected from the fraction of bits set."""
+        fill = int.from_bytes(self.bits, "little").bit_count() / self.size
+        return fill**self.hashes
+
+
+class AnnotationFilter:
+    """
+    Bloom filters over the subjects that can have annotations: one over the annotations and system stores, and, when
+    ANNOTATION_FILTER_DATA_REPO is set, one over the subjects with annotations in the data repository. Annotation
+    lookups skip the repositories whose filter rules a term out, and terms ruled out by every filter are not looked up
+    at all. Until the filters are built, every term may have annotations.
+
+    When SPARQL_DATA_VERSION_QUERY is set, the data repository's filter is dropped as soon as the data version
+    changes, and rebuilt in the background.
+    """
+
+    def __init__(self):
+        self.local: BloomFilter | None = None
+        self.data: BloomFilter | None = None
+        self.checked = 0
+        self.skipped = 0
+        self.data_version: Any = None
+        self._data_version_checked = float("-inf")
+        self._rebuilding: asyncio.Task | None = None
+
+    def may_be_local(self, term: str) -> bool:
+        return self.local is None or term in self.local
+
+    def may_be_in_data(self, term: str) -> bool:
+        return self.data is None or term in self.data
+
+    def may_have_annotations(self, term: str) -> bool:
+        possible = self.may_be_local(term) or self.may_be_in_data(term)
+        self.checked += 1
+        if not possible:
+            self.skipped += 1
+        return possible
+
+    async def build(
+        self, data_repo: Repo, annotations_store: Store, system_store: Store
+    ):
+        """
+        Builds the filters. The data version is read first, so changes made during the build are caught later. If
+        the build fails, no filters are used.
+        """
+        try:
+            await self._build(data_repo, annotations_store, system_store)
+        except Exception as e:
+            self.local = self.data = None
+            log.warning(
+                f"Annotation filter not built, every term will be looked up: {e}"
+            )
+
+    async def _build(
+        self, data_repo: Repo, annotations_store: Store, system_store: Store
+    ):
+        start = time.perf_counter()
+        if (
+            isinstance(data_repo, RemoteSparqlRepo)
+            and settings.sparql_data_version_query
+        ):
+            self.data_version = await data_repo.probe_data_version()
+            self._data_version_checked = time.monotonic()
+        subjects = {
+            quad.subject.value
+            for store in (annotations_store, system_store)
+            for quad in store
+            if isinstance(quad.subject, NamedNode)
+        }
+        local = BloomFilter(
+            len(subjects), settings.annotation_filter_false_positive_rate
+        )
+        for subject in subjects:
+            local.add(subject)
+        self.local = local
+        if settings.annotation_filter_data_repo:
+            self.data = await _build_data_filter(data_repo)
+        log.info(
+            f"Annotation filter built in {time.perf_counter() - start:.2f}s: "
+            f"{local.count:,} local subjects"
+            + (f", {self.data.count:,} data subjects" if self.data is not None else "")
+        )
+
+    def check_data_version(self, data_repo: Repo):
+        """
+        Probes the data version at most once per SPARQL_DATA_VERSION_CHECK_INTERVAL seconds, in the background. If
+        it has changed, the data repository's filter stops being used until it has been rebuilt.
+        """
+        if (
+            not settings.annotation_filter_data_repo
+            or not settings.sparql_data_version_query
+            or not isinstance(data_repo, RemoteSparqlRepo)
+            or (self._rebuilding is not None and not self._rebuilding.done())
+            or time.monotonic() - self._data_version_checked
+            < settings.sparql_data_version_check_interval
+        ):
+            return
+        self._data_version_checked = time.monotonic()
+        self._rebuilding = asyncio.create_task(self._rebuild_if_changed(data_repo))
+
+    async def _rebuild_if_changed(self, data_repo: RemoteSparqlRepo):
+        try:
+            version = await data_repo.probe_data_version()
+            if version == self.data_version:
+                return
+            log.info("Data version changed, rebuilding the annotation filter")
+            self.data = None
+            self.data_version = version
+            self.data = await _build_data_filter(data_repo)
+        except Exception as e:
+            log.warning(f"Annotation filter not rebuilt: {e}")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            name: {
+                "entries": bloom.count,
+                "bits": bloom.size,
+                "hashes": bloom.hashes,
+                "estimated_false_positive_rate": bloom.false_positive_rate(),
+            }
+            for name, bloom in (("local", self.local), ("data", self.data))
+            if bloom is not None
+        } | {"checked": self.checked, "skipped": self.skipped}
+
+
+async def _build_data_filter(data_repo: Repo) -> BloomFilter:
+    """
+    Counts the subjects with annotations in the data repository to size the filter, then adds them to it a page at a
+    time, in IRI order, so they are never all held in memory. SPARQL only compares IRIs as strings, so each page
+    query filters and sorts the subjects after the previous page by their string form; that cost is paid once per
+    page, in the background.
+    """
+    props = AnnotationsConstructQuery.get_annotation_predicates_values()
+    pattern = f"""
+        VALUES ?prop {{ {props} }}
+        ?term ?prop ?annotation
+        FILTER(isIRI(?term))
+    """
+    count = await data_repo.query_columns(
+        f"SELECT (COUNT(DISTINCT ?term) AS ?count) WHERE {{ {pattern} }}"
+    )
+    bloom = BloomFilter(
+        int(count.column("count")[0] or 0),
+        settings.annotation_filter_false_positive_rate,
+    )
+    last = None
+    while True:
+        after = f"FILTER(STR(?term) > {_string_literal(last)})" if last else ""
+        page = await data_repo.query_columns(
+            f"""
+            SELECT DISTINCT ?term
+            WHERE {{
+              {pattern}
+              {after}
+            }}
+            ORDER BY STR(?term)
+            LIMIT {DATA_PAGE_SIZE}
+            """
+        )
+        terms = page.column("term")
+        for term in terms:
+            bloom.add(term)
+        if len(terms) < DATA_PAGE_SIZE:
+            break
+        last = terms[-1]
+    return bloom
+
+
+def _string_literal(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+annotation_filter = AnnotationFilter()
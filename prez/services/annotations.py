@@ -1,8 +1,9 @@
 import asyncio
 import logging
+import time
+from functools import lru_cache
 from typing import FrozenSet, List, Set, Tuple
 
-from aiocache import caches
 from oxrdflib._converter import to_ox, from_ox
 from pyoxigraph import (
     Store as OxiStore,
@@ -11,18 +12,25 @@ from pyoxigraph import (
     Quad as OxiQuad,
     DefaultGraph as OxiDefaultGraph,
 )
-from rdflib import Graph, Literal, URIRef
+from rdflib import RDF, XSD, Graph, Literal, URIRef
 from sparql_grammar_pydantic import IRI
 
+from prez.cache import annotations_cache, preloaded_annotation_terms
+from prez.config import settings
 from prez.dependencies import get_annotations_repo
 from prez.repositories import Repo
+from prez.services.annotation_filter import annotation_filter
+from prez.services.chunked_lookups import run_chunked
 from prez.services.query_generation.annotations import AnnotationsConstructQuery
 
 log = logging.getLogger(__name__)
 
 
 async def get_annotations(
-    terms_and_dtypes: Set[URIRef], repo: Repo, system_repo: Repo
+    terms_and_dtypes: Set[URIRef],
+    repo: Repo,
+    system_repo: Repo,
+    languages: Tuple[str, ...] | None = None,
 ) -> Graph:
     """
     This function processes the terms and their data types. It first retrieves the cached results for the given terms
@@ -33,27 +41,39 @@ async def get_annotations(
         terms_and_dtypes (set): A list of tuples where each tuple contains a term and its data type.
         repo (Repo): An instance of the Repo class.
         system_repo (Repo): An instance of the Repo class with the Prez system graph.
+        languages (tuple): The languages to return annotations in, best first, or None for all the annotations in
+            the default language or no language.
 
     Returns:
         annotations_g (Graph): A graph containing the processed terms and their data types.
     """
     annotations_g = Graph()
-    cache = caches.get("default")  # This always returns the SAME instance
-    results = await cache.multi_get(list(terms_and_dtypes))
+    results = await annotations_cache.multi_get(
+        _cache_key(term, languages) for term in terms_and_dtypes
+    )
     zipped = list(zip(terms_and_dtypes, results))
 
-    cached = [z for z in zipped if z[1] is not None]
+    cached = [
+        (term, _prune_cached(po_pairs, languages))
+        for term, po_pairs in zipped
+        if po_pairs is not None
+    ]
     await add_cached_entries(annotations_g, cached)
 
-    uncached = [z[0] for z in zipped if z[1] is None]
+    uncached = _may_have_annotations([z[0] for z in zipped if z[1] is None], repo)
     if uncached:
-        await process_uncached_terms(uncached, repo, system_repo, annotations_g)
+        await process_uncached_terms(
+            uncached, repo, system_repo, annotations_g, languages
+        )
 
     return annotations_g
 
 
 async def get_annotations_for_oxigraph(
-    terms_and_dtypes: Set[OxiNamedNode], repo: Repo, system_repo: Repo
+    terms_and_dtypes: Set[OxiNamedNode],
+    repo: Repo,
+    system_repo: Repo,
+    languages: Tuple[str, ...] | None = None,
 ) -> OxiStore:
     """
     This function processes the terms and their data types. It first retrieves the cached results for the given terms
@@ -64,15 +84,18 @@ async def get_annotations_for_oxigraph(
         terms_and_dtypes (set): A list of tuples where each tuple contains a term and its data type.
         repo (Repo): An instance of the Repo class.
         system_repo (Repo): An instance of the Repo class with the Prez system graph.
+        languages (tuple): The languages to return annotations in, best first, or None for all the annotations in
+            the default language or no language.
 
     Returns:
         annotations_store (OxiStore): A oxigraph store containing the processed terms and their data types.
     """
     annotations_store = OxiStore()
     oxi_default_graph = OxiDefaultGraph()
-    cache = caches.get("default")  # This always returns the SAME instance
     # Cache always uses URIRefs, so we convert OxiNamedNode to URIRef
-    results = await cache.multi_get(list(URIRef(t.value) for t in terms_and_dtypes))
+    results = await annotations_cache.multi_get(
+        _cache_key(URIRef(t.value), languages) for t in terms_and_dtypes
+    )
     zipped = list(zip(terms_and_dtypes, results))
 
     cached = [z for z in zipped if z[1] is not None]
@@ -80,7 +103,7 @@ async def get_annotations_for_oxigraph(
     subject: OxiNamedNode
     for subject, po_pairs in cached:
         if po_pairs:
-            for po_pair in po_pairs:
+            for po_pair in _prune_cached(po_pairs, languages):
                 if po_pair is not None and len(po_pair) == 2:
                     predicate = to_ox(po_pair[0])
                     object_ = to_ox(po_pair[1])
@@ -88,15 +111,50 @@ async def get_annotations_for_oxigraph(
                         OxiQuad(subject, predicate, object_, oxi_default_graph)
                     )
 
-    uncached = [z[0] for z in zipped if z[1] is None]
+    uncached = _may_have_annotations(
+        [z[0] for z in zipped if z[1] is None], repo, lambda term: term.value
+    )
     if uncached:
         await process_uncached_terms_for_oxigraph(
-            uncached, repo, system_repo, annotations_store
+            uncached, repo, system_repo, annotations_store, languages
         )
 
     return annotations_store
 
 
+def _cache_key(term: URIRef, languages: Tuple[str, ...] | None):
+    """
+    Annotations pruned by language are cached apart from the unpruned annotations of the same term, as the candidates
+    for the primary language subtags of the languages, and pruned when read. So requests for "en-US, en", "en-GB, en"
+    and "en" share one entry.
+    """
+    return term if languages is None else (term, _candidate_languages(languages))
+
+
+def _candidate_languages(languages: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    The primary subtags of the languages, in a fixed order. Their annotations, found with LANGMATCHES, include the
+    best match for any ordering of the languages and their subtags.
+    """
+    return tuple(sorted({language.split("-")[0] for language in languages}))
+
+
+def _prune_cached(
+    po_pairs: FrozenSet[Tuple[URIRef, Literal]], languages: Tuple[str, ...] | None
+):
+    return po_pairs if languages is None else prune_languages(po_pairs, languages)
+
+
+def _may_have_annotations(terms: list, data_repo: Repo, value=str) -> list:
+    """Leaves out the terms the annotation filter rules out of every repository."""
+    if not settings.annotation_filter_enabled:
+        return terms
+    annotation_filter.check_data_version(data_repo)
+    return [
+        term for term in terms if annotation_filter.may_have_annotations(value(term))
+    ]
+
+
 async def add_cached_entries(
     annotations_g: Graph, cached: List[Tuple[URIRef, FrozenSet[Tuple[URIRef, Literal]]]]
 ):
@@ -124,7 +182,11 @@ async def add_cached_entries(
 
 
 async def process_uncached_terms(
-    terms: List[URIRef], data_repo: Repo, system_repo: Repo, annotations_g: Graph
+    terms: List[URIRef],
+    data_repo: Repo,
+    system_repo: Repo,
+    annotations_g: Graph,
+    languages: Tuple[str, ...] | None = None,
 ):
     """
     This function processes the terms that are not cached. It sends queries to the annotations repository and the
@@ -135,46 +197,40 @@ async def process_uncached_terms(
         terms (list): A list of terms that are not cached.
         data_repo (Repo): An instance of the Repo class.
         annotations_g (Graph): A graph to which the results are added.
+        languages (tuple): The languages to return annotations in, best first, if they are pruned by language.
 
     Returns:
         None
     """
     annotations_repo = await get_annotations_repo()
-    annotations_query = AnnotationsConstructQuery(
-        terms=[IRI(value=term) for term in terms]
-    ).to_string()
-    data_repo_query_task = asyncio.ensure_future(
-        data_repo.send_queries(
-            rdf_queries=[annotations_query],
-            tabular_queries=[],
-            return_oxigraph_store=False,
+
+    async def lookup(chunk: List[URIRef]) -> Graph:
+        data_query, local_query = _annotations_queries(
+            [str(term) for term in chunk], languages
         )
-    )
-    annotation_repo_query_task = asyncio.ensure_future(
-        annotations_repo.send_queries(
-            rdf_queries=[annotations_query],
-            tabular_queries=[],
-            return_oxigraph_store=False,
+        data_repo_query_task = asyncio.ensure_future(
+            _send_query(data_repo, data_query, return_oxigraph_store=False)
+        )
+        annotation_repo_query_task = asyncio.ensure_future(
+            _send_query(annotations_repo, local_query, return_oxigraph_store=False)
         )
-    )
 
-    system_repo_query_task = asyncio.ensure_future(
-        system_repo.send_queries(
-            rdf_queries=[annotations_query],
-            tabular_queries=[],
-            return_oxigraph_store=False,
+        system_repo_query_task = asyncio.ensure_future(
+            _send_query(system_repo, local_query, return_oxigraph_store=False)
         )
-    )
-    await asyncio.sleep(0)  # Yield control to allow the parallel tasks to kick-start
+        # Yield control to allow the parallel tasks to kick-start
+        await asyncio.sleep(0)
+        chunk_results = Graph()
+        # Wait the local ones first, annotation repo and system repo queries
+        chunk_results += await system_repo_query_task
+        chunk_results += await annotation_repo_query_task
+        # now wait for the data repo (might be remote)
+        chunk_results += await data_repo_query_task
+        return chunk_results
+
     all_results = Graph()
-    # Wait the local ones first, annotation repo and system repo queries
-    system_repo_results = await system_repo_query_task
-    all_results += system_repo_results[0]
-    annotation_repo_results = await annotation_repo_query_task
-    all_results += annotation_repo_results[0]
-    # now wait for the data repo (might be remote)
-    data_repo_results = await data_repo_query_task
-    all_results += data_repo_results[0]
+    for chunk_results in await run_chunked("annotations", terms, lookup):
+        all_results += chunk_results
 
     # Initialize subjects_map with each term having an empty set to start with
     subjects_map = {term: set() for term in terms}
@@ -184,13 +240,22 @@ async def process_uncached_terms(
 
     # Prepare subjects_list, only converting to frozenset where there are actual results
     subjects_list = [
-        (subject, frozenset(po_pairs)) if po_pairs else (subject, frozenset())
+        (
+            (_cache_key(subject, languages), frozenset(po_pairs))
+            if po_pairs
+            else (_cache_key(subject, languages), frozenset())
+        )
         for subject, po_pairs in subjects_map.items()
     ]
 
-    # Cache the results
-    cache = caches.get("default")
-    await cache.multi_set(subjects_list)
+    # Cache the results, before any pruning by language
+    await annotations_cache.multi_set(subjects_list)
+
+    if languages is not None:
+        all_results = Graph()
+        for subject, po_pairs in subjects_map.items():
+            for p, o in prune_languages(po_pairs, languages):
+                all_results.add((subject, p, o))
 
     # Add all results to annotations_g
     annotations_g += all_results
@@ -201,6 +266,7 @@ async def process_uncached_terms_for_oxigraph(
     data_repo: Repo,
     system_repo: Repo,
     annotations_store: OxiStore,
+    languages: Tuple[str, ...] | None = None,
 ):
     """
     This function processes the terms that are not cached. It sends queries to the annotations repository and the
@@ -211,84 +277,227 @@ async def process_uncached_terms_for_oxigraph(
         terms (list): A list of terms that are not cached.
         data_repo (Repo): An instance of the Repo class.
         annotations_g (Graph): A graph to which the results are added.
+        languages (tuple): The languages to return annotations in, best first, if they are pruned by language.
 
     Returns:
         None
     """
     annotations_repo = await get_annotations_repo()
-    annotations_query = AnnotationsConstructQuery(
-        terms=[IRI(value=term.value) for term in terms]
-    ).to_string()
-    data_repo_query_task = asyncio.ensure_future(
-        data_repo.send_queries(
-            rdf_queries=[annotations_query],
-            tabular_queries=[],
-            return_oxigraph_store=True,
+
+    async def lookup(chunk: List[OxiNamedNode]) -> List[OxiStore]:
+        data_query, local_query = _annotations_queries(
+            [term.value for term in chunk], languages
         )
-    )
-    annotation_repo_query_task = asyncio.ensure_future(
-        annotations_repo.send_queries(
-            rdf_queries=[annotations_query],
-            tabular_queries=[],
-            return_oxigraph_store=True,
+        data_repo_query_task = asyncio.ensure_future(
+            _send_query(data_repo, data_query, return_oxigraph_store=True)
+        )
+        annotation_repo_query_task = asyncio.ensure_future(
+            _send_query(annotations_repo, local_query, return_oxigraph_store=True)
         )
-    )
 
-    system_repo_query_task = asyncio.ensure_future(
-        system_repo.send_queries(
-            rdf_queries=[annotations_query],
-            tabular_queries=[],
-            return_oxigraph_store=True,
+        system_repo_query_task = asyncio.ensure_future(
+            _send_query(system_repo, local_query, return_oxigraph_store=True)
         )
-    )
-    await asyncio.sleep(0)  # Yield control to allow the parallel tasks to kick-start
+        # Yield control to allow the parallel tasks to kick-start
+        await asyncio.sleep(0)
+        # Wait the local ones first, annotation repo and system repo queries
+        return [
+            await system_repo_query_task,
+            await annotation_repo_query_task,
+            # now wait for the data repo (might be remote)
+            await data_repo_query_task,
+        ]
 
     # Initialize subjects_map with each term having an empty set to start with
     uriref_subjects_map: dict[URIRef, set] = {
         URIRef(term.value): set() for term in terms
     }
 
-    # Wait the local ones first, annotation repo and system repo queries
-    system_repo_results = await system_repo_query_task
-    system_repo_result_store: OxiStore = system_repo_results[0]
-    for quad in system_repo_result_store.quads_for_pattern(None, None, None, None):
-        uriref_subjects_map[URIRef(quad[0].value)].add(
-            (from_ox(quad[1]), from_ox(quad[2]))
-        )
-        annotations_store.add(quad)
-
-    annotation_repo_results = await annotation_repo_query_task
-    annotation_repo_result_store: OxiStore = annotation_repo_results[0]
-    for quad in annotation_repo_result_store.quads_for_pattern(None, None, None, None):
-        uriref_subjects_map[URIRef(quad[0].value)].add(
-            (from_ox(quad[1]), from_ox(quad[2]))
-        )
-        annotations_store.add(quad)
-
-    # now wait for the data repo (might be remote)
-    data_repo_results = await data_repo_query_task
-    data_repo_result_store: OxiStore = data_repo_results[0]
-    for quad in data_repo_result_store.quads_for_pattern(None, None, None, None):
-        uriref_subjects_map[URIRef(quad[0].value)].add(
-            (from_ox(quad[1]), from_ox(quad[2]))
-        )
-        annotations_store.add(quad)
+    for result_stores in await run_chunked("annotations", terms, lookup):
+        for result_store in result_stores:
+            for quad in result_store.quads_for_pattern(None, None, None, None):
+                uriref_subjects_map[URIRef(quad[0].value)].add(
+                    (from_ox(quad[1]), from_ox(quad[2]))
+                )
+                if languages is None:
+                    annotations_store.add(quad)
+
+    if languages is not None:
+        oxi_default_graph = OxiDefaultGraph()
+        for subject, po_pairs in uriref_subjects_map.items():
+            for p, o in prune_languages(po_pairs, languages):
+                annotations_store.add(
+                    OxiQuad(to_ox(subject), to_ox(p), to_ox(o), oxi_default_graph)
+                )
 
     # Prepare subjects_list, only converting to frozenset where there are actual results
     subjects_list = [
-        (subject, frozenset(po_pairs)) if po_pairs else (subject, frozenset())
+        (
+            (_cache_key(subject, languages), frozenset(po_pairs))
+            if po_pairs
+            else (_cache_key(subject, languages), frozenset())
+        )
         for subject, po_pairs in uriref_subjects_map.items()
     ]
 
-    # Cache the results
-    cache = caches.get("default")
-    await cache.multi_set(subjects_list)
+    # Cache the results, before any pruning by language
+    await annotations_cache.multi_set(subjects_list)
+
+
+def _annotations_queries(
+    terms: List[str], languages: Tuple[str, ...] | None = None
+) -> Tuple[str | None, str | None]:
+    """
+    Returns the annotations queries for the data repository, and for the annotations and system repositories, leaving
+    out the terms each cannot annotate: preloaded terms for the data repository, and terms the annotation filter rules
+    out. Annotations pruned by language are queried in every language matching the languages' primary subtags. A
+    query is None when no terms are left for it.
+    """
+    if languages is not None:
+        languages = _candidate_languages(languages)
+    data_terms = [
+        term
+        for term in terms
+        if term not in preloaded_annotation_terms
+        and annotation_filter.may_be_in_data(term)
+    ]
+    local_terms = [term for term in terms if annotation_filter.may_be_local(term)]
+    local_query = (
+        AnnotationsConstructQuery(
+            terms=[IRI(value=term) for term in local_terms], languages=languages
+        ).to_string()
+        if local_terms
+        else None
+    )
+    if data_terms == local_terms:
+        return local_query, local_query
+    data_query = (
+        AnnotationsConstructQuery(
+            terms=[IRI(value=term) for term in data_terms], languages=languages
+        ).to_string()
+        if data_terms
+        else None
+    )
+    return data_query, local_query
+
+
+def prune_languages(
+    po_pairs: Set[Tuple[URIRef, Literal]], languages: Tuple[str, ...]
+) -> Set[Tuple[URIRef, Literal]]:
+    """
+    Keeps, for each predicate, only the string literals in the best matching of the languages, or with no language
+    if none match. A language matches a language tag equal to it, or, less well, one it is a prefix of (en matches
+    en-au). IRIs and other literals are all kept.
+    """
+
+    def rank(literal: Literal) -> Tuple[int, int]:
+        if not literal.language:
+            return len(languages), 0
+        tag = literal.language.lower()
+        for i, language in enumerate(languages):
+            if tag == language:
+                return i, 0
+            if tag.startswith(language + "-"):
+                return i, 1
+        return len(languages) + 1, 0
+
+    def is_string(o) -> bool:
+        return isinstance(o, Literal) and o.datatype in (
+            None,
+            XSD.string,
+            RDF.langString,
+        )
+
+    best = {}
+    for p, o in po_pairs:
+        if is_string(o) and (p not in best or rank(o) < best[p]):
+            best[p] = rank(o)
+    return {(p, o) for p, o in po_pairs if not is_string(o) or rank(o) == best[p]}
+
+
+async def _send_query(
+    repo: Repo, query: str | None, return_oxigraph_store: bool
+) -> Graph | OxiStore:
+    if query is None:
+        return OxiStore() if return_oxigraph_store else Graph()
+    results, _ = await repo.send_queries(
+        rdf_queries=[query],
+        tabular_queries=[],
+        return_oxigraph_store=return_oxigraph_store,
+    )
+    return results
+
+
+# The predicates and classes used in the data. Blank node classes, such as OWL restrictions, are left out as their
+# annotations cannot be looked up.
+PREDICATES_AND_CLASSES_QUERY = """
+    SELECT DISTINCT ?term
+    WHERE {
+      { ?s ?term ?o }
+      UNION
+      { ?s a ?term }
+      FILTER(isIRI(?term))
+    }
+"""
+
+
+def preload_query(terms: List[URIRef]) -> str:
+    """
+    A query for the annotations of terms as they are in the data, rather than with the prez annotation predicates
+    AnnotationsConstructQuery returns them with, so the results can be queried again by AnnotationsConstructQuery.
+    Literals in every language are copied, so preloaded terms are found locally whatever languages are asked for.
+    """
+    props = AnnotationsConstructQuery.get_annotation_predicates_values()
+    values = " ".join(f"<{term}>" for term in terms)
+    return f"""
+        CONSTRUCT {{ ?term ?prop ?annotation }}
+        WHERE {{
+          VALUES ?term {{ {values} }}
+          VALUES ?prop {{ {props} }}
+          ?term ?prop ?annotation
+        }}
+    """
+
+
+async def preload_annotations(
+    data_repo: Repo, annotations_store: OxiStore, system_repo: Repo
+):
+    """
+    Copies the annotations of every predicate and class used in the data into the annotations store, then caches the
+    annotations of those terms. They are usually from a small, stable set of ontologies, and once preloaded their
+    annotations are looked up without querying the data repository, even after they are evicted from the cache.
+    """
+    start = time.perf_counter()
+    columns = await data_repo.query_columns(PREDICATES_AND_CLASSES_QUERY)
+    terms = [URIRef(term) for term in columns.column("term")]
+
+    async def lookup(chunk: List[URIRef]) -> OxiStore:
+        store, _ = await data_repo.send_queries(
+            rdf_queries=[preload_query(chunk)],
+            tabular_queries=[],
+            return_oxigraph_store=True,
+        )
+        return store
+
+    n_annotations = 0
+    for store in await run_chunked("preload_annotations", terms, lookup):
+        annotations_store.bulk_extend(store)
+        n_annotations += len(store)
+    preloaded_annotation_terms.update(str(term) for term in terms)
+    await get_annotations_for_oxigraph(
+        {OxiNamedNode(term) for term in terms}, data_repo, system_repo
+    )
+    log.info(
+        f"Preloaded {n_annotations:,} annotations of {len(terms):,} predicates and classes "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
 
 
 async def get_annotation_properties(
     item_graph: Graph,
     repo: Repo,
     system_repo: Repo,
+    languages: Tuple[str, ...] | None = None,
 ) -> Graph:
     """
     Gets annotation data used for HTML display.
@@ -313,7 +522,7 @@ async def get_annotation_properties(
     if not terms_and_types:
         return Graph()
 
-    annotations_g = await get_annotations(terms_and_types, repo, system_repo)
+    annotations_g = await get_annotations(terms_and_types, repo, system_repo, languages)
     return annotations_g
 
 
@@ -321,6 +530,7 @@ async def get_annotation_properties_for_oxigraph(
     item_store: OxiStore,
     repo: Repo,
     system_repo: Repo,
+    languages: Tuple[str, ...] | None = None,
 ) -> OxiStore:
     """
     Gets annotation data used for HTML display.
@@ -334,29 +544,108 @@ async def get_annotation_properties_for_oxigraph(
     But the response is still an rdflib Graph, so it can be used in the same way as the rdflib version.
     This is because the annotations cache and all annotations logic are still based on URIRefs and rdflib Graphs.
     """
-    # get all terms and datatypes for which we want to retrieve annotations
-    all_uris: set[OxiNamedNode] = set()
-    all_dtypes: set[OxiNamedNode] = set()
-    for quad in item_store:
-        if isinstance(quad[0], OxiNamedNode):
-            all_uris.add(quad[0])
-        elif isinstance(quad[0], OxiLiteral):
-            if quad[0].datatype is not None:
-                all_dtypes.add(quad[0].datatype)
-        if isinstance(quad[1], OxiNamedNode):
-            all_uris.add(quad[1])
-        elif isinstance(quad[1], OxiLiteral):
-            if quad[1].datatype is not None:
-                all_dtypes.add(quad[1].datatype)
-        if isinstance(quad[2], OxiNamedNode):
-            all_uris.add(quad[2])
-        elif isinstance(quad[2], OxiLiteral):
-            if quad[2].datatype is not None:
-                all_dtypes.add(quad[2].datatype)
-    if len(all_uris) == 0 and len(all_dtypes) == 0:
+    terms_and_types = _terms_for_oxigraph(item_store)
+    if not terms_and_types:
         return OxiStore()
-    terms_and_types: set[OxiNamedNode] = all_uris.union(all_dtypes)
     annotations_store = await get_annotations_for_oxigraph(
-        terms_and_types, repo, system_repo
+        terms_and_types, repo, system_repo, languages
     )
     return annotations_store
+
+
+@lru_cache(maxsize=None)
+def annotation_terms() -> frozenset[URIRef]:
+    """
+    The terms almost every set of annotations uses, and so are annotated along with any set of terms: the predicates
+    annotations are returned with, and the datatypes of plain and language tagged literals.
+    """
+    return frozenset(
+        URIRef(prez_prop)
+        for _, prez_prop in AnnotationsConstructQuery.get_prez_annotation_tuples()
+    ) | {XSD.string, RDF.langString}
+
+
+async def get_two_level_annotation_properties(
+    item_graph: Graph,
+    repo: Repo,
+    system_repo: Repo,
+    languages: Tuple[str, ...] | None = None,
+) -> Graph:
+    """
+    Gets annotations for the terms in the item graph, and for the terms used by those annotations, such as the
+    annotation predicates themselves.
+
+    The terms annotations use are nearly always the ones in annotation_terms(), so those are annotated in the same
+    batch as the item's terms, and the annotations of any which are not used are dropped. Only terms outside that set,
+    for example IRI valued annotations, need a second batch, and that batch is usually answered from the cache.
+    """
+    terms = _terms(item_graph)
+    if not terms:
+        return Graph()
+    extra_terms = annotation_terms() - terms
+    annotations_g = await get_annotations(
+        terms | extra_terms, repo, system_repo, languages
+    )
+    level_two_terms = _terms(triple for triple in annotations_g if triple[0] in terms)
+    for term in extra_terms - level_two_terms:
+        annotations_g.remove((term, None, None))
+    missing = level_two_terms - terms - extra_terms
+    if missing:
+        annotations_g += await get_annotations(missing, repo, system_repo, languages)
+    return annotations_g
+
+
+async def get_two_level_annotation_properties_for_oxigraph(
+    item_store: OxiStore,
+    repo: Repo,
+    system_repo: Repo,
+    languages: Tuple[str, ...] | None = None,
+) -> OxiStore:
+    """
+    The oxigraph version of get_two_level_annotation_properties: gets annotations for the terms in the item store,
+    and for the terms used by those annotations, in one batch unless the annotations use terms outside
+    annotation_terms().
+    """
+    terms = _terms_for_oxigraph(item_store)
+    if not terms:
+        return OxiStore()
+    extra_terms = {OxiNamedNode(term) for term in annotation_terms()} - terms
+    annotations_store = await get_annotations_for_oxigraph(
+        terms | extra_terms, repo, system_repo, languages
+    )
+    level_two_terms = _terms_for_oxigraph(
+        quad for quad in annotations_store if quad.subject in terms
+    )
+    for term in extra_terms - level_two_terms:
+        for quad in list(annotations_store.quads_for_pattern(term, None, None)):
+            annotations_store.remove(quad)
+    missing = level_two_terms - terms - extra_terms
+    if missing:
+        annotations_store.bulk_extend(
+            await get_annotations_for_oxigraph(missing, repo, system_repo, languages)
+        )
+    return annotations_store
+
+
+def _terms(triples) -> set[URIRef]:
+    """The IRIs, and datatypes of literals, in the triples."""
+    terms = set()
+    for triple in triples:
+        for term in triple[:3]:
+            if isinstance(term, URIRef):
+                terms.add(term)
+            elif isinstance(term, Literal) and term.datatype:
+                terms.add(term.datatype)
+    return terms
+
+
+def _terms_for_oxigraph(quads) -> set[OxiNamedNode]:
+    """The IRIs, and datatypes of literals, in the quads."""
+    terms: set[OxiNamedNode] = set()
+    for quad in quads:
+        for term in (quad[0], quad[1], quad[2]):
+            if isinstance(term, OxiNamedNode):
+                terms.add(term)
+            elif isinstance(term, OxiLiteral) and term.datatype is not None:
+                terms.add(term.datatype)
+    return terms
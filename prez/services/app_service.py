@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import time
 from pathlib import Path
@@ -21,33 +22,53 @@ from prez.services.query_generation.prefixes import PrefixQuery
 log = logging.getLogger(__name__)
 
 
-async def healthcheck_sparql_endpoints():
-    connected_to_triplestore = False
-    log.info(f"Checking SPARQL endpoint {settings.sparql_endpoint} is online")
-    username = settings.sparql_username
-    password = settings.sparql_password
-    if username or password:
-        auth = (username, password)
-    else:
-        auth = None
-    while not connected_to_triplestore:
+# Seconds before the first retry of an unreachable SPARQL endpoint at startup; each later retry waits twice as long
+HEALTHCHECK_INITIAL_BACKOFF = 0.5
+
+
+async def healthcheck_sparql_endpoints(async_client: httpx.AsyncClient):
+    """
+    Waits for the SPARQL endpoint to answer a query, retrying with exponential backoff (up to
+    SPARQL_STARTUP_BACKOFF_MAX seconds between attempts), each attempt timing out after SPARQL_TIMEOUT seconds. Raises
+    a TimeoutError if it has not answered within SPARQL_STARTUP_TIMEOUT seconds, unless that is 0, in which case it
+    waits indefinitely.
+    """
+    endpoint = settings.sparql_endpoint or settings.sparql_read_endpoints[0]
+    log.info(f"Checking SPARQL endpoint {endpoint} is online")
+    deadline = (
+        time.monotonic() + settings.sparql_startup_timeout
+        if settings.sparql_startup_timeout
+        else None
+    )
+    backoff = HEALTHCHECK_INITIAL_BACKOFF
+    while True:
+        # each attempt may take up to SPARQL_TIMEOUT, but never past the deadline
+        timeout = settings.sparql_timeout
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(
+                    f"SPARQL endpoint {endpoint} did not respond within {settings.sparql_startup_timeout} seconds"
+                )
+            timeout = min(timeout, remaining)
         try:
-            response = httpx.get(
-                settings.sparql_endpoint,
-                auth=auth,
+            response = await async_client.get(
+                endpoint,
                 params={"query": "ASK {}"},
+                timeout=timeout,
             )
             response.raise_for_status()
-            if response.status_code == 200:
-                log.info("Successfully connected to triplestore SPARQL endpoint")
-                connected_to_triplestore = True
+            log.info("Successfully connected to triplestore SPARQL endpoint")
+            return
         except httpx.HTTPError as exc:
             log.error(f"HTTP Exception for {exc.request.url} - {exc}")
-            log.error(
-                f"Failed to connect to triplestore sparql endpoint {settings.sparql_endpoint}"
-            )
-            log.info("retrying in 3 seconds...")
-            time.sleep(3)
+            log.error(f"Failed to connect to triplestore sparql endpoint {endpoint}")
+        wait = min(backoff, settings.sparql_startup_backoff_max)
+        if deadline is not None:
+            wait = max(min(wait, deadline - time.monotonic()), 0)
+        log.info(f"retrying in {wait:.1f} seconds...")
+        await asyncio.sleep(wait)
+        backoff *= 2
 
 
 async def count_objects(repo):
@@ -140,12 +161,11 @@ async def retrieve_jena_fts_shapes(repo: Repo):
 async def add_remote_prefixes(repo: Repo):
     # TODO allow mediatype specification in repo queries
     query = PrefixQuery().to_string()
-    results = await repo.send_queries(rdf_queries=[], tabular_queries=[(None, query)])
+    columns = await repo.query_columns(query)
+    namespace_index, prefix_index = columns.index("namespace"), columns.index("prefix")
     i = 0
-    for i, result in enumerate(results[1][0][1]):
-        namespace = result["namespace"]["value"]
-        prefix = result["prefix"]["value"]
-        prefix_graph.bind(prefix, namespace)
+    for i, row in enumerate(columns.rows):
+        prefix_graph.bind(row[prefix_index], row[namespace_index])
     log.info(f"{i + 1:,} prefixes bound from data repo")
 
 
@@ -159,36 +179,56 @@ async def add_local_prefixes(repo):
         log.info(f"{local_i + 1:,} prefixes bound from file {f.name}")
 
 
+# Groups the distinct subject IRIs by namespace, so one example IRI per namespace is enough to generate its prefix.
+# Only IRIs which rdflib's split_uri and generate_new_prefix both split at their last "/", "#" or ":" are grouped:
+# those whose local name is a plain name, which may start with a digit, after a "/" or "#", or after the last ":" of a
+# URN, with no query string. Each other IRI, for example with a query string, is a group of its own. The data is
+# scanned once, and one row per namespace is returned, rather than one per IRI.
+PREFIX_NAMESPACES_QUERY = """
+    SELECT ?namespace (SAMPLE(?iri) AS ?example)
+    WHERE {
+      {
+        SELECT DISTINCT ?iri
+        WHERE {
+          ?iri ?p ?o .
+          FILTER(isIRI(?iri))
+        }
+      }
+      BIND(
+        IF(
+          REGEX(STR(?iri), "^(urn:[^?#=&/]*:|[^?#=&]*[/#])[A-Za-z0-9_][A-Za-z0-9_.-]*$"),
+          REPLACE(STR(?iri), "[^/#:]*$", ""),
+          STR(?iri)
+        ) AS ?namespace
+      )
+    }
+    GROUP BY ?namespace
+"""
+
+
 async def generate_prefixes(repo: Repo):
+    """
+    Generates prefixes for the namespaces of subject IRIs which do not have one. Rather than fetching every subject
+    IRI, the repository groups those with a plain namespace and local name by namespace and one example IRI per
+    namespace is used, so memory use grows with the number of namespaces rather than the size of the data.
+    """
     if settings.disable_prefix_generation:
         log.info("DISABLE_PREFIX_GENERATION set to true. Skipping prefix generation.")
     else:
-        query = """
-            SELECT DISTINCT ?iri
-            WHERE {
-              ?iri ?p ?o .
-              FILTER(isIRI(?iri))
-            }
-        """
-
-        _, rows = await repo.send_queries([], [(None, query)])
-        iris = [tup["iri"]["value"] for tup in rows[0][1]]
-        len_iris = len(iris)
-        log.info(f"Generating prefixes for {len_iris:,} IRIs.")
-        skipped_count = 0
+        columns = await repo.query_columns(PREFIX_NAMESPACES_QUERY)
+        log.info(f"Generating prefixes for {len(columns):,} namespaces.")
         skipped = []
-        for iri in iris:
+        for namespace, example in columns:
             try:
-                get_curie_id_for_uri(iri)
+                get_curie_id_for_uri(URIRef(example))
             except ValueError:
-                skipped_count += 1
-                skipped.append(iri)
+                skipped.append(namespace)
 
         log.info(
-            f"Generated prefixes for {len(iris):,} IRIs. Skipped {skipped_count:,} IRIs."
+            f"Generated prefixes for {len(columns):,} namespaces. Skipped {len(skipped):,} namespaces."
         )
-        for skipped_iri in skipped:
-            log.info(f"Skipped IRI {skipped_iri}")
+        for skipped_namespace in skipped:
+            log.info(f"Skipped namespace {skipped_namespace}")
 
 
 async def _add_prefixes_from_graph(g):
@@ -0,0 +1,76 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Sequence, TypeVar
+
+from prez.config import settings
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class LookupTimings:
+    """How many chunks each lookup service has queried, and how long they took, by chunk size."""
+
+    def __init__(self):
+        self._timings: dict[tuple[str, int], list[float]] = {}
+
+    def record(self, service: str, chunk_size: int, terms: int, seconds: float):
+        # chunks, terms, total seconds, slowest chunk
+        timing = self._timings.setdefault((service, chunk_size), [0, 0, 0.0, 0.0])
+        timing[0] += 1
+        timing[1] += terms
+        timing[2] += seconds
+        timing[3] = max(timing[3], seconds)
+
+    def stats(self) -> dict[str, list[dict[str, Any]]]:
+        stats: dict[str, list[dict[str, Any]]] = {}
+        for (service, chunk_size), (chunks, terms, seconds, slowest) in sorted(
+            self._timings.items()
+        ):
+            stats.setdefault(service, []).append(
+                {
+                    "chunk_size": chunk_size,
+                    "chunks": chunks,
+                    "terms": terms,
+                    "mean_chunk_seconds": seconds / chunks,
+                    "max_chunk_seconds": slowest,
+                    "mean_term_milliseconds": 1000 * seconds / terms if terms else 0,
+                }
+            )
+        return stats
+
+    def clear(self):
+        self._timings.clear()
+
+
+lookup_timings = LookupTimings()
+
+
+async def run_chunked(
+    service: str,
+    items: Sequence[T],
+    lookup: Callable[[Sequence[T]], Awaitable[R]],
+) -> list[R]:
+    """
+    Runs a lookup over items in chunks of LOOKUP_CHUNK_SIZE, with at most LOOKUP_CONCURRENCY chunks in flight at
+    once, so no single query has to carry every item. Returns the result for each chunk, and records the chunk
+    timings under the service name.
+    """
+    # a chunk size of 0 sends every item in one chunk
+    chunk_size = settings.lookup_chunk_size or len(items) or 1
+    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+    semaphore = asyncio.Semaphore(max(settings.lookup_concurrency, 1))
+
+    async def run(chunk: Sequence[T]) -> R:
+        async with semaphore:
+            start = time.perf_counter()
+            result = await lookup(chunk)
+            lookup_timings.record(
+                service,
+                settings.lookup_chunk_size,
+                len(chunk),
+                time.perf_counter() - start,
+            )
+            return result
+
+    return await asyncio.gather(*(run(chunk) for chunk in chunks))
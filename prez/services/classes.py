@@ -1,8 +1,9 @@
-from aiocache import caches
 from rdflib import URIRef
 from sparql_grammar_pydantic import IRI
 
-from prez.repositories import Repo
+from prez.cache import classes_cache
+from prez.repositories import Columns, Repo
+from prez.services.chunked_lookups import run_chunked
 from prez.services.query_generation.classes import ClassesSelectQuery
 
 
@@ -23,8 +24,7 @@ async def get_classes(uris: list[URIRef], repo: Repo):
         klasses (dict): A dict of URIs and their klasses.
     """
     klasses = {}
-    cache = caches.get("classes")  # This always returns the SAME instance
-    results = await cache.multi_get(uris)
+    results = await classes_cache.multi_get(uris)
     zipped = list(zip(uris, results))
 
     cached = [z for z in zipped if z[1] is not None]
@@ -66,30 +66,28 @@ async def process_uncached_classes(uris: list[URIRef], data_repo: Repo, klasses:
     Returns:
         None
     """
-    klasses_query = ClassesSelectQuery(
-        iris=[IRI(value=uri) for uri in uris]
-    ).to_string()
 
-    repo_results = await data_repo.send_queries(
-        rdf_queries=[], tabular_queries=[(None, klasses_query)]
-    )
+    async def lookup(chunk: list[URIRef]) -> Columns:
+        klasses_query = ClassesSelectQuery(
+            iris=[IRI(value=uri) for uri in chunk]
+        ).to_string()
+        return await data_repo.query_columns(klasses_query)
 
     # Initialize subjects_map with each term having an empty set to start with
     subjects_map = {uri: set() for uri in uris}
 
-    for result in repo_results[1][0][1]:
-        klass = result["class"]["value"]
-        uri = result["uri"]["value"]
-        subjects_map[URIRef(uri)].add(URIRef(klass))
+    for columns in await run_chunked("classes", uris, lookup):
+        uri_index, klass_index = columns.index("uri"), columns.index("class")
+        for row in columns.rows:
+            subjects_map[URIRef(row[uri_index])].add(URIRef(row[klass_index]))
 
     # Prepare subjects_list, only converting to frozenset where there are actual results
     subjects_list = [
-        (subject, set(klasses)) if klasses else (subject, set())
+        (subject, frozenset(klasses)) if klasses else (subject, frozenset())
         for subject, klasses in subjects_map.items()
     ]
 
     # Cache the results
-    cache = caches.get("classes")
-    await cache.multi_set(subjects_list)
+    await classes_cache.multi_set(subjects_list)
 
     return klasses | subjects_map
@@ -1,19 +1,27 @@
 import logging
+import re
 from enum import Enum
 from textwrap import dedent
 
 from pydantic import BaseModel
 from pyoxigraph import RdfFormat
-from rdflib import SH, Graph, Namespace, URIRef
+from rdflib import SH, Literal, Namespace, URIRef
 
 from prez.cache import endpoints_graph_cache, profiles_graph_cache
 from prez.config import settings
 from prez.exceptions.model_exceptions import PrefixNotBoundException
-from prez.repositories.base import Repo
+from prez.reference_data.prez_ns import PREZ
+from prez.repositories.base import Columns, Repo
 from prez.services.curie_functions import get_curie_id_for_uri, get_uri_for_curie_id
 
 log = logging.getLogger(__name__)
 
+# the most languages annotations are requested in, to bound the size of the query and the number of cache entries
+MAX_ANNOTATION_LANGUAGES = 6
+
+# an RFC 4647 basic language range, lowercased, without the wildcard
+LANGUAGE_RANGE = re.compile(r"[a-z]{1,8}(-[a-z0-9]{1,8})*")
+
 # used to reduce the amount of RDF formats "advertised" for OGC Features API links
 MINIMAL_OGC_FEATURES_RDF_FORMATS = ["text/turtle"]
 
@@ -226,15 +234,19 @@ class NegotiatedPMTs(BaseModel):
 
     async def _get_available(self) -> list[dict]:
         query = self._compose_select_query()
-        repo_response = await self._do_query(query)
+        columns = await self._do_query(query)
+        profile, title, mediatype, klass = (
+            columns.index(variable)
+            for variable in ("profile", "title", "format", "class")
+        )
         available = [
             {
-                "profile": URIRef(result["profile"]["value"]),
-                "title": result["title"]["value"],
-                "mediatype": result["format"]["value"],
-                "class": result["class"]["value"],
+                "profile": URIRef(row[profile]),
+                "title": row[title],
+                "mediatype": row[mediatype],
+                "class": row[klass],
             }
-            for result in repo_response[1][0][1]
+            for row in columns.rows
         ]
 
         if not available:
@@ -295,6 +307,24 @@ class NegotiatedPMTs(BaseModel):
                 ]
         return available
 
+    def annotation_languages(self) -> tuple[str, ...] | None:
+        """
+        The languages annotations are returned in, best first: the languages accepted by the Accept-Language header,
+        then the default language. None when annotations are not pruned by language, because ANNOTATION_LANGUAGES
+        is off or the selected profile sets prez:annotationLanguages false.
+        """
+        if (
+            not settings.annotation_languages
+            or (
+                self.selected["profile"],
+                PREZ.annotationLanguages,
+                Literal(False),
+            )
+            in profiles_graph_cache
+        ):
+            return None
+        return parse_accept_language(self.headers.get("accept-language", ""))
+
     def generate_response_headers(self) -> dict:
         profile_uri = "<http://www.w3.org/ns/dx/prof/Profile>"
         distinct_profiles = {(pmt["profile"], pmt["title"]) for pmt in self.available}
@@ -390,26 +420,27 @@ class NegotiatedPMTs(BaseModel):
         )
         return ifs
 
-    async def _do_query(self, query: str) -> tuple[Graph, list]:
-        response = await self.system_repo.send_queries([], [(None, query)])
-        if response[1][0][1] and settings.log_level == "DEBUG":
+    async def _do_query(self, query: str) -> Columns:
+        columns = await self.system_repo.query_columns(query)
+        if columns.rows and settings.log_level == "DEBUG":
             from tabulate import tabulate
 
-            table_data = [
-                [
-                    item["profile"]["value"],
-                    item["title"]["value"],
-                    item["class"]["value"],
-                    item["distance"]["value"],
-                    item["def_profile"]["value"],
-                    item["req_profile"]["value"],
-                    item["format"]["value"],
-                    item["req_format"]["value"],
-                    item["def_format"]["value"],
-                    item["alt_prof"]["value"],
-                ]
-                for item in response[1][0][1]
+            indices = [
+                columns.index(variable)
+                for variable in (
+                    "profile",
+                    "title",
+                    "class",
+                    "distance",
+                    "def_profile",
+                    "req_profile",
+                    "format",
+                    "req_format",
+                    "def_format",
+                    "alt_prof",
+                )
             ]
+            table_data = [[row[i] for i in indices] for row in columns.rows]
 
             # Define headers
             headers = [
@@ -428,4 +459,39 @@ class NegotiatedPMTs(BaseModel):
             # Render as a table
             log.debug(tabulate(table_data, headers=headers, tablefmt="grid"))
 
-        return response
+        return columns
+
+
+def parse_accept_language(header: str) -> tuple[str, ...]:
+    """
+    The lowercased language ranges of an Accept-Language header in order of preference, each followed by its
+    truncations (en-au is followed by en) as in RFC 4647 lookup, then the default language. Wildcards, ranges with
+    q=0, and anything which is not a language range are left out, as the ranges are put into annotation queries and
+    cache keys.
+    """
+    ranges = []
+    for position, part in enumerate(header.split(",")):
+        language, _, params = part.partition(";")
+        language = language.strip().lower()
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    pass
+        if LANGUAGE_RANGE.fullmatch(language) and weight > 0:
+            ranges.append((-weight, position, language))
+    languages = []
+    for _, _, language in sorted(ranges):
+        subtags = language.split("-")
+        for end in range(len(subtags), 0, -1):
+            truncation = "-".join(subtags[:end])
+            if truncation not in languages:
+                languages.append(truncation)
+    languages = languages[:MAX_ANNOTATION_LANGUAGES]
+    default = settings.default_language.lower()
+    if default not in languages:
+        languages = languages[: MAX_ANNOTATION_LANGUAGES - 1] + [default]
+    return tuple(languages)
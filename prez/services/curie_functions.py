@@ -1,10 +1,11 @@
 import logging
 import re
 import string
+from functools import lru_cache
 from urllib.parse import urlparse
 
-from aiocache import caches
 from rdflib import URIRef
+from rdflib.namespace import split_uri
 
 from prez.cache import prefix_graph
 from prez.config import settings
@@ -83,18 +84,101 @@ def generate_new_prefix(uri):
         raise ValueError("Couldn't generate a prefix for the URI")
 
 
-def get_curie_id_for_uri(uri: URIRef) -> str:
+class CurieIndex:
     """
-    This function gets a curie ID for a given URI.
-    The following process is used:
-    1. Check Prez's in memory prefix graph for an existing prefix for the URI's namespace.
-    2. If not found, attempt to generate a "nice" prefix using prez's "generate_new_prefix" function.
-    3. If unable to generate a "nice" prefix, use the "compute_qname" function to generate a prefix in the series ns0,
-    ns1 etc.
+    Looks up CURIEs for IRIs, and IRIs for CURIEs, from the namespaces bound in the prefix graph.
+
+    An IRI's namespace is the longest bound namespace it starts with, no shorter than the namespace rdflib's
+    split_uri gives for it, which is how NamespaceManager.compute_qname chooses one. Bound namespaces are indexed by
+    length, so finding it takes one dictionary lookup per distinct namespace length. IRIs without a bound namespace
+    fall back to generating a prefix, as before, and the new namespace is added to the index. Results are memoised
+    in LRU caches of CURIE_CACHE_SIZE entries each.
+
+    The index is built from the prefix graph the first time it is used. reset() rebuilds it, and must be called
+    after prefixes are bound other than through this index.
     """
-    separator = settings.curie_separator
+
+    def __init__(self):
+        self._namespaces: dict[str, str] | None = None
+        self._prefixes: dict[str, str] = {}
+        self._lengths: list[int] = []
+        self.reset()
+
+    def reset(self):
+        self._namespaces = None
+        self.curie_for_uri = lru_cache(maxsize=settings.curie_cache_size)(
+            self._curie_for_uri
+        )
+        self.uri_for_curie = lru_cache(maxsize=settings.curie_cache_size)(
+            self._uri_for_curie
+        )
+
+    def _build(self):
+        store = prefix_graph.namespace_manager.store
+        namespaces = {}
+        prefixes = {}
+        for prefix, namespace in prefix_graph.namespaces():
+            # where a namespace has several prefixes, rdflib uses the one bound last
+            namespaces[str(namespace)] = store.prefix(namespace)
+            prefixes[prefix] = str(namespace)
+        self._prefixes = prefixes
+        self._lengths = sorted(
+            {len(namespace) for namespace in namespaces}, reverse=True
+        )
+        self._namespaces = namespaces
+
+    def _add(self, prefix: str, namespace: str):
+        self._namespaces[namespace] = prefix
+        self._prefixes[prefix] = namespace
+        if len(namespace) not in self._lengths:
+            self._lengths = sorted(self._lengths + [len(namespace)], reverse=True)
+
+    def _curie_for_uri(self, uri: str) -> str:
+        if self._namespaces is None:
+            self._build()
+        if not any(char in uri for char in _INVALID_URI_CHARS):
+            try:
+                split_namespace, _ = split_uri(uri)
+            except ValueError:
+                pass
+            else:
+                min_length = len(split_namespace)
+                for length in self._lengths:
+                    if length < min_length:
+                        break
+                    if length > len(uri):
+                        continue
+                    prefix = self._namespaces.get(uri[:length])
+                    if prefix is not None:
+                        return f"{prefix}{settings.curie_separator}{uri[length:]}"
+        prefix, namespace, name = _generate_qname(URIRef(uri))
+        self._add(prefix, str(namespace))
+        return f"{prefix}{settings.curie_separator}{name}"
+
+    def _uri_for_curie(self, curie_id: str) -> URIRef:
+        if self._namespaces is None:
+            self._build()
+        curie = curie_id.replace(settings.curie_separator, ":")
+        prefix, _, name = curie.partition(":")
+        namespace = self._prefixes.get(prefix)
+        if namespace is not None:
+            return URIRef(f"{namespace}{name}")
+        try:
+            uri = prefix_graph.namespace_manager.expand_curie(curie)
+        except ValueError:
+            raise PrefixNotBoundException(prefix=prefix)
+        # bound since the index was built
+        self._prefixes[prefix] = uri[: len(uri) - len(name)]
+        return uri
+
+
+# Characters which make rdflib refuse to compute a qname, as in rdflib.term
+_INVALID_URI_CHARS = '<>" {}|\\^`'
+
+
+def _generate_qname(uri: URIRef) -> tuple[str, URIRef, str]:
     try:
-        qname = prefix_graph.compute_qname(uri, generate=False)
+        return prefix_graph.compute_qname(uri, generate=False)
     except Exception:
         try:
             generate_new_prefix(
@@ -102,24 +186,26 @@ def get_curie_id_for_uri(uri: URIRef) -> str:
             )  # this will mostly succeed in generating new prefixes.
         except ValueError:
             pass  # generation failed; function below will generate namespaces in the series ns0, ns1 etc.
-        qname = prefix_graph.compute_qname(uri, generate=True)
-    return f"{qname[0]}{separator}{qname[2]}"
+        return prefix_graph.compute_qname(uri, generate=True)
+
+
+curie_index = CurieIndex()
+
+
+def get_curie_id_for_uri(uri: URIRef) -> str:
+    """
+    This function gets a curie ID for a given URI.
+    The following process is used:
+    1. Check Prez's in memory prefix graph for an existing prefix for the URI's namespace.
+    2. If not found, attempt to generate a "nice" prefix using prez's "generate_new_prefix" function.
+    3. If unable to generate a "nice" prefix, use the "compute_qname" function to generate a prefix in the series ns0,
+    ns1 etc.
+    """
+    return curie_index.curie_for_uri(str(uri))
 
 
 async def get_uri_for_curie_id(curie_id: str):
     """
     Returns a URI for a given CURIE id with the specified separator
     """
-    curie_cache = caches.get("curies")
-    result = await curie_cache.get(curie_id)
-    if result:
-        return result
-    else:
-        separator = settings.curie_separator
-        curie = curie_id.replace(separator, ":")
-        try:
-            uri = prefix_graph.namespace_manager.expand_curie(curie)
-        except ValueError:
-            raise PrefixNotBoundException(prefix=curie.split(":")[0])
-        await curie_cache.set(curie_id, uri)
-        return uri
+    return curie_index.uri_for_curie(curie_id)
@@ -133,6 +133,7 @@ async def listing_profiles(
         data_repo,
         system_repo,
         query_params,
+        languages=pmts.annotation_languages(),
     )
     return response
 
@@ -379,6 +380,7 @@ async def listing_function(
         system_repo,
         query_params,
         url,
+        languages=pmts.annotation_languages(),
     )
 
 
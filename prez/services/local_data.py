@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+from pyoxigraph import DefaultGraph, RdfFormat, Store, parse, serialize
+
+from prez.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+# Files within the shared store directory: the lock serialising builds, and the JSON record of the current complete store
+SHARED_STORE_LOCK = "build.lock"
+SHARED_STORE_CURRENT = "current"
+
+
+def local_data_dir() -> Path:
+    """The directory the pyoxigraph_memory and pyoxigraph_shared repository types load Turtle files from."""
+    return Path(__file__).parent.parent.parent / settings.pyoxigraph_data_dir
+
+
+def local_data_files(data_dir: Path) -> list[Path]:
+    return sorted(data_dir.glob("**/*.ttl"))
+
+
+def data_fingerprint(data_dir: Path, files: list[Path]) -> str:
+    """
+    Returns a fingerprint of the local data files: a hash of their paths, sizes and modification times. Computing it
+    only needs a stat of each file, so it is cheap however much data there is.
+    """
+    digest = hashlib.sha256()
+    for file in files:
+        stat = file.stat()
+        digest.update(
+            f"{file.relative_to(data_dir)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode()
+        )
+    return digest.hexdigest()
+
+
+def load_local_data(store: Store, data_dir: Path, files: list[Path], workers: int):
+    """
+    Loads Turtle files into a store. The files are parsed in parallel by a pool of worker processes, each converting
+    a file to N-Quads in a temporary directory, and each converted file is bulk loaded as soon as it is ready, so
+    loading overlaps with the parsing of the remaining files.
+    """
+    if workers <= 1 or len(files) <= 1:
+        default = DefaultGraph()
+        for file in files:
+            try:
+                store.bulk_load(
+                    None, RdfFormat.TURTLE, path=str(file), to_graph=default
+                )
+            except Exception as e:
+                raise SyntaxError(f"Error parsing file {file}: {e}")
+        return
+    log.info(f"Loading {len(files):,} files from {data_dir} with {workers} processes")
+    # spawn rather than fork: the loading process runs threads, which a forked child would inherit in any state
+    with tempfile.TemporaryDirectory() as tmp_dir, ProcessPoolExecutor(
+        max_workers=min(workers, len(files)),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as pool:
+        futures = [
+            pool.submit(_turtle_to_nquads, file, Path(tmp_dir)) for file in files
+        ]
+        try:
+            for future in as_completed(futures):
+                nquads = future.result()
+                store.bulk_load(None, RdfFormat.N_QUADS, path=str(nquads))
+                nquads.unlink()
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def _turtle_to_nquads(file: Path, out_dir: Path) -> Path:
+    out = out_dir / f"{uuid.uuid4().hex}.nq"
+    try:
+        # blank nodes are renamed, as bulk_load does, so the same label in different files is not the same node
+        quads = parse(path=str(file), format=RdfFormat.TURTLE, rename_blank_nodes=True)
+        serialize(quads, str(out), RdfFormat.N_QUADS)
+    except Exception as e:
+        raise SyntaxError(f"Error parsing file {file}: {e}")
+    return out
+
+
+@contextmanager
+def _exclusive_lock(path: Path) -> Iterator[None]:
+    with open(path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def open_shared_store(
+    shared_dir: Path, load: Callable[[Store], None], fingerprint: str = ""
+) -> Store:
+    """
+    Opens a read-only pyoxigraph store that every worker process shares, building it first unless a store built from
+    data with the same fingerprint already exists.
+
+    The first worker to take the build lock creates the store in a new subdirectory of shared_dir, loads it with
+    load, and then records it as the current store; workers waiting on the lock find it built and open it
+    read-only, so the data is loaded and held on disk once whatever the number of workers, and a restart with
+    unchanged data opens the existing store in seconds. A build that fails part way is discarded, so the next start
+    builds again. load must not keep a reference to the store it is given, which has to be closed before it can be
+    opened read-only.
+    """
+    if fcntl is None:
+        raise RuntimeError(
+            "The pyoxigraph_shared repository type needs file locking (fcntl), which is not available on this platform"
+        )
+    shared_dir.mkdir(parents=True, exist_ok=True)
+    current = shared_dir / SHARED_STORE_CURRENT
+    with _exclusive_lock(shared_dir / SHARED_STORE_LOCK):
+        published = json.loads(current.read_text()) if current.exists() else None
+        if published is None or published["fingerprint"] != fingerprint:
+            if published is not None:
+                log.info(
+                    "Local data has changed since the shared pyoxigraph store was built"
+                )
+            store_dir = shared_dir / f"store-{uuid.uuid4().hex}"
+            log.info(f"Building shared pyoxigraph store {store_dir}")
+            try:
+                store = Store(path=str(store_dir))
+                load(store)
+                store.flush()
+                del store
+            except BaseException:
+                shutil.rmtree(store_dir, ignore_errors=True)
+                raise
+            # publish the store atomically, then remove older stores and builds left by a worker killed mid-build.
+            # The store being replaced is kept, as workers started before the data changed may still have it open.
+            tmp = current.with_suffix(".tmp")
+            tmp.write_text(
+                json.dumps({"store": store_dir.name, "fingerprint": fingerprint})
+            )
+            os.replace(tmp, current)
+            keep = {store_dir.name, published["store"] if published else None}
+            for stale in shared_dir.glob("store-*"):
+                if stale.name not in keep:
+                    shutil.rmtree(stale, ignore_errors=True)
+            published = {"store": store_dir.name, "fingerprint": fingerprint}
+        store_dir = shared_dir / published["store"]
+    log.info(f"Using shared read-only pyoxigraph store {store_dir}")
+    return Store.read_only(str(store_dir))
@@ -0,0 +1,93 @@
+import sys
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Iterator
+
+
+class LRUMemoryCache:
+    """
+    An in-process LRU cache, bounded by both its number of entries and the estimated size of its keys and values.
+    Values are stored as they are, not serialised, so they must not be mutated once cached. It has the multi_get,
+    multi_set and clear coroutines of the aiocache caches it replaces, and counts hits, misses and evictions.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, key: Hashable, default: Any = None) -> Any:
+        return self._get(key, default)
+
+    async def multi_get(self, keys: Iterable[Hashable]) -> list[Any]:
+        return [self._get(key, None) for key in keys]
+
+    async def set(self, key: Hashable, value: Any):
+        self._set(key, value)
+
+    async def multi_set(self, pairs: Iterable[tuple[Hashable, Any]]):
+        for key, value in pairs:
+            self._set(key, value)
+
+    async def clear(self) -> bool:
+        self._entries.clear()
+        self._size = 0
+        return True
+
+    def items(self) -> Iterator[tuple[Hashable, Any]]:
+        """Iterates over the cached keys and values, without counting as hits or changing the eviction order."""
+        for key, (value, _) in list(self._entries.items()):
+            yield key, value
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _get(self, key: Hashable, default: Any) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def _set(self, key: Hashable, value: Any):
+        size = estimate_size(key) + estimate_size(value)
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= old[1]
+        self._entries[key] = (value, size)
+        self._size += size
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+            self.evictions += 1
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimates the memory used by a value in bytes, including the strings and containers it holds. Objects shared
+    with other values, such as interned strings, are counted each time, so this errs on the high side.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    return size
@@ -180,6 +180,7 @@ async def object_function(
         data_repo,
         system_repo,
         url=url,
+        languages=pmts.annotation_languages(),
     )
 
 
@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import List
+from typing import List, Tuple
 
 from sparql_grammar_pydantic import (
     IRI,
@@ -51,9 +51,14 @@ class AnnotationsConstructQuery(ConstructQuery):
       }?term ?prop ?annotation
       FILTER (LANG(?annotation) IN ("en", "") || isURI(?annotation))
     }
+
+    When languages are given, the language filter instead admits annotations in any of them, or in none:
+
+      FILTER (LANG(?annotation) IN ("") || LANGMATCHES(LANG(?annotation), "fr") || LANGMATCHES(LANG(?annotation), "en")
+        || isURI(?annotation))
     """
 
-    def __init__(self, terms: List[IRI]):
+    def __init__(self, terms: List[IRI], languages: Tuple[str, ...] | None = None):
         # create terms VALUES clause
         # e.g. VALUES ?term { ... }
         term_var = Var(value="term")
@@ -107,16 +112,41 @@ class AnnotationsConstructQuery(ConstructQuery):
                             ),
                             operator="IN",
                             right_primary_expressions=[
+                                PrimaryExpression(content=RDFLiteral(value=language))
+                                for language in (
+                                    ("",)
+                                    if languages
+                                    else (settings.default_language, "")
+                                )
+                            ],
+                        )
+                    )
+                )
+            )
+        )
+        or_expressions = (
+            lang_filter_gpnt.content.constraint.content.expression.conditional_or_expression.conditional_and_expressions
+        )
+        # || LANGMATCHES(LANG(?annotation), "fr") ...
+        for language in languages or ():
+            or_expressions.append(
+                Expression.from_primary_expression(
+                    primary_expression=PrimaryExpression(
+                        content=BuiltInCall.create_with_n_expr(
+                            function_name="LANGMATCHES",
+                            expressions=[
                                 PrimaryExpression(
-                                    content=RDFLiteral(value=settings.default_language)
+                                    content=BuiltInCall.create_with_one_expr(
+                                        function_name="LANG",
+                                        expression=PrimaryExpression(content=anot_var),
+                                    )
                                 ),
-                                PrimaryExpression(content=RDFLiteral(value="")),
+                                PrimaryExpression(content=RDFLiteral(value=language)),
                             ],
                         )
                     )
                 )
             )
-        )
         # || isURI(?annotation)
         isuri_expr = Expression.from_primary_expression(
             primary_expression=PrimaryExpression(
@@ -126,9 +156,7 @@ class AnnotationsConstructQuery(ConstructQuery):
                 )
             )
         )
-        lang_filter_gpnt.content.constraint.content.expression.conditional_or_expression.conditional_and_expressions.append(
-            isuri_expr
-        )
+        or_expressions.append(isuri_expr)
 
         # create the main query components - construct and where clauses
         construct_template = ConstructTemplate(
@@ -197,3 +225,16 @@ class AnnotationsConstructQuery(ConstructQuery):
             + other_tuples
         )
         return all_tuples
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_annotation_predicates_values() -> str:
+        """The distinct annotation predicates, as the body of a SPARQL VALUES clause."""
+        return " ".join(
+            sorted(
+                {
+                    f"<{prop}>"
+                    for prop, _ in AnnotationsConstructQuery.get_prez_annotation_tuples()
+                }
+            )
+        )
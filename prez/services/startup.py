@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+log = logging.getLogger(__name__)
+
+
+class StartupStep:
+    """A startup job, and the names of the steps whose results it needs and so must finish before it starts."""
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[], Awaitable[None]],
+        after: tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.run = run
+        self.after = after
+
+
+async def run_startup_steps(steps: list[StartupStep]) -> dict[str, float]:
+    """
+    Runs startup steps concurrently, each starting as soon as the steps it depends on have finished, so startup takes
+    as long as the slowest chain of dependent steps rather than the sum of all of them. Logs and returns how long each
+    step took. If a step fails, the steps still running are cancelled and the error is raised.
+    """
+    by_name = {step.name: step for step in steps}
+    for step in steps:
+        for dependency in step.after:
+            if dependency not in by_name:
+                raise ValueError(
+                    f"Startup step {step.name!r} depends on unknown step {dependency!r}"
+                )
+    timings: dict[str, float] = {}
+    tasks: dict[str, asyncio.Task] = {}
+
+    async def run(step: StartupStep):
+        await asyncio.gather(*(tasks[dependency] for dependency in step.after))
+        start = time.perf_counter()
+        await step.run()
+        timings[step.name] = time.perf_counter() - start
+        log.info(f"Startup step {step.name} took {timings[step.name]:.2f}s")
+
+    # tasks are created in dependency order, so every dependency's task exists before its dependents'
+    for step in _ordered(steps, by_name):
+        tasks[step.name] = asyncio.create_task(run(step), name=step.name)
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+    log.info(
+        f"Startup steps took {time.perf_counter() - start:.2f}s, "
+        f"{sum(timings.values()):.2f}s if run one after another"
+    )
+    return timings
+
+
+def _ordered(
+    steps: list[StartupStep], by_name: dict[str, StartupStep]
+) -> list[StartupStep]:
+    ordered: list[StartupStep] = []
+    visiting: set[str] = set()
+    done: set[str] = set()
+
+    def visit(step: StartupStep):
+        if step.name in done:
+            return
+        if step.name in visiting:
+            raise ValueError(
+                f"Startup steps depend on each other in a cycle at {step.name!r}"
+            )
+        visiting.add(step.name)
+        for dependency in step.after:
+            visit(by_name[dependency])
+        visiting.remove(step.name)
+        done.add(step.name)
+        ordered.append(step)
+
+    for step in steps:
+        visit(step)
+    return ordered
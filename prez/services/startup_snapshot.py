@@ -0,0 +1,167 @@
+import hashlib
+import logging
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+from pyoxigraph import RdfFormat
+from rdflib import ConjunctiveGraph, Graph
+
+from prez.cache import (
+    counts_graph,
+    endpoints_graph_cache,
+    prefix_graph,
+    prez_system_graph,
+    profiles_graph_cache,
+    queryable_props,
+    system_store,
+)
+from prez.config import get_reference_data_dir, settings
+from prez.repositories import RemoteSparqlRepo, Repo
+from prez.services.local_data import data_fingerprint, local_data_dir, local_data_files
+
+log = logging.getLogger(__name__)
+
+# Incremented whenever the contents of a snapshot change, so snapshots written by other versions are not loaded
+SNAPSHOT_VERSION = 1
+SNAPSHOT_FILE = "startup-snapshot.pickle"
+
+
+def snapshot_path() -> Path | None:
+    if not settings.startup_snapshot_dir:
+        return None
+    return Path(settings.startup_snapshot_dir) / SNAPSHOT_FILE
+
+
+async def startup_fingerprint(repo: Repo) -> str | None:
+    """
+    Returns a fingerprint of everything Prez's startup caches are built from: the Prez version and settings, the
+    reference data, and the data itself. The data is identified by a fingerprint of the local data files for the
+    pyoxigraph_memory and pyoxigraph_shared repository types, and by the result of SPARQL_DATA_VERSION_QUERY for a
+    remote repository. Returns None if the data cannot be identified, including when the data version query fails, in
+    which case no snapshot is used.
+    """
+    if settings.sparql_repo_type in ("pyoxigraph_memory", "pyoxigraph_shared"):
+        data_dir = local_data_dir()
+        data_version = data_fingerprint(data_dir, local_data_files(data_dir))
+    elif isinstance(repo, RemoteSparqlRepo) and settings.sparql_data_version_query:
+        try:
+            data_version = repr(await repo.probe_data_version())
+        except (httpx.HTTPError, ValueError, KeyError, AttributeError) as e:
+            log.warning(f"Startup snapshot not used: data version query failed: {e}")
+            return None
+    else:
+        log.info(
+            "Startup snapshot not used: SPARQL_DATA_VERSION_QUERY is needed to tell when the data has changed"
+        )
+        return None
+    reference_data_dir = get_reference_data_dir()
+    reference_data_version = data_fingerprint(
+        reference_data_dir,
+        sorted(p for p in reference_data_dir.rglob("*") if p.is_file()),
+    )
+    digest = hashlib.sha256()
+    for part in (
+        str(SNAPSHOT_VERSION),
+        settings.model_dump_json(),
+        reference_data_version,
+        data_version,
+    ):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def load_snapshot(path: Path, fingerprint: str) -> bool:
+    """
+    Restores the startup caches from a snapshot, if there is one built from data with the given fingerprint. Returns
+    whether the caches were restored.
+    """
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        log.warning(f"Startup snapshot {path} could not be read, ignoring it: {e}")
+        return False
+    if (
+        snapshot.get("version") != SNAPSHOT_VERSION
+        or snapshot.get("fingerprint") != fingerprint
+    ):
+        log.info(f"Startup snapshot {path} is out of date")
+        return False
+    start = time.perf_counter()
+    data = snapshot["data"]
+    for prefix, namespace in data["prefixes"]:
+        prefix_graph.bind(prefix, namespace)
+    _restore_graph(profiles_graph_cache, data["profiles"])
+    _restore_graph(endpoints_graph_cache, data["endpoints"])
+    _restore_graph(prez_system_graph, data["system"])
+    _restore_graph(counts_graph, data["counts"])
+    queryable_props.update(data["queryable_props"])
+    system_store.load(data["system_store"], RdfFormat.N_QUADS)
+    log.info(
+        f"Startup caches restored from snapshot {path} in {time.perf_counter() - start:.2f}s"
+    )
+    return True
+
+
+def save_snapshot(path: Path, fingerprint: str):
+    """Writes the startup caches to a snapshot, replacing any previous one atomically."""
+    data = {
+        "prefixes": [
+            (prefix, str(namespace)) for prefix, namespace in prefix_graph.namespaces()
+        ],
+        "profiles": _graph_state(profiles_graph_cache),
+        "endpoints": _graph_state(endpoints_graph_cache),
+        "system": _graph_state(prez_system_graph),
+        "counts": _graph_state(counts_graph),
+        "queryable_props": dict(queryable_props),
+        "system_store": system_store.dump(format=RdfFormat.N_QUADS),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(
+            {"version": SNAPSHOT_VERSION, "fingerprint": fingerprint, "data": data},
+            f,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    os.replace(tmp, path)
+    log.info(f"Startup snapshot written to {path}")
+
+
+def remove_snapshot(path: Path) -> bool:
+    """Removes the snapshot, so the next start rebuilds the caches. Returns whether there was one."""
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _graph_state(graph: Graph) -> dict[str, Any]:
+    if isinstance(graph, ConjunctiveGraph):
+        # endpoint definitions are kept in the named graphs of the files they were loaded from
+        triples = [(s, p, o, c.identifier) for s, p, o, c in graph.quads()]
+    else:
+        triples = list(graph)
+    return {
+        "namespaces": [
+            (prefix, str(namespace)) for prefix, namespace in graph.namespaces()
+        ],
+        "triples": triples,
+    }
+
+
+def _restore_graph(graph: Graph, state: dict[str, Any]):
+    for prefix, namespace in state["namespaces"]:
+        graph.bind(prefix, namespace)
+    if isinstance(graph, ConjunctiveGraph):
+        graph.addN((s, p, o, graph.get_context(c)) for s, p, o, c in state["triples"])
+    else:
+        graph.addN((s, p, o, graph) for s, p, o in state["triples"])
@@ -1,4 +1,6 @@
+import asyncio
 import os
+from unittest.mock import patch
 
 from rdflib import Graph, URIRef
 from starlette.routing import Mount
@@ -17,10 +19,40 @@ from fastapi.testclient import TestClient
 from pyoxigraph.pyoxigraph import Store, RdfFormat
 
 from prez.app import assemble_app
+from prez.cache import annotations_cache
 from prez.dependencies import get_data_repo
 from prez.repositories import PyoxigraphRepo, Repo
 
 
+class CountingRepo(PyoxigraphRepo):
+    """A pyoxigraph repo which counts the calls to send_queries, to tell how many lookups reached it."""
+
+    def __init__(self, store: Store):
+        super().__init__(store)
+        self.calls = 0
+
+    async def send_queries(self, *args, **kwargs):
+        self.calls += 1
+        return await super().send_queries(*args, **kwargs)
+
+
+@pytest.fixture
+def annotations_repo() -> CountingRepo:
+    """
+    An empty annotations repository which annotation lookups use in place of Prez's own, with the annotations cache
+    cleared before and after the test.
+    """
+    repo = CountingRepo(Store())
+
+    async def get_annotations_repo():
+        return repo
+
+    asyncio.run(annotations_cache.clear())
+    with patch("prez.services.annotations.get_annotations_repo", get_annotations_repo):
+        yield repo
+    asyncio.run(annotations_cache.clear())
+
+
 @pytest.fixture(scope="session")
 def test_store() -> Store:
     # Create a new pyoxigraph Store
@@ -0,0 +1,96 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from pyoxigraph import NamedNode, RdfFormat, Store
+
+from prez.config import settings
+from prez.reference_data.prez_ns import PREZ
+from prez.repositories import PyoxigraphRepo
+from prez.services.annotation_filter import (
+    AnnotationFilter,
+    BloomFilter,
+    annotation_filter,
+)
+from prez.services.annotations import get_annotations_for_oxigraph
+from tests.conftest import CountingRepo
+
+DATA = b"""
+PREFIX ex: <http://example.com/>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+ex:thing rdfs:label "Thing" ; ex:p ex:other .
+"""
+
+ANNOTATIONS = b"""
+PREFIX ex: <http://example.com/>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+ex:p rdfs:label "P" .
+"""
+
+
+def store_with(data: bytes) -> Store:
+    store = Store()
+    store.load(data, RdfFormat.TURTLE)
+    return store
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    for i in range(1000):
+        bloom.add(f"http://example.com/{i}")
+    assert all(f"http://example.com/{i}" in bloom for i in range(1000))
+    false_positives = sum(f"http://example.org/{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+    assert 0 < bloom.false_positive_rate() < 0.03
+
+
+@pytest.fixture
+def repos(annotations_repo):
+    annotations_store = annotations_repo.pyoxi_store
+    annotations_store.load(ANNOTATIONS, RdfFormat.TURTLE)
+    data_repo = CountingRepo(store_with(DATA))
+    with patch.object(settings, "annotation_filter_enabled", True), patch.object(
+        settings, "annotation_filter_data_repo", True
+    ), patch.object(settings, "lookup_chunk_size", 0):
+        asyncio.run(annotation_filter.build(data_repo, annotations_store, Store()))
+        yield data_repo, annotations_repo
+    annotation_filter.__init__()
+
+
+@pytest.mark.asyncio
+async def test_lookups_skip_terms_without_annotations(repos):
+    data_repo, annotations_repo = repos
+    other = NamedNode("http://example.com/other")
+    store = await get_annotations_for_oxigraph(
+        {other}, data_repo, PyoxigraphRepo(Store())
+    )
+    assert len(store) == 0
+    assert data_repo.calls == annotations_repo.calls == 0
+    assert annotation_filter.stats()["skipped"] == 1
+
+    # each term is only looked up in the repositories which may annotate it
+    thing = NamedNode("http://example.com/thing")
+    p = NamedNode("http://example.com/p")
+    store = await get_annotations_for_oxigraph(
+        {thing, p}, data_repo, PyoxigraphRepo(Store())
+    )
+    assert len(list(store.quads_for_pattern(thing, NamedNode(PREZ.label), None))) == 1
+    assert len(list(store.quads_for_pattern(p, NamedNode(PREZ.label), None))) == 1
+    assert data_repo.calls == annotations_repo.calls == 1
+
+
+def test_unbuilt_filter_lets_every_term_through():
+    assert AnnotationFilter().may_have_annotations("http://example.com/anything")
+
+
+@pytest.mark.asyncio
+async def test_failed_build_leaves_filters_unbuilt():
+    class FailingRepo(PyoxigraphRepo):
+        async def query_columns(self, query):
+            raise ValueError("endpoint unavailable")
+
+    bloom_filter = AnnotationFilter()
+    with patch.object(settings, "annotation_filter_data_repo", True):
+        await bloom_filter.build(FailingRepo(Store()), store_with(ANNOTATIONS), Store())
+    assert bloom_filter.local is bloom_filter.data is None
+    assert bloom_filter.may_have_annotations("http://example.com/anything")
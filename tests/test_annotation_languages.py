@@ -0,0 +1,155 @@
+from unittest.mock import patch
+
+import pytest
+from pyoxigraph import NamedNode, RdfFormat, Store
+from rdflib import XSD, Literal, URIRef
+from sparql_grammar_pydantic import IRI
+
+from prez.cache import annotations_cache, profiles_graph_cache
+from prez.config import settings
+from prez.reference_data.prez_ns import PREZ
+from prez.repositories import PyoxigraphRepo
+from prez.services.annotations import get_annotations_for_oxigraph, prune_languages
+from prez.services.query_generation.annotations import AnnotationsConstructQuery
+from prez.services.connegp_service import NegotiatedPMTs, parse_accept_language
+
+DATA = b"""
+PREFIX ex: <http://example.com/>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
+ex:thing rdfs:label "Thing"@en , "Chose"@fr , "Ding"@de , "thing" ;
+    skos:definition "A thing"@en .
+ex:other rdfs:label "Other" , "Autre"@fr-ca .
+"""
+
+
+@pytest.fixture
+def repos(annotations_repo):
+    store = Store()
+    store.load(DATA, RdfFormat.TURTLE)
+    return PyoxigraphRepo(store), PyoxigraphRepo(Store())
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ["", ("en",)],
+        ["fr-CA, fr;q=0.9, en;q=0.8, de;q=0.7", ("fr-ca", "fr", "en", "de")],
+        ["de;q=0.5, fr", ("fr", "de", "en")],
+        ["*, de;q=0", ("en",)],
+        # anything else is dropped, so it can never reach a query
+        ['fr") || true || ("x, de', ("de", "en")],
+        ["en_AU, " + "x" * 9 + ", zh-hant-tw", ("zh-hant-tw", "zh-hant", "zh", "en")],
+    ],
+)
+def test_parse_accept_language(header, expected):
+    assert parse_accept_language(header) == expected
+
+
+def test_hostile_header_does_not_reach_the_query():
+    languages = parse_accept_language('fr") || true || ("x')
+    query = AnnotationsConstructQuery(
+        terms=[IRI(value="http://example.com/thing")], languages=languages
+    ).to_string()
+    assert languages == ("en",)
+    assert "true" not in query
+
+
+def test_prune_languages_keeps_the_best_match_per_predicate():
+    pairs = {
+        (PREZ.label, Literal("Thing", lang="en")),
+        (PREZ.label, Literal("Chose", lang="fr-CA")),
+        (PREZ.label, Literal("thing")),
+        (PREZ.description, Literal("A thing", lang="en")),
+        (PREZ.provenance, URIRef("http://example.com/source")),
+    }
+    assert prune_languages(pairs, ("fr", "en")) == {
+        (PREZ.label, Literal("Chose", lang="fr-CA")),
+        (PREZ.description, Literal("A thing", lang="en")),
+        (PREZ.provenance, URIRef("http://example.com/source")),
+    }
+
+
+@pytest.mark.asyncio
+async def test_annotations_are_pruned_and_cached_per_language(repos):
+    data_repo, system_repo = repos
+    thing = NamedNode("http://example.com/thing")
+    other = NamedNode("http://example.com/other")
+    label = NamedNode(PREZ.label)
+
+    store = await get_annotations_for_oxigraph(
+        {thing, other}, data_repo, system_repo, ("fr", "en")
+    )
+    assert {q.object.value for q in store.quads_for_pattern(thing, label, None)} == {
+        "Chose"
+    }
+    assert {q.object.value for q in store.quads_for_pattern(other, label, None)} == {
+        "Autre"
+    }
+    assert (
+        len(list(store.quads_for_pattern(thing, NamedNode(PREZ.description), None)))
+        == 1
+    )
+
+    # the unpruned annotations are cached apart from the pruned ones
+    store = await get_annotations_for_oxigraph({thing}, data_repo, system_repo)
+    assert {q.object.value for q in store.quads_for_pattern(thing, label, None)} == {
+        "Thing",
+        "thing",
+    }
+    # the candidates for the languages are cached, and pruned when read
+    assert await annotations_cache.get((URIRef(thing.value), ("en", "fr"))) == {
+        (PREZ.label, Literal("Thing", lang="en")),
+        (PREZ.label, Literal("Chose", lang="fr")),
+        (PREZ.label, Literal("thing", datatype=XSD.string)),
+        (PREZ.description, Literal("A thing", lang="en")),
+    }
+
+
+@pytest.mark.asyncio
+async def test_regional_variants_share_cached_annotations(repos):
+    data_repo, system_repo = repos
+    other = NamedNode("http://example.com/other")
+    label = NamedNode(PREZ.label)
+    queries = []
+    send_queries = data_repo.send_queries
+
+    async def record(*args, **kwargs):
+        queries.append(args)
+        return await send_queries(*args, **kwargs)
+
+    with patch.object(data_repo, "send_queries", record):
+        for header, expected in [
+            ("fr-CA, fr", "Autre"),
+            ("fr-FR, fr", "Autre"),
+            ("fr", "Autre"),
+            ("en", "Other"),
+        ]:
+            store = await get_annotations_for_oxigraph(
+                {other}, data_repo, system_repo, parse_accept_language(header)
+            )
+            assert {
+                q.object.value for q in store.quads_for_pattern(other, label, None)
+            } == {expected}
+    # "fr" and its regional variants are answered from one cached lookup, and "en" from another
+    assert len(queries) == 2
+
+
+def test_profiles_can_opt_out():
+    profile = URIRef("http://example.com/profile")
+    pmts = NegotiatedPMTs(
+        headers={"accept-language": "fr"},
+        params={},
+        classes=[],
+        system_repo=PyoxigraphRepo(Store()),
+        selected={"profile": profile},
+    )
+    assert pmts.annotation_languages() is None
+    with patch.object(settings, "annotation_languages", True):
+        assert pmts.annotation_languages() == ("fr", "en")
+        triple = (profile, PREZ.annotationLanguages, Literal(False))
+        profiles_graph_cache.add(triple)
+        try:
+            assert pmts.annotation_languages() is None
+        finally:
+            profiles_graph_cache.remove(triple)
@@ -0,0 +1,75 @@
+import pytest
+from pyoxigraph import NamedNode, RdfFormat, Store
+
+from prez.cache import annotations_cache, preloaded_annotation_terms
+from prez.reference_data.prez_ns import PREZ
+from prez.repositories import PyoxigraphRepo
+from prez.services.annotations import (
+    get_annotations_for_oxigraph,
+    preload_annotations,
+)
+from tests.conftest import CountingRepo
+
+DATA = b"""
+PREFIX ex: <http://example.com/>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+ex:thing a ex:Class ; ex:p ex:other ; ex:q ex:other ; rdfs:label "Thing" .
+ex:Class rdfs:label "Class" .
+ex:p rdfs:label "P" ; rdfs:label "P (fr)"@fr .
+ex:q rdfs:label "Q"@en-AU .
+"""
+
+
+@pytest.fixture
+def annotations_store(annotations_repo):
+    yield annotations_repo.pyoxi_store
+    preloaded_annotation_terms.clear()
+
+
+@pytest.mark.asyncio
+async def test_preloaded_annotations_are_looked_up_locally(annotations_store):
+    data_store = Store()
+    data_store.load(DATA, RdfFormat.TURTLE)
+    data_repo = CountingRepo(data_store)
+    await preload_annotations(data_repo, annotations_store, PyoxigraphRepo(Store()))
+
+    # the annotations are copied as they are in the data, in every language
+    p = NamedNode("http://example.com/p")
+    assert len(list(annotations_store.quads_for_pattern(p, None, None))) == 2
+    assert len(annotations_cache) >= 3
+
+    await annotations_cache.clear()
+    calls = data_repo.calls
+    store = await get_annotations_for_oxigraph(
+        {p, NamedNode("http://example.com/Class")},
+        data_repo,
+        PyoxigraphRepo(Store()),
+    )
+    assert data_repo.calls == calls
+    assert len(list(store.quads_for_pattern(p, NamedNode(PREZ.label), None))) == 1
+
+    # terms which were not preloaded are still looked up in the data repository
+    await get_annotations_for_oxigraph(
+        {NamedNode("http://example.com/thing")}, data_repo, PyoxigraphRepo(Store())
+    )
+    assert data_repo.calls == calls + 1
+
+
+@pytest.mark.asyncio
+async def test_preloaded_annotations_are_pruned_locally(annotations_store):
+    data_store = Store()
+    data_store.load(DATA, RdfFormat.TURTLE)
+    data_repo = CountingRepo(data_store)
+    await preload_annotations(data_repo, annotations_store, PyoxigraphRepo(Store()))
+
+    # "en" also matches the preloaded "en-AU" label
+    q = NamedNode("http://example.com/q")
+    calls = data_repo.calls
+    store = await get_annotations_for_oxigraph(
+        {q}, data_repo, PyoxigraphRepo(Store()), ("en",)
+    )
+    assert data_repo.calls == calls
+    assert {
+        quad.object.value
+        for quad in store.quads_for_pattern(q, NamedNode(PREZ.label), None)
+    } == {"Q"}
@@ -0,0 +1,48 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from prez.config import settings
+from prez.services.chunked_lookups import lookup_timings, run_chunked
+
+
+@pytest.fixture(autouse=True)
+def timings():
+    lookup_timings.clear()
+    yield
+    lookup_timings.clear()
+
+
+@pytest.mark.asyncio
+async def test_chunks_run_with_bounded_concurrency():
+    in_flight = 0
+    max_in_flight = 0
+
+    async def lookup(chunk):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return list(chunk)
+
+    with patch.object(settings, "lookup_chunk_size", 3), patch.object(
+        settings, "lookup_concurrency", 2
+    ):
+        results = await run_chunked("test", list(range(10)), lookup)
+    assert results == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+    assert max_in_flight == 2
+    [timing] = lookup_timings.stats()["test"]
+    assert timing["chunk_size"] == 3
+    assert timing["chunks"] == 4
+    assert timing["terms"] == 10
+
+
+@pytest.mark.asyncio
+async def test_chunk_size_zero_sends_one_chunk():
+    async def lookup(chunk):
+        return len(chunk)
+
+    with patch.object(settings, "lookup_chunk_size", 0):
+        assert await run_chunked("test", list(range(10)), lookup) == [10]
@@ -0,0 +1,60 @@
+import pytest
+from rdflib import URIRef
+
+from prez.cache import prefix_graph
+from prez.exceptions.model_exceptions import PrefixNotBoundException
+from prez.services.curie_functions import (
+    curie_index,
+    get_curie_id_for_uri,
+    get_uri_for_curie_id,
+)
+
+EX = "https://curieindex.example.com/"
+
+
+@pytest.fixture(autouse=True)
+def prefixes():
+    prefix_graph.bind("cix", EX)
+    prefix_graph.bind("cixvoc", EX + "vocab/")
+    prefix_graph.bind("cixterm", EX + "vocab/terms#")
+    curie_index.reset()
+    yield
+    curie_index.reset()
+
+
+@pytest.mark.parametrize(
+    "uri",
+    [
+        EX + "thing",
+        EX + "vocab/Concept",
+        EX + "vocab/terms#label",
+        # no bound namespace is as long as the one rdflib splits off, so a prefix is generated
+        EX + "other/thing",
+        "http://www.w3.org/2004/02/skos/core#prefLabel",
+        "urn:curieindex:example:x1",
+    ],
+)
+def test_curies_match_compute_qname(uri):
+    curie = get_curie_id_for_uri(URIRef(uri))
+    prefix, namespace, name = prefix_graph.compute_qname(uri, generate=False)
+    assert curie == f"{prefix}:{name}"
+    assert get_curie_id_for_uri(uri) == curie
+
+
+def test_longest_namespace_is_used():
+    assert get_curie_id_for_uri(URIRef(EX + "vocab/terms#label")) == "cixterm:label"
+    assert get_curie_id_for_uri(URIRef(EX + "vocab/Concept")) == "cixvoc:Concept"
+
+
+def test_invalid_uri():
+    with pytest.raises(ValueError):
+        get_curie_id_for_uri(URIRef("http://"))
+
+
+@pytest.mark.asyncio
+async def test_uri_for_curie():
+    assert await get_uri_for_curie_id("cixvoc:Concept") == URIRef(EX + "vocab/Concept")
+    prefix_graph.bind("cixlate", EX + "late/")
+    assert await get_uri_for_curie_id("cixlate:x") == URIRef(EX + "late/x")
+    with pytest.raises(PrefixNotBoundException):
+        await get_uri_for_curie_id("cixunbound:x")
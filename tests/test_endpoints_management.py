@@ -24,3 +24,9 @@ def test_annotation_predicates(client):
         )
     )
     assert len(provList) == 1
+
+
+def test_purge_sparql_cache(client):
+    r = client.get("/purge-sparql-cache")
+    assert r.status_code == 200
+    assert "SPARQL cache" in r.text
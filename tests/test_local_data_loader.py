@@ -0,0 +1,68 @@
+import os
+from pathlib import Path
+
+import pytest
+from pyoxigraph import Store
+
+from prez.services.local_data import (
+    data_fingerprint,
+    load_local_data,
+    local_data_files,
+    open_shared_store,
+)
+
+TURTLE = """PREFIX ex: <http://example.com/>
+ex:{name} ex:p _:b1 .
+_:b1 ex:q "{name}" .
+"""
+
+
+@pytest.fixture
+def data_dir(tmp_path: Path) -> Path:
+    data_dir = tmp_path / "data"
+    (data_dir / "nested").mkdir(parents=True)
+    for name in ("a", "b", "nested/c"):
+        (data_dir / f"{name}.ttl").write_text(TURTLE.format(name=name.split("/")[-1]))
+    return data_dir
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_load_local_data(data_dir: Path, workers: int):
+    store = Store()
+    load_local_data(store, data_dir, local_data_files(data_dir), workers)
+    assert len(store) == 6
+    # the blank node labelled _:b1 in every file is a different node in each
+    assert (
+        len(set(quad.object for quad in store.quads_for_pattern(None, None, None))) == 6
+    )
+
+
+def test_load_local_data_reports_bad_file(data_dir: Path):
+    (data_dir / "bad.ttl").write_text("not turtle")
+    with pytest.raises(SyntaxError, match="bad.ttl"):
+        load_local_data(Store(), data_dir, local_data_files(data_dir), 2)
+
+
+def test_fingerprint_tracks_file_changes(data_dir: Path):
+    fingerprint = data_fingerprint(data_dir, local_data_files(data_dir))
+    assert data_fingerprint(data_dir, local_data_files(data_dir)) == fingerprint
+    file = data_dir / "a.ttl"
+    stat = file.stat()
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert data_fingerprint(data_dir, local_data_files(data_dir)) != fingerprint
+
+
+def test_shared_store_rebuilt_when_fingerprint_changes(data_dir: Path, tmp_path: Path):
+    builds = []
+
+    def load(store: Store):
+        builds.append(len(builds))
+        load_local_data(store, data_dir, local_data_files(data_dir), 1)
+
+    shared_dir = tmp_path / "shared"
+    assert len(open_shared_store(shared_dir, load, "one")) == 6
+    assert len(open_shared_store(shared_dir, load, "one")) == 6
+    assert len(builds) == 1
+    (data_dir / "a.ttl").unlink()
+    assert len(open_shared_store(shared_dir, load, "two")) == 4
+    assert len(builds) == 2
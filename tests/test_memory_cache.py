@@ -0,0 +1,52 @@
+import pytest
+from rdflib import Literal, URIRef
+
+from prez.services.memory_cache import LRUMemoryCache, estimate_size
+
+EX = "http://example.com/"
+
+
+def annotations(i: int) -> frozenset:
+    return frozenset({(URIRef(EX + "label"), Literal(f"Term {i}"))})
+
+
+@pytest.mark.asyncio
+async def test_multi_get_and_set():
+    cache = LRUMemoryCache(max_entries=10, max_bytes=1_000_000)
+    await cache.multi_set([(URIRef(EX + "a"), annotations(1))])
+    value = annotations(1)
+    assert await cache.multi_get([URIRef(EX + "a"), URIRef(EX + "b")]) == [
+        value,
+        None,
+    ]
+    # values are not copied
+    assert (await cache.get(URIRef(EX + "a"))) is (await cache.get(URIRef(EX + "a")))
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_evicted_by_entries():
+    cache = LRUMemoryCache(max_entries=2, max_bytes=1_000_000)
+    await cache.multi_set([("a", annotations(1)), ("b", annotations(2))])
+    await cache.get("a")
+    await cache.set("c", annotations(3))
+    assert await cache.multi_get(["a", "b", "c"]) == [
+        annotations(1),
+        None,
+        annotations(3),
+    ]
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_evicted_by_bytes():
+    entry_size = estimate_size("a") + estimate_size(annotations(1))
+    cache = LRUMemoryCache(max_entries=100, max_bytes=entry_size * 2 + 10)
+    await cache.multi_set([(key, annotations(1)) for key in "abc"])
+    assert len(cache) == 2
+    assert cache.stats()["bytes"] <= cache.max_bytes
+    assert await cache.get("a") is None
+    await cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()["bytes"] == 0
@@ -0,0 +1,66 @@
+from unittest.mock import patch
+
+import pytest
+from oxrdflib import OxigraphStore
+from pyoxigraph import Store
+from rdflib import Graph, Literal, URIRef
+
+from prez.config import settings
+from prez.repositories import OxrdflibRepo
+
+EX = "http://example.com/"
+
+
+@pytest.fixture
+def oxrdflib_repo():
+    pyoxi_store = Store()
+    g = Graph(store=OxigraphStore(store=pyoxi_store))
+    g.bind("ex", EX)
+    g.add((URIRef(EX + "s"), URIRef(EX + "p"), Literal("o", lang="en")))
+    # triples outside the graph's own named graph are not part of its dataset
+    Graph(store=g.store).add((URIRef(EX + "x"), URIRef(EX + "y"), URIRef(EX + "z")))
+    return OxrdflibRepo(g, pyoxi_store)
+
+
+@pytest.mark.asyncio
+async def test_construct_into_store(oxrdflib_repo):
+    store, _ = await oxrdflib_repo.send_queries(
+        ["CONSTRUCT { ?s ?p ?o } WHERE { ?s ?p ?o }"], return_oxigraph_store=True
+    )
+    assert isinstance(store, Store)
+    assert len(store) == 1
+
+
+@pytest.mark.asyncio
+async def test_construct_into_graph_uses_graph_prefixes(oxrdflib_repo):
+    graph, _ = await oxrdflib_repo.send_queries(
+        ["CONSTRUCT { ?s ex:p ?o } WHERE { ?s ex:p ?o }"]
+    )
+    assert (URIRef(EX + "s"), URIRef(EX + "p"), Literal("o", lang="en")) in graph
+
+
+@pytest.mark.asyncio
+async def test_select_bindings(oxrdflib_repo):
+    _, bindings = await oxrdflib_repo.tabular_query_to_table(
+        "SELECT ?s ?o WHERE { ?s ?p ?o }"
+    )
+    assert bindings == [
+        {
+            "s": {"type": "uri", "value": EX + "s"},
+            "o": {"type": "literal", "value": "o"},
+        }
+    ]
+
+
+@pytest.mark.asyncio
+async def test_parallel_queries_are_merged(oxrdflib_repo):
+    with patch.object(settings, "sparql_coalesce_queries", False):
+        store, _ = await oxrdflib_repo.send_queries(
+            [
+                "CONSTRUCT { ?s ?p ?o } WHERE { ?s ?p ?o }",
+                "CONSTRUCT { ?s ex:q ?o } WHERE { ?s ?p ?o }",
+                "CONSTRUCT { ?s ?p ?o } WHERE { ?s ?p ?o }",
+            ],
+            return_oxigraph_store=True,
+        )
+    assert len(store) == 2
@@ -0,0 +1,69 @@
+from unittest.mock import patch
+
+import pytest
+from pyoxigraph import RdfFormat, Store
+from rdflib import URIRef
+
+from prez.cache import prefix_graph
+from prez.repositories import PyoxigraphRepo
+from prez.services.app_service import generate_prefixes
+from prez.services.curie_functions import get_curie_id_for_uri
+
+
+@pytest.fixture
+def repo():
+    store = Store()
+    store.load(
+        b"""
+        <https://prefixgen.example.com/alpha/a1> <https://prefixgen.example.com/p> "1" .
+        <https://prefixgen.example.com/alpha/a2> <https://prefixgen.example.com/p> "2" .
+        <https://prefixgen.example.com/beta#b1> <https://prefixgen.example.com/p> "3" .
+        <https://prefixgen.example.com/gamma/g1> <https://prefixgen.example.com/p> "4" .
+        <urn:prefixgen:delta:d1> <https://prefixgen.example.com/p> "5" .
+        <https://prefixgen.example.com/alpha/item?id=ab> <https://prefixgen.example.com/p> "7" .
+        <https://prefixgen.example.com/alpha/other?id=cd> <https://prefixgen.example.com/p> "8" .
+        <https://prefixgen.example.com/zeta/123> <https://prefixgen.example.com/p> "9" .
+        <https://prefixgen.example.com/zeta/456> <https://prefixgen.example.com/p> "11" .
+        <https://prefixgen.example.com/eta#a/b> <https://prefixgen.example.com/p> "10" .
+        _:x <https://prefixgen.example.com/p> "6" .
+        """,
+        RdfFormat.N_TRIPLES,
+    )
+    return PyoxigraphRepo(store)
+
+
+@pytest.mark.asyncio
+async def test_prefixes_generated_per_namespace(repo):
+    examples = []
+    query_columns = repo.query_columns
+
+    async def record(query):
+        columns = await query_columns(query)
+        examples.extend(columns.column("example"))
+        return columns
+
+    with patch.object(repo, "query_columns", record):
+        await generate_prefixes(repo)
+
+    namespaces = {str(namespace) for _, namespace in prefix_graph.namespaces()}
+    assert {
+        "https://prefixgen.example.com/alpha/",
+        "https://prefixgen.example.com/beta#",
+        "https://prefixgen.example.com/gamma/",
+        "https://prefixgen.example.com/zeta/",
+        "urn:prefixgen:delta:",
+    } <= namespaces
+    # five namespaces, numeric local names included, and three IRIs grouped on their own
+    assert len(examples) == 8
+
+
+@pytest.mark.asyncio
+async def test_generated_prefixes_match_per_iri_generation(repo):
+    await generate_prefixes(repo)
+    bound = set(prefix_graph.namespaces())
+    columns = await repo.query_columns(
+        "SELECT DISTINCT ?s { ?s ?p ?o FILTER(isIRI(?s)) }"
+    )
+    for subject in columns.column("s"):
+        get_curie_id_for_uri(URIRef(subject))
+    assert set(prefix_graph.namespaces()) == bound
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+from pyoxigraph import DefaultGraph, Literal, NamedNode, Quad, RdfFormat, Store, parse
+
+from prez.exceptions.model_exceptions import InvalidSPARQLQueryException
+from prez.repositories import PyoxigraphRepo
+from prez.repositories.pyoxigraph import STREAM_BUFFER_CHUNKS, _QueueWriter
+
+N_TRIPLES = 20_000
+
+
+@pytest.fixture(scope="module")
+def repo():
+    store = Store()
+    store.bulk_extend(
+        Quad(
+            NamedNode(f"http://example.com/{i}"),
+            NamedNode("http://example.com/p"),
+            Literal(str(i)),
+            DefaultGraph(),
+        )
+        for i in range(N_TRIPLES)
+    )
+    return PyoxigraphRepo(store)
+
+
+def accept(mediatype: str) -> list[tuple[bytes, bytes]]:
+    return [(b"accept", mediatype.encode())]
+
+
+@pytest.mark.asyncio
+async def test_select_streams_json_by_default(repo):
+    response = await repo.sparql("SELECT * { ?s ?p ?o }", [])
+    assert response.headers["content-type"] == "application/sparql-results+json"
+    chunks = [chunk async for chunk in response.aiter_raw()]
+    assert len(chunks) > 1
+    assert len(json.loads(b"".join(chunks))["results"]["bindings"]) == N_TRIPLES
+
+
+@pytest.mark.asyncio
+async def test_select_honours_accept_preference(repo):
+    response = await repo.sparql(
+        "SELECT ?s { ?s ?p ?o } LIMIT 2",
+        accept("application/sparql-results+xml;q=0.5, text/csv"),
+    )
+    assert response.headers["content-type"].startswith("text/csv")
+    assert (await response.aread()).decode().splitlines()[0] == "s"
+
+
+@pytest.mark.asyncio
+async def test_construct_streams_requested_rdf_format(repo):
+    response = await repo.sparql(
+        "CONSTRUCT { ?s ?p ?o } WHERE { ?s ?p ?o }", accept("application/n-triples")
+    )
+    assert response.headers["content-type"].startswith("application/n-triples")
+    content = await response.aread()
+    assert len(list(parse(content, RdfFormat.N_TRIPLES))) == N_TRIPLES
+
+
+@pytest.mark.asyncio
+async def test_ask(repo):
+    response = await repo.sparql("ASK { ?s ?p ?o }", accept("application/json"))
+    assert json.loads(await response.aread())["boolean"] is True
+
+
+@pytest.mark.asyncio
+async def test_invalid_query_raises_before_streaming(repo):
+    with pytest.raises(InvalidSPARQLQueryException):
+        await repo.sparql("INSERT DATA { <a:s> <a:p> <a:o> }", [])
+
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_stops_serialising(repo):
+    with patch.object(
+        _QueueWriter, "put", autospec=True, side_effect=_QueueWriter.put
+    ) as put:
+        response = await repo.sparql("SELECT * { ?s ?p ?o }", [])
+        stream = response.aiter_raw()
+        await stream.__anext__()
+        await asyncio.sleep(0.1)
+        # the serialiser runs no further ahead of the reader than the buffer allows
+        assert put.call_count <= STREAM_BUFFER_CHUNKS + 2
+        await response.aclose()
+        await asyncio.sleep(0.1)
+        written = put.call_count
+        await asyncio.sleep(0.2)
+    assert put.call_count == written
+
+
+@pytest.mark.asyncio
+async def test_streams_use_their_own_threads(repo):
+    # slow clients hold stream threads, never those of the default threadpool
+    threads = []
+    query = repo._query
+
+    def recording_query(q):
+        threads.append(threading.current_thread().name)
+        return query(q)
+
+    with patch.object(repo, "_query", recording_query):
+        response = await repo.sparql("ASK { ?s ?p ?o }", [])
+        await response.aread()
+    assert threads[0].startswith("prez-sparql-stream")
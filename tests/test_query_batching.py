@@ -0,0 +1,97 @@
+from unittest.mock import Mock, patch
+
+import httpx
+import pytest
+from pyoxigraph import RdfFormat, Store
+
+from prez.config import settings
+from prez.repositories.query_batching import batch_construct_queries
+from prez.repositories.remote_sparql import RemoteSparqlRepo
+from prez.repositories.replica_pool import ReplicaPool
+
+DATA = b"""
+PREFIX ex: <http://example.com/>
+ex:a a ex:C ; ex:label "A" .
+ex:b a ex:C .
+ex:c a ex:D ; ex:label "C" .
+"""
+
+LISTING_QUERY = """PREFIX ex: <http://example.com/>
+CONSTRUCT { ?focus_node a ?class ; ex:label ?label }
+WHERE {
+    { SELECT ?focus_node WHERE { ?focus_node a ex:C } ORDER BY ?focus_node LIMIT 10 OFFSET 0 }
+    ?focus_node a ?class .
+    OPTIONAL { ?focus_node ex:label ?label }  # labels are optional
+}"""
+
+COUNT_QUERY = """CONSTRUCT { [] <https://prez.dev/count> ?count_str }
+WHERE {
+    { SELECT (COUNT(?focus_node) AS ?count) WHERE { ?focus_node a <http://example.com/C> . _:x ?p ?o } }
+    BIND(STR(?count) AS ?count_str)
+}"""
+
+DESCRIBE_D_QUERY = """PREFIX ex: <http://example.com/>
+CONSTRUCT { ?s ?p ?o } WHERE { ?s a ex:D ; ?p ?o }"""
+
+
+@pytest.fixture
+def store():
+    s = Store()
+    s.load(DATA, RdfFormat.TURTLE)
+    return s
+
+
+def construct(store: Store, query: str) -> set[str]:
+    # blank node labels differ between evaluations
+    return {str(t).split("_:")[0] for t in store.query(query)}
+
+
+def test_batched_query_gives_union_of_results(store):
+    queries = [LISTING_QUERY, COUNT_QUERY, DESCRIBE_D_QUERY]
+    batched = batch_construct_queries(queries)
+    assert len(batched) == 1
+    expected = set().union(*(construct(store, q) for q in queries))
+    assert construct(store, batched[0]) == expected
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "CONSTRUCT { <http://a> <http://b> ?o } WHERE { ?s ?p ?o } LIMIT 5",
+        "CONSTRUCT { <http://a> <http://b> <http://c> } WHERE { ?s ?p ?o }",
+        "CONSTRUCT { ?s <http://b> [ <http://c> <http://d> ] } WHERE { ?s ?p ?o }",
+        "CONSTRUCT { ?s ?p ?o } FROM <http://g> WHERE { ?s ?p ?o }",
+        "CONSTRUCT WHERE { ?s ?p ?o }",
+        "DESCRIBE <http://a>",
+        "PREFIX ex: <http://other.com/> CONSTRUCT { ?s ex:p ?o } WHERE { ?s ex:p ?o }",
+    ],
+)
+def test_incompatible_queries_are_sent_separately(query):
+    batched = batch_construct_queries([LISTING_QUERY, DESCRIBE_D_QUERY, query])
+    assert len(batched) == 2
+    assert batched[1] == query
+
+
+def test_single_query_is_unchanged():
+    assert batch_construct_queries([LISTING_QUERY]) == [LISTING_QUERY]
+
+
+@pytest.mark.asyncio
+async def test_remote_repo_sends_one_request():
+    async_client = Mock(spec=httpx.AsyncClient)
+    async_client.send.return_value = httpx.Response(
+        200,
+        headers={"content-type": "application/n-triples"},
+        content=b"<http://example.com/a> <http://example.com/p> <http://example.com/o> .\n",
+        request=httpx.Request("POST", "http://test-sparql-endpoint.com"),
+    )
+    repo = RemoteSparqlRepo(
+        async_client, ReplicaPool(["http://test-sparql-endpoint.com"])
+    )
+    with patch.object(settings, "sparql_batch_construct_queries", True):
+        store, _ = await repo.send_queries(
+            [LISTING_QUERY, COUNT_QUERY], return_oxigraph_store=True
+        )
+    assert async_client.send.call_count == 1
+    assert "UNION" in async_client.build_request.call_args.kwargs["data"]["query"]
+    assert len(store) == 1
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+from pyoxigraph import DefaultGraph, NamedNode, Quad, Store
+from rdflib import Graph, URIRef
+
+from prez.config import settings
+from prez.repositories import Repo, base
+
+EX = "http://example.com/"
+
+
+class CountingRepo(Repo):
+    """A repo which answers every query slowly and records how often the backend is called."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    async def rdf_query_to_rdflib_graph(self, query, into_graph=None):
+        self.calls.append(("rdflib", query))
+        await asyncio.sleep(0.01)
+        g = into_graph if into_graph is not None else Graph()
+        g.add((URIRef(EX + "s"), URIRef(EX + "p"), URIRef(EX + query.strip())))
+        return g
+
+    async def rdf_query_to_oxigraph_store(self, query, into_store=None):
+        self.calls.append(("oxigraph", query))
+        await asyncio.sleep(0.01)
+        s = into_store if into_store is not None else Store()
+        s.add(
+            Quad(
+                NamedNode(EX + "s"),
+                NamedNode(EX + "p"),
+                NamedNode(EX + query.strip()),
+                DefaultGraph(),
+            )
+        )
+        return s
+
+    async def tabular_query_to_table(self, query, context=None):
+        self.calls.append(("tabular", query))
+        await asyncio.sleep(0.01)
+        return context, [{"o": {"type": "uri", "value": EX + query.strip()}}]
+
+    def sparql(self, query, raw_headers, method="GET"):
+        raise NotImplementedError
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_queries_share_one_call():
+    repo = CountingRepo()
+    results = await asyncio.gather(
+        repo.send_queries(["a"], return_oxigraph_store=True),
+        repo.send_queries(["  a\n"], return_oxigraph_store=True),
+        repo.send_queries(["a"], return_oxigraph_store=True),
+    )
+    assert repo.calls == [("oxigraph", "a")]
+    stores = [store for store, _ in results]
+    assert all(len(store) == 1 for store in stores)
+    # every caller gets its own store
+    assert len({id(store) for store in stores}) == 3
+    stores[0].add(Quad(NamedNode(EX + "x"), NamedNode(EX + "y"), NamedNode(EX + "z")))
+    assert len(stores[1]) == 1
+
+
+@pytest.mark.asyncio
+async def test_result_kinds_are_not_coalesced_together():
+    repo = CountingRepo()
+    await asyncio.gather(
+        repo.send_queries(["a"], return_oxigraph_store=True),
+        repo.send_queries(["a"], return_oxigraph_store=False),
+        repo.send_queries([], [(None, "a")]),
+    )
+    assert sorted(kind for kind, _ in repo.calls) == ["oxigraph", "rdflib", "tabular"]
+
+
+@pytest.mark.asyncio
+async def test_coalesced_tabular_results_are_copies():
+    repo = CountingRepo()
+    (_, first), (_, second) = await asyncio.gather(
+        repo.send_queries([], [(URIRef(EX + "one"), "a")]),
+        repo.send_queries([], [(URIRef(EX + "two"), "a")]),
+    )
+    assert len(repo.calls) == 1
+    assert first[0][0] == URIRef(EX + "one")
+    assert second[0][0] == URIRef(EX + "two")
+    first[0][1][0]["o"]["value"] = "changed"
+    assert second[0][1][0]["o"]["value"] == EX + "a"
+
+
+@pytest.mark.asyncio
+async def test_sequential_queries_are_sent_again():
+    repo = CountingRepo()
+    await repo.send_queries(["a", "b"], return_oxigraph_store=False)
+    g, _ = await repo.send_queries(["a", "b"], return_oxigraph_store=False)
+    assert len(repo.calls) == 4
+    assert len(g) == 2
+
+
+@pytest.mark.asyncio
+async def test_coalescing_can_be_disabled():
+    repo = CountingRepo()
+    with patch.object(settings, "sparql_coalesce_queries", False):
+        await asyncio.gather(
+            repo.send_queries(["a"], return_oxigraph_store=True),
+            repo.send_queries(["a"], return_oxigraph_store=True),
+        )
+    assert len(repo.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_results_are_merged_off_the_event_loop():
+    repo = CountingRepo()
+    loop_thread = threading.current_thread()
+    merged_in = []
+    merge_graphs = base._merge_graphs
+
+    def recording_merge(results):
+        merged_in.append(threading.current_thread())
+        return merge_graphs(results)
+
+    with patch.object(base, "_merge_graphs", recording_merge):
+        graph, _ = await repo.send_queries(["a", "b"])
+    assert len(graph) == 2
+    assert merged_in and merged_in[0] is not loop_thread
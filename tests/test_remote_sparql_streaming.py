@@ -0,0 +1,163 @@
+import threading
+from unittest.mock import Mock, patch
+
+import httpx
+import pytest
+from pyoxigraph import BlankNode, Store
+from rdflib import BNode, Graph, URIRef
+
+from prez.config import settings
+from prez.repositories import remote_sparql
+from prez.repositories.remote_sparql import RemoteSparqlRepo
+
+NTRIPLES = (
+    b'<http://example.com/a> <http://example.com/p> "one" .\n'
+    b"<http://example.com/a> <http://example.com/q> _:b0 .\n"
+    b'_:b0 <http://example.com/p> "two" .\n'
+)
+
+
+def chunked_response(body: bytes, chunk_size: int, content_type: str):
+    """A streamed response which delivers the body in chunks that split lines."""
+
+    async def chunks():
+        for i in range(0, len(body), chunk_size):
+            yield body[i : i + chunk_size]
+
+    return httpx.Response(
+        200,
+        headers={"content-type": content_type},
+        content=chunks(),
+        request=httpx.Request("POST", "http://test-sparql-endpoint.com"),
+    )
+
+
+@pytest.fixture
+def mock_async_client():
+    return Mock(spec=httpx.AsyncClient)
+
+
+@pytest.fixture
+def remote_repo(mock_async_client):
+    with patch.object(settings, "sparql_endpoint", "http://test-sparql-endpoint.com"):
+        return RemoteSparqlRepo(mock_async_client)
+
+
+@pytest.mark.asyncio
+async def test_chunks_end_on_line_boundaries():
+    body = (
+        NTRIPLES
+        + b'<http://example.com/a> <http://example.com/p> "'
+        + b"x" * 100
+        + b'" .'
+    )
+    chunks = [
+        chunk
+        async for chunk in remote_sparql._aiter_complete_lines(
+            chunked_response(body, 3, "application/n-triples")
+        )
+    ]
+    assert b"".join(chunks) == body
+    assert all(chunk.endswith(b"\n") for chunk in chunks[:-1])
+    assert chunks[-1].endswith(b'" .')
+
+
+class TestRemoteSparqlStreaming:
+    @pytest.mark.asyncio
+    async def test_stream_into_oxigraph_store(self, remote_repo, mock_async_client):
+        mock_async_client.send.return_value = chunked_response(
+            NTRIPLES, 7, "application/n-triples; charset=utf-8"
+        )
+        with patch.object(settings, "sparql_stream_results", True):
+            store = await remote_repo.rdf_query_to_oxigraph_store("CONSTRUCT {} {}")
+
+        headers = mock_async_client.build_request.call_args[1]["headers"]
+        assert headers["Accept"] == "application/n-triples"
+        assert len(store) == 3
+        bnodes = {q.subject for q in store if isinstance(q.subject, BlankNode)}
+        bnode_objects = {q.object for q in store if isinstance(q.object, BlankNode)}
+        # the blank node split across chunks is still a single node
+        assert len(bnodes) == 1
+        assert bnodes == bnode_objects
+
+    @pytest.mark.asyncio
+    async def test_streamed_blank_nodes_do_not_clash(
+        self, remote_repo, mock_async_client
+    ):
+        mock_async_client.send.side_effect = [
+            chunked_response(NTRIPLES, 5, "application/n-triples"),
+            chunked_response(NTRIPLES, 11, "application/n-triples"),
+        ]
+        store = Store()
+        with patch.object(settings, "sparql_stream_results", True):
+            await remote_repo.rdf_query_to_oxigraph_store("Q1", into_store=store)
+            await remote_repo.rdf_query_to_oxigraph_store("Q2", into_store=store)
+        bnodes = {q.subject for q in store if isinstance(q.subject, BlankNode)}
+        assert len(bnodes) == 2
+
+    @pytest.mark.asyncio
+    async def test_stream_into_rdflib_graph(self, remote_repo, mock_async_client):
+        mock_async_client.send.return_value = chunked_response(
+            NTRIPLES, 3, "application/n-triples"
+        )
+        with patch.object(settings, "sparql_stream_results", True):
+            g = await remote_repo.rdf_query_to_rdflib_graph("CONSTRUCT {} {}")
+        assert len(g) == 3
+        bnode = g.value(URIRef("http://example.com/a"), URIRef("http://example.com/q"))
+        assert isinstance(bnode, BNode)
+        assert len(list(g.predicate_objects(bnode))) == 1
+
+    @pytest.mark.asyncio
+    async def test_non_line_based_response_is_buffered(
+        self, remote_repo, mock_async_client
+    ):
+        turtle = Graph().parse(data=NTRIPLES, format="nt").serialize(format="turtle")
+        mock_async_client.send.return_value = chunked_response(
+            turtle.encode("utf-8"), 4, "text/turtle"
+        )
+        with patch.object(settings, "sparql_stream_results", True):
+            store = await remote_repo.rdf_query_to_oxigraph_store("CONSTRUCT {} {}")
+        assert len(store) == 3
+
+
+class TestRemoteSparqlParseExecutor:
+    @pytest.mark.asyncio
+    async def test_large_response_parsed_in_executor(
+        self, remote_repo, mock_async_client
+    ):
+        mock_async_client.send.return_value = chunked_response(
+            NTRIPLES, 1024, "application/n-triples"
+        )
+        target = Graph()
+        target.add(
+            (URIRef("http://example.com/x"), URIRef("http://example.com/p"), BNode())
+        )
+        parsed_in = []
+        parse = remote_sparql._parse_into_graph
+
+        def parse_into_graph(*args, **kwargs):
+            parsed_in.append(threading.current_thread())
+            return parse(*args, **kwargs)
+
+        with patch.object(settings, "sparql_parse_inline_threshold", 1), patch(
+            "prez.repositories.remote_sparql._parse_into_graph", parse_into_graph
+        ):
+            g = await remote_repo.rdf_query_to_rdflib_graph(
+                "CONSTRUCT {} {}", into_graph=target
+            )
+        # parsed straight into the target, off the event loop
+        assert len(parsed_in) == 1
+        assert parsed_in[0] is not threading.current_thread()
+        assert g is target
+        assert len(g) == 4
+
+    @pytest.mark.asyncio
+    async def test_small_response_parsed_inline(self, remote_repo, mock_async_client):
+        mock_async_client.send.return_value = chunked_response(
+            NTRIPLES, 1024, "application/n-triples"
+        )
+        with patch.object(
+            remote_sparql, "get_parse_executor", side_effect=AssertionError
+        ):
+            g = await remote_repo.rdf_query_to_rdflib_graph("CONSTRUCT {} {}")
+        assert len(g) == 3
@@ -0,0 +1,179 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+import pytest
+
+from prez.config import settings
+from prez.repositories.remote_sparql import RemoteSparqlRepo
+from prez.repositories.replica_pool import HEDGE_MIN_SAMPLES, ReplicaPool
+
+REPLICAS = ["http://replica-1.com/sparql", "http://replica-2.com/sparql"]
+
+
+def json_response(url: str):
+    return httpx.Response(
+        200,
+        json={"head": {"vars": []}, "results": {"bindings": []}},
+        request=httpx.Request("POST", url),
+    )
+
+
+@pytest.fixture
+def mock_async_client():
+    client = Mock(spec=httpx.AsyncClient)
+    client.build_request.side_effect = lambda method, url, **kwargs: httpx.Request(
+        method, url
+    )
+    return client
+
+
+def test_select_prefers_fewest_in_flight():
+    pool = ReplicaPool(REPLICAS)
+    pool.replicas[0].in_flight = 2
+    pool.replicas[1].in_flight = 1
+    assert pool.select().url == REPLICAS[1]
+
+
+def test_select_breaks_ties_on_latency():
+    pool = ReplicaPool(REPLICAS)
+    pool.replicas[0].record_latency(0.5)
+    pool.replicas[1].record_latency(0.1)
+    assert pool.select().url == REPLICAS[1]
+
+
+def test_select_skips_unhealthy_replicas():
+    pool = ReplicaPool(REPLICAS)
+    pool.replicas[1].in_flight = 5
+    pool.replicas[0].healthy = False
+    assert pool.select().url == REPLICAS[1]
+    # with no healthy replica left, queries are still attempted
+    pool.replicas[1].healthy = False
+    assert pool.select().url == REPLICAS[0]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_queries_are_spread_across_replicas(mock_async_client):
+    async def send(request, stream=False):
+        await asyncio.sleep(0.01)
+        return json_response(str(request.url))
+
+    mock_async_client.send.side_effect = send
+    repo = RemoteSparqlRepo(mock_async_client, ReplicaPool(REPLICAS))
+    await asyncio.gather(
+        *[repo.tabular_query_to_table(f"SELECT * {{ ?s ?p {i} }}") for i in range(4)]
+    )
+    urls = [call.args[0].url for call in mock_async_client.send.call_args_list]
+    assert sorted(str(url) for url in urls) == sorted(REPLICAS * 2)
+    stats = repo.replica_pool.stats()
+    assert [s["requests"] for s in stats] == [2, 2]
+    assert all(s["in_flight"] == 0 for s in stats)
+
+
+@pytest.mark.asyncio
+async def test_unreachable_replica_is_ejected(mock_async_client):
+    mock_async_client.send.side_effect = httpx.ConnectError("refused")
+    pool = ReplicaPool(REPLICAS)
+    repo = RemoteSparqlRepo(mock_async_client, pool)
+    with pytest.raises(httpx.ConnectError):
+        await repo.tabular_query_to_table("SELECT * { ?s ?p ?o }")
+    assert not pool.replicas[0].healthy
+    assert pool.replicas[0].errors == 1
+    assert pool.select().url == REPLICAS[1]
+
+
+@pytest.mark.asyncio
+async def test_health_check_readmits_replica(mock_async_client):
+    pool = ReplicaPool(REPLICAS)
+    pool.replicas[0].healthy = False
+
+    async def get(url, **kwargs):
+        if url == REPLICAS[1]:
+            raise httpx.ConnectError("refused")
+        return httpx.Response(200, request=httpx.Request("GET", url))
+
+    mock_async_client.get = AsyncMock(side_effect=get)
+    await pool.check_health(mock_async_client)
+    assert pool.replicas[0].healthy
+    assert not pool.replicas[1].healthy
+
+
+def primed_pool(latency: float = 0.01) -> ReplicaPool:
+    """A pool that has recorded enough latencies to hedge, and has hedge budget available."""
+    pool = ReplicaPool(REPLICAS)
+    for _ in range(HEDGE_MIN_SAMPLES):
+        pool._latencies.append(latency)
+    pool._latency_count = HEDGE_MIN_SAMPLES
+    pool._hedge_tokens = 1
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_slow_query_is_hedged_and_loser_cancelled(mock_async_client):
+    cancelled = []
+
+    async def send(request, stream=False):
+        try:
+            if str(request.url) == REPLICAS[0]:
+                await asyncio.sleep(1)
+            return json_response(str(request.url))
+        except asyncio.CancelledError:
+            cancelled.append(str(request.url))
+            raise
+
+    mock_async_client.send.side_effect = send
+    pool = primed_pool()
+    repo = RemoteSparqlRepo(mock_async_client, pool)
+    with patch.object(settings, "sparql_hedge_requests", True):
+        response = await repo._send_query("SELECT * { ?s ?p ?o }")
+    await asyncio.sleep(0)
+    assert response.request.url == REPLICAS[1]
+    assert cancelled == [REPLICAS[0]]
+    assert pool.hedge_stats()["hedges"] == pool.hedge_stats()["hedge_wins"] == 1
+    assert all(r.in_flight == 0 for r in pool.replicas)
+
+
+@pytest.mark.asyncio
+async def test_hedges_are_limited_by_budget(mock_async_client):
+    async def send(request, stream=False):
+        await asyncio.sleep(0.05)
+        return json_response(str(request.url))
+
+    mock_async_client.send.side_effect = send
+    pool = primed_pool()
+    pool._hedge_tokens = 0
+    repo = RemoteSparqlRepo(mock_async_client, pool)
+    with patch.object(settings, "sparql_hedge_requests", True), patch.object(
+        settings, "sparql_hedge_max_ratio", 0.5
+    ):
+        for i in range(4):
+            await repo._send_query(f"SELECT * {{ ?s ?p {i} }}")
+    # half a hedge is earned per query, and none by the hedges themselves
+    assert pool.hedges == 2
+    assert mock_async_client.send.call_count == 6
+
+
+@pytest.mark.asyncio
+async def test_pool_wait_ends_at_first_trace_event():
+    replica = ReplicaPool(REPLICAS).replicas[0]
+    # the clock is read when the request starts waiting and at the first trace event only
+    with patch(
+        "prez.repositories.replica_pool.time.perf_counter", side_effect=[10.0, 10.25]
+    ):
+        trace = replica.trace_pool_wait()
+        await trace("connection.connect_tcp.started", {})
+        await trace("http11.send_request_headers.started", {})
+    assert replica.pool_waits == 1
+    assert replica.pool_wait_max == 0.25
+
+
+@pytest.mark.asyncio
+async def test_health_checks_skip_single_endpoint(mock_async_client):
+    pool = ReplicaPool(REPLICAS[:1])
+    pool.start_health_checks(mock_async_client)
+    assert pool._health_check_task is None
+
+    pool = ReplicaPool(REPLICAS)
+    pool.start_health_checks(mock_async_client)
+    assert pool._health_check_task is not None
+    await pool.stop_health_checks()
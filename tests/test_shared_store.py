@@ -0,0 +1,63 @@
+import multiprocessing
+from pathlib import Path
+
+import pytest
+from pyoxigraph import DefaultGraph, Literal, NamedNode, Quad, Store
+
+from prez.services.local_data import SHARED_STORE_CURRENT, open_shared_store
+
+TRIPLE = Quad(
+    NamedNode("http://example.com/s"),
+    NamedNode("http://example.com/p"),
+    Literal("o"),
+    DefaultGraph(),
+)
+
+
+def loader(shared_dir: Path):
+    def load(store: Store):
+        # record each build, so the test can check the data was loaded once
+        with open(shared_dir / "builds", "a") as f:
+            f.write("build\n")
+        store.add(TRIPLE)
+
+    return load
+
+
+def open_in_worker(shared_dir: Path, results):
+    store = open_shared_store(shared_dir, loader(shared_dir))
+    results.put(len(store))
+
+
+def test_workers_share_one_build(tmp_path: Path):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    workers = [
+        ctx.Process(target=open_in_worker, args=(tmp_path, results)) for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+    assert [results.get(timeout=5) for _ in workers] == [1] * 4
+    assert (tmp_path / "builds").read_text() == "build\n"
+
+
+def test_store_is_read_only(tmp_path: Path):
+    store = open_shared_store(tmp_path, loader(tmp_path))
+    assert TRIPLE in store
+    with pytest.raises(RuntimeError):
+        store.add(TRIPLE)
+
+
+def test_failed_build_is_retried(tmp_path: Path):
+    def failing_load(store: Store):
+        raise SyntaxError("bad data")
+
+    with pytest.raises(SyntaxError):
+        open_shared_store(tmp_path, failing_load)
+    assert not (tmp_path / SHARED_STORE_CURRENT).exists()
+    store = open_shared_store(tmp_path, loader(tmp_path))
+    assert len(store) == 1
+    assert len(list(tmp_path.glob("store-*"))) == 1
+    assert (tmp_path / "builds").read_text() == "build\n"
@@ -0,0 +1,142 @@
+from unittest.mock import Mock, patch
+
+import httpx
+import pytest
+
+from prez.config import settings
+from prez.repositories.remote_sparql import RemoteSparqlRepo
+from prez.repositories.result_cache import SparqlResultCache, sparql_result_cache
+
+QUERY = "CONSTRUCT { ?s ?p ?o } WHERE { ?s ?p ?o }"
+NTRIPLES = b"<http://example.com/s> <http://example.com/p> <http://example.com/o> .\n"
+
+
+def ntriples_response(content: bytes = NTRIPLES):
+    return httpx.Response(
+        200,
+        headers={"content-type": "application/n-triples"},
+        content=content,
+        request=httpx.Request("POST", "http://test-sparql-endpoint.com"),
+    )
+
+
+def version_response(version: str):
+    return httpx.Response(
+        200,
+        json={"head": {"vars": ["v"]}, "results": {"bindings": [{"v": version}]}},
+        request=httpx.Request("POST", "http://test-sparql-endpoint.com"),
+    )
+
+
+@pytest.fixture
+def mock_async_client():
+    return Mock(spec=httpx.AsyncClient)
+
+
+@pytest.fixture
+def remote_repo(mock_async_client):
+    sparql_result_cache.clear()
+    with patch.object(settings, "sparql_endpoint", "http://test-sparql-endpoint.com"):
+        yield RemoteSparqlRepo(mock_async_client)
+    sparql_result_cache.clear()
+
+
+def test_lru_eviction_by_bytes():
+    cache = SparqlResultCache(max_bytes=10, ttl=60)
+    cache.put("a", "text/turtle", b"12345", "text/turtle")
+    cache.put("b", "text/turtle", b"12345", "text/turtle")
+    assert cache.get("a", "text/turtle") is not None  # a is now most recently used
+    cache.put("c", "text/turtle", b"12345", "text/turtle")
+    assert cache.get("b", "text/turtle") is None
+    assert cache.get("a", "text/turtle") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 10
+
+
+def test_entries_keyed_by_mediatype():
+    cache = SparqlResultCache(max_bytes=100, ttl=60)
+    cache.put("a", "text/turtle", b"turtle", "text/turtle")
+    assert cache.get("a", "application/n-triples") is None
+
+
+def test_entries_expire():
+    cache = SparqlResultCache(max_bytes=100, ttl=-1)
+    cache.put("a", "text/turtle", b"12345", "text/turtle")
+    assert cache.get("a", "text/turtle") is None
+    assert cache.stats()["bytes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_repeated_query_skips_network(remote_repo, mock_async_client):
+    mock_async_client.send.return_value = ntriples_response()
+    with patch.object(settings, "sparql_result_cache_enabled", True):
+        first = await remote_repo.rdf_query_to_oxigraph_store(QUERY)
+        second = await remote_repo.rdf_query_to_oxigraph_store(QUERY)
+    assert mock_async_client.send.call_count == 1
+    assert len(first) == len(second) == 1
+
+
+@pytest.mark.asyncio
+async def test_data_version_change_clears_cache(remote_repo, mock_async_client):
+    mock_async_client.send.side_effect = [
+        version_response("1"),
+        ntriples_response(),
+        version_response("2"),
+        ntriples_response(),
+    ]
+    with patch.object(settings, "sparql_result_cache_enabled", True), patch.object(
+        settings, "sparql_data_version_query", "SELECT ?v WHERE {}"
+    ), patch.object(settings, "sparql_data_version_check_interval", 0):
+        await remote_repo.rdf_query_to_oxigraph_store(QUERY)
+        store = await remote_repo.rdf_query_to_oxigraph_store(QUERY)
+    assert mock_async_client.send.call_count == 4
+    assert len(store) == 1
+
+
+class ChunkedStream(httpx.AsyncByteStream):
+    def __init__(self, chunks: list[bytes]):
+        self.chunks = chunks
+        self.read = 0
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+
+@pytest.mark.asyncio
+async def test_large_response_without_length_is_streamed(
+    remote_repo, mock_async_client
+):
+    stream = ChunkedStream([NTRIPLES] * 10)
+    mock_async_client.send.return_value = httpx.Response(
+        200,
+        headers={"content-type": "application/n-triples"},
+        stream=stream,
+        request=httpx.Request("POST", "http://test-sparql-endpoint.com"),
+    )
+    with patch.object(settings, "sparql_result_cache_enabled", True), patch.object(
+        sparql_result_cache, "max_bytes", len(NTRIPLES) * 2
+    ):
+        response = await remote_repo._send_query(QUERY, "application/n-triples")
+        # only as much as the cache could hold has been read
+        assert stream.read == 3
+        assert await response.aread() == NTRIPLES * 10
+    assert sparql_result_cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_bad_data_version_response_keeps_cache(remote_repo, mock_async_client):
+    mock_async_client.send.side_effect = [
+        httpx.Response(
+            200,
+            content=b"not json",
+            request=httpx.Request("POST", "http://test-sparql-endpoint.com"),
+        ),
+        ntriples_response(),
+    ]
+    with patch.object(settings, "sparql_result_cache_enabled", True), patch.object(
+        settings, "sparql_data_version_query", "SELECT ?v WHERE {}"
+    ), patch.object(settings, "sparql_data_version_check_interval", 0):
+        store = await remote_repo.rdf_query_to_oxigraph_store(QUERY)
+    assert len(store) == 1
@@ -0,0 +1,92 @@
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from prez.config import settings
+from prez.middleware import create_readiness_middleware
+from prez.services.app_service import healthcheck_sparql_endpoints
+
+ENDPOINT = "http://test-sparql-endpoint.com"
+
+
+def mock_client(failures: int) -> Mock:
+    responses = [httpx.ConnectError("refused", request=httpx.Request("GET", ENDPOINT))]
+    client = Mock(spec=httpx.AsyncClient)
+    client.get = AsyncMock(
+        side_effect=responses * failures
+        + [httpx.Response(200, request=httpx.Request("GET", ENDPOINT))]
+    )
+    return client
+
+
+@pytest.fixture(autouse=True)
+def endpoint():
+    with patch.object(settings, "sparql_endpoint", ENDPOINT):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_healthcheck_backs_off_exponentially():
+    client = mock_client(failures=8)
+    with patch("asyncio.sleep", new_callable=AsyncMock) as sleep, patch.object(
+        settings, "sparql_startup_backoff_max", 30
+    ):
+        await healthcheck_sparql_endpoints(client)
+    assert [call.args[0] for call in sleep.call_args_list] == [
+        0.5,
+        1,
+        2,
+        4,
+        8,
+        16,
+        30,
+        30,
+    ]
+    assert client.get.call_count == 9
+
+
+@pytest.mark.asyncio
+async def test_healthcheck_gives_up_at_deadline():
+    client = mock_client(failures=100)
+    with patch.object(settings, "sparql_startup_timeout", 0.2), patch.object(
+        settings, "sparql_startup_backoff_max", 0.05
+    ):
+        with pytest.raises(TimeoutError):
+            await healthcheck_sparql_endpoints(client)
+    assert 3 <= client.get.call_count < 10
+
+
+@pytest.mark.asyncio
+async def test_healthcheck_attempts_end_by_deadline():
+    client = mock_client(failures=100)
+    with patch.object(settings, "sparql_startup_timeout", 0.2), patch.object(
+        settings, "sparql_startup_backoff_max", 30
+    ), patch.object(settings, "sparql_timeout", 60):
+        with pytest.raises(TimeoutError):
+            await healthcheck_sparql_endpoints(client)
+    assert all(0 < call.kwargs["timeout"] <= 0.2 for call in client.get.call_args_list)
+
+
+def test_requests_refused_until_ready():
+    app = FastAPI()
+    app.state.ready = False
+    app.middleware("http")(create_readiness_middleware())
+
+    @app.get("/health")
+    async def health():
+        return {"status": "starting"}
+
+    @app.get("/catalogs")
+    async def catalogs():
+        return {}
+
+    client = TestClient(app)
+    assert client.get("/health").status_code == 200
+    response = client.get("/catalogs")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+    app.state.ready = True
+    assert client.get("/catalogs").status_code == 200
@@ -0,0 +1,92 @@
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from pyoxigraph import DefaultGraph, Literal, NamedNode, Quad
+from rdflib import Graph, URIRef
+
+from prez.cache import (
+    counts_graph,
+    endpoints_graph_cache,
+    prefix_graph,
+    profiles_graph_cache,
+    queryable_props,
+    system_store,
+)
+from prez.config import SparqlRepoType, settings
+from prez.repositories import RemoteSparqlRepo
+from prez.repositories.replica_pool import ReplicaPool
+from prez.services.startup_snapshot import (
+    load_snapshot,
+    save_snapshot,
+    startup_fingerprint,
+)
+
+EX = "http://example.com/"
+TRIPLE = (URIRef(EX + "s"), URIRef(EX + "p"), URIRef(EX + "o"))
+QUAD = Quad(NamedNode(EX + "s"), NamedNode(EX + "p"), Literal("o"), DefaultGraph())
+
+
+@pytest.fixture
+def startup_caches(tmp_path: Path):
+    """Replaces the contents of the startup caches with test data, and puts the original contents back afterwards."""
+    original = tmp_path / "original.pickle"
+    save_snapshot(original, "original")
+    clear_startup_caches()
+    prefix_graph.bind("snapshottest", EX + "snapshot/")
+    profiles_graph_cache.add(TRIPLE)
+    endpoints_graph_cache.get_context(URIRef(EX + "endpoints")).add(TRIPLE)
+    counts_graph.add(TRIPLE)
+    queryable_props["label"] = EX + "label"
+    system_store.add(QUAD)
+    yield
+    clear_startup_caches()
+    load_snapshot(original, "original")
+
+
+def clear_startup_caches():
+    for graph in (profiles_graph_cache, endpoints_graph_cache, counts_graph):
+        graph.remove((None, None, None))
+    queryable_props.clear()
+    system_store.clear()
+
+
+def test_snapshot_restores_caches(startup_caches, tmp_path: Path):
+    path = tmp_path / "snapshot.pickle"
+    save_snapshot(path, "fingerprint")
+    clear_startup_caches()
+    assert TRIPLE not in profiles_graph_cache
+
+    assert load_snapshot(path, "fingerprint")
+    assert ("snapshottest", URIRef(EX + "snapshot/")) in list(prefix_graph.namespaces())
+    assert TRIPLE in profiles_graph_cache
+    assert TRIPLE in counts_graph
+    assert TRIPLE in endpoints_graph_cache.get_context(URIRef(EX + "endpoints"))
+    assert queryable_props == {"label": EX + "label"}
+    assert QUAD in system_store
+
+
+def test_snapshot_ignored_when_fingerprint_differs(startup_caches, tmp_path: Path):
+    path = tmp_path / "snapshot.pickle"
+    save_snapshot(path, "fingerprint")
+    clear_startup_caches()
+    assert not load_snapshot(path, "changed")
+    assert not load_snapshot(tmp_path / "missing.pickle", "fingerprint")
+    assert len(Graph() + profiles_graph_cache) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "error", [httpx.ConnectError("refused"), ValueError("not JSON")]
+)
+async def test_no_fingerprint_when_data_version_query_fails(error):
+    repo = RemoteSparqlRepo(AsyncMock(), ReplicaPool(["http://example.com/sparql"]))
+    with patch.object(
+        settings, "sparql_repo_type", SparqlRepoType.remote
+    ), patch.object(
+        settings, "sparql_data_version_query", "SELECT ?v { ?s ?p ?v }"
+    ), patch.object(
+        repo, "probe_data_version", AsyncMock(side_effect=error)
+    ):
+        assert await startup_fingerprint(repo) is None
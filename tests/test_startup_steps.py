@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+import pytest
+
+from prez.services.startup import StartupStep, run_startup_steps
+
+
+def step(name: str, events: list, seconds: float = 0.05, after=()) -> StartupStep:
+    async def run():
+        events.append(("start", name))
+        await asyncio.sleep(seconds)
+        events.append(("end", name))
+
+    return StartupStep(name, run, after=after)
+
+
+@pytest.mark.asyncio
+async def test_independent_steps_run_concurrently():
+    events = []
+    start = time.perf_counter()
+    timings = await run_startup_steps([step(name, events) for name in "abc"])
+    assert time.perf_counter() - start < 0.12
+    assert set(timings) == {"a", "b", "c"}
+
+
+@pytest.mark.asyncio
+async def test_steps_wait_for_their_dependencies():
+    events = []
+    await run_startup_steps(
+        [
+            step("system", events, after=("profiles", "endpoints")),
+            step("profiles", events),
+            step("endpoints", events, seconds=0.1),
+        ]
+    )
+    assert events.index(("start", "system")) > events.index(("end", "endpoints"))
+    assert events.index(("start", "system")) > events.index(("end", "profiles"))
+
+
+@pytest.mark.asyncio
+async def test_failed_step_cancels_the_others():
+    events = []
+
+    async def fail():
+        raise RuntimeError("no triplestore")
+
+    with pytest.raises(RuntimeError):
+        await run_startup_steps(
+            [
+                StartupStep("fail", fail),
+                step("slow", events, seconds=1),
+                step("dependent", events, after=("fail",)),
+            ]
+        )
+    assert events == [("start", "slow")]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "after",
+    [{"a": ("b",), "b": ("a",)}, {"a": ("missing",), "b": ()}],
+)
+async def test_invalid_dependencies(after):
+    with pytest.raises(ValueError):
+        await run_startup_steps(
+            [step(name, [], after=dependencies) for name, dependencies in after.items()]
+        )
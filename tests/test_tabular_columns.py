@@ -0,0 +1,93 @@
+import json
+from unittest.mock import Mock
+
+import httpx
+import pytest
+from pyoxigraph import RdfFormat, Store
+
+from prez.repositories import Columns, PyoxigraphRepo, RemoteSparqlRepo
+from prez.repositories.replica_pool import ReplicaPool
+
+QUERY = """PREFIX ex: <http://example.com/>
+SELECT ?s ?label WHERE { ?s a ex:C OPTIONAL { ?s ex:label ?label } } ORDER BY ?s"""
+
+EXPECTED_ROWS = [("http://example.com/a", "A"), ("http://example.com/b", None)]
+
+
+@pytest.fixture
+def pyoxigraph_repo():
+    store = Store()
+    store.load(
+        b"""
+        PREFIX ex: <http://example.com/>
+        ex:a a ex:C ; ex:label "A" .
+        ex:b a ex:C .
+        """,
+        RdfFormat.TURTLE,
+    )
+    return PyoxigraphRepo(store)
+
+
+def remote_repo(content_type: str, content: bytes) -> RemoteSparqlRepo:
+    async_client = Mock(spec=httpx.AsyncClient)
+    async_client.send.return_value = httpx.Response(
+        200,
+        headers={"content-type": content_type},
+        content=content,
+        request=httpx.Request("POST", "http://test-sparql-endpoint.com"),
+    )
+    return RemoteSparqlRepo(
+        async_client, ReplicaPool(["http://test-sparql-endpoint.com"])
+    )
+
+
+@pytest.mark.asyncio
+async def test_pyoxigraph_columns(pyoxigraph_repo):
+    columns = await pyoxigraph_repo.query_columns(QUERY)
+    assert columns.variables == ("s", "label")
+    assert columns.rows == EXPECTED_ROWS
+
+
+@pytest.mark.asyncio
+async def test_columns_match_bindings(pyoxigraph_repo):
+    _, bindings = await pyoxigraph_repo.tabular_query_to_table(QUERY)
+    columns = Columns.from_bindings(bindings, ["s", "label"])
+    assert columns.rows == (await pyoxigraph_repo.query_columns(QUERY)).rows
+
+
+@pytest.mark.asyncio
+async def test_remote_columns():
+    repo = remote_repo(
+        "application/sparql-results+json",
+        b"""{"head": {"vars": ["s", "label"]}, "results": {"bindings": [
+            {"s": {"type": "uri", "value": "http://example.com/a"},
+             "label": {"type": "literal", "value": "A"}},
+            {"s": {"type": "uri", "value": "http://example.com/b"}}
+        ]}}""",
+    )
+    columns = await repo.query_columns(QUERY)
+    assert columns.variables == ("s", "label")
+    assert columns.rows == EXPECTED_ROWS
+    request_kwargs = repo.async_client.build_request.call_args.kwargs
+    assert request_kwargs["headers"]["Accept"] == "application/sparql-results+json"
+
+
+@pytest.mark.asyncio
+async def test_remote_columns_match_pyoxigraph_columns():
+    store = Store()
+    store.load(
+        b'<http://example.com/a> <http://example.com/label> "" .\n'
+        b'_:b0 <http://example.com/label> "B" .\n',
+        RdfFormat.N_TRIPLES,
+    )
+    query = "SELECT ?s ?label WHERE { ?s <http://example.com/label> ?label }"
+    _, bindings = await PyoxigraphRepo(store).tabular_query_to_table(query)
+    body = json.dumps(
+        {"head": {"vars": ["s", "label"]}, "results": {"bindings": bindings}}
+    )
+    repo = remote_repo("application/sparql-results+json", body.encode())
+    columns = await repo.query_columns(query)
+    assert sorted(columns.rows) == sorted(
+        (await PyoxigraphRepo(store).query_columns(query)).rows
+    )
+    assert ("http://example.com/a", "") in columns.rows